@@ -0,0 +1,94 @@
+# benchmarks/bench_db_indexes.py
+"""
+Benchmark: Abfragezeiten auf einer Datenbank mit 100k Aufgaben,
+einmal mit dem alten Schema (ohne Indizes, journal_mode=DELETE) und einmal
+nach setup_database() (WAL, getunte PRAGMAs, Schema-Migrationen mit Indizes).
+
+Aufruf:  python -m benchmarks.bench_db_indexes [--tasks 100000] [--pools 2000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from core.database_manager import DatabaseManager
+
+LEGACY_SCHEMA = """
+CREATE TABLE modules (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE);
+CREATE TABLE pools (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, module_id INTEGER NOT NULL,
+                    FOREIGN KEY (module_id) REFERENCES modules (id) ON DELETE CASCADE);
+CREATE TABLE tasks (id INTEGER PRIMARY KEY AUTOINCREMENT, content_md TEXT NOT NULL, pool_id INTEGER NOT NULL,
+                    FOREIGN KEY (pool_id) REFERENCES pools (id) ON DELETE CASCADE);
+CREATE TABLE exam_configs (id INTEGER PRIMARY KEY AUTOINCREMENT, module_id INTEGER NOT NULL UNIQUE,
+                           pool_order TEXT NOT NULL, FOREIGN KEY (module_id) REFERENCES modules (id) ON DELETE CASCADE);
+"""
+
+
+def build_legacy_db(path: str, n_tasks: int, n_pools: int, n_modules: int):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO modules (id, name) VALUES (?, ?)",
+                     [(m, f"Modul {m}") for m in range(1, n_modules + 1)])
+    conn.executemany("INSERT INTO pools (id, name, module_id) VALUES (?, ?, ?)",
+                     [(p, f"Pool {p}", (p % n_modules) + 1) for p in range(1, n_pools + 1)])
+    body = "Berechnen Sie $x$ für die folgende Gleichung.\n\n" + "Lorem ipsum dolor sit amet. " * 8
+    conn.executemany("INSERT INTO tasks (content_md, pool_id) VALUES (?, ?)",
+                     ((f"## Aufgabe {t}\n{body}", (t % n_pools) + 1) for t in range(n_tasks)))
+    conn.commit()
+    conn.close()
+
+
+def time_queries(db: DatabaseManager, pool_ids, module_ids, delete_pool_ids):
+    results = {}
+
+    def measure(label, fn, args):
+        samples = []
+        for a in args:
+            start = time.perf_counter()
+            fn(a)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[label] = statistics.median(samples)
+
+    measure("get_tasks_from_pool", db.get_tasks_from_pool, pool_ids)
+    measure("get_pools_for_module", db.get_pools_for_module, module_ids)
+    measure("delete_pool (cascade)", db.delete_pool, delete_pool_ids)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--pools", type=int, default=2_000)
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Erzeuge Datenbank mit {args.tasks} Aufgaben in {args.pools} Pools ...")
+        build_legacy_db(path, args.tasks, args.pools, args.modules)
+
+        pool_ids = rng.sample(range(1, args.pools + 1), args.samples)
+        module_ids = [rng.randint(1, args.modules) for _ in range(args.samples)]
+        remaining = [p for p in range(1, args.pools + 1) if p not in pool_ids]
+        delete_before, delete_after = remaining[:args.samples // 5], remaining[args.samples // 5:2 * (args.samples // 5)]
+
+        with DatabaseManager(path) as db:
+            before = time_queries(db, pool_ids, module_ids, delete_before)
+
+        with DatabaseManager(path) as db:
+            db.setup_database()
+            after = time_queries(db, pool_ids, module_ids, delete_after)
+
+    print(f"\n{'Abfrage (Median)':<26}{'ohne Indizes':>14}{'mit Indizes':>14}{'Faktor':>10}")
+    for label in before:
+        b, a = before[label], after[label]
+        print(f"{label:<26}{b:>11.3f} ms{a:>11.3f} ms{b / a if a else float('inf'):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
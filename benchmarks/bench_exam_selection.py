@@ -0,0 +1,80 @@
+# benchmarks/bench_exam_selection.py
+"""
+Benchmark: Aufgabenauswahl für eine Klausur bzw. mehrere Varianten bei Pools mit je 10k Aufgaben.
+Vergleicht das frühere Vorgehen (alle Aufgaben der Pools inkl. Markdown laden und in Python wählen)
+mit der Auswahl über Aufgaben-IDs aus dem Index, bei der nur die gewählten Texte geladen werden.
+Misst nur Datenbank und Auswahl, ohne pandoc/lualatex.
+
+Aufruf:  python -m benchmarks.bench_exam_selection [--pools 6] [--tasks-per-pool 10000] [--variants 1 8]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from core.database_manager import DatabaseManager
+from core.exam_builder import ExamBuilder
+
+
+def build_sample_module(db: DatabaseManager, pools: int, tasks_per_pool: int, body_chars: int) -> int:
+    filler = ("Gegeben sei die Funktion $f(x) = x^2 + 3x - 5$. " * (body_chars // 48 + 1))[:body_chars]
+    db.bulk_import("Benchmark Modul", ((f"Pool {p}", (f"## Aufgabe {p}.{t}\n\n{filler}" for t in range(tasks_per_pool)))
+                                       for p in range(pools)), on_conflict="keep")
+    module_id = db.get_modules()[0][0]
+    db.save_exam_config(module_id, ",".join(str(pool_id) for pool_id, _ in db.get_pools_for_module(module_id)))
+    return module_id
+
+
+def select_with_content(db: DatabaseManager, module_id: int, count: int, rng):
+    """Früheres Vorgehen: komplette Pools inkl. Markdown laden, dann in Python auswählen."""
+    plan = db.get_exam_plan(module_id, with_content=True)
+    loaded = sum(len(content) for tasks in plan["tasks_by_pool"].values() for _, content in tasks)
+    variants = []
+    for _ in range(count):
+        used, selected = set(), []
+        for item in plan["items"]:
+            available = [task for task in plan["tasks_by_pool"][item["pool_id"]] if task[0] not in used]
+            task = rng.choice(available)
+            used.add(task[0])
+            selected.append(task)
+        variants.append(selected)
+    return variants, loaded
+
+
+def select_by_ids(builder: ExamBuilder, module_id: int, count: int, rng):
+    _, plan_items, task_ids_by_pool = builder._load_exam_plan(module_id)
+    variants = builder._load_contents(builder._select_variants(plan_items, task_ids_by_pool, count, rng))
+    return variants, sum(len(content) for variant in variants for _, content in variant)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pools", type=int, default=6)
+    parser.add_argument("--tasks-per-pool", type=int, default=10_000)
+    parser.add_argument("--body-chars", type=int, default=1500)
+    parser.add_argument("--variants", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, DatabaseManager(os.path.join(tmp, "bench.db")) as db:
+        db.setup_database()
+        module_id = build_sample_module(db, args.pools, args.tasks_per_pool, args.body_chars)
+        builder = ExamBuilder(db)
+
+        print(f"{args.pools} Pools mit je {args.tasks_per_pool} Aufgaben")
+        print(f"{'Varianten':>9}{'Verfahren':>14}{'Median':>11}{'geladen':>12}")
+        for count in args.variants:
+            for label, fn in (("alle Texte", lambda: select_with_content(db, module_id, count, random.Random(1))),
+                              ("nur IDs", lambda: select_by_ids(builder, module_id, count, random.Random(1)))):
+                samples = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    _, loaded = fn()
+                    samples.append((time.perf_counter() - start) * 1000)
+                print(f"{count:>9}{label:>14}{statistics.median(samples):>8.1f} ms{loaded / 1024:>9.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_exam_variants.py
+"""
+Benchmark: Durchsatz von ExamBuilder.build_exam_variants (Varianten pro Minute)
+in Abhängigkeit von der Anzahl der Worker-Prozesse. Benötigt pandoc und lualatex.
+
+Aufruf:  python -m benchmarks.bench_exam_variants [--variants 8] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from core.database_manager import DatabaseManager
+from core.exam_builder import ExamBuilder
+
+
+def build_sample_module(db: DatabaseManager, pools: int, tasks_per_pool: int) -> int:
+    module_id = db.add_module("Benchmark Modul")
+    pool_ids = []
+    for p in range(pools):
+        pool_id = db.add_pool(f"Pool {p + 1}", module_id)
+        pool_ids.append(pool_id)
+        for t in range(tasks_per_pool):
+            db.add_task(f"## Aufgabe {p}.{t}\n\nBerechnen Sie $\\int_0^{t + 1} x^{p + 1}\\,dx$.\n\n"
+                        f"- Teil a)\n- Teil b)", pool_id)
+    db.save_exam_config(module_id, ",".join(str(p) for p in pool_ids))
+    return module_id
+
+
+def main():
+    cpu = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpu}))
+    parser.add_argument("--pools", type=int, default=6)
+    parser.add_argument("--tasks-per-pool", type=int, default=20)
+    args = parser.parse_args()
+
+    missing = [tool for tool in ("pandoc", "lualatex") if not shutil.which(tool)]
+    if missing:
+        print(f"{', '.join(missing)} nicht gefunden, Benchmark übersprungen.")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp, DatabaseManager(os.path.join(tmp, "bench.db")) as db:
+        db.setup_database()
+        module_id = build_sample_module(db, args.pools, args.tasks_per_pool)
+        builder = ExamBuilder(db)
+
+        print(f"{'Worker':>7}{'Dauer':>10}{'Varianten/min':>16}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            ok, result = builder.build_exam_variants(module_id, args.variants, seed=1, max_workers=workers,
+                                                     output_dir=os.path.join(tmp, f"out_{workers}"))
+            elapsed = time.perf_counter() - start
+            if not ok or not all(v["success"] for v in result):
+                print(f"{workers:>7}  Fehler: {result}")
+                continue
+            print(f"{workers:>7}{elapsed:>8.1f} s{args.variants / elapsed * 60:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
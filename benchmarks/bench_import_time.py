@@ -0,0 +1,75 @@
+# benchmarks/bench_import_time.py
+"""
+Startzeit-Profil: importiert ein Modul (Standard: main) in einem frischen Interpreter mit
+`python -X importtime` und gibt Gesamtzeit sowie die teuersten Importe aus (kumuliert und selbst).
+Zusätzlich wird die Werkzeug-Erkennung (pandoc, lualatex) mit kaltem und warmem Cache gemessen.
+
+Aufruf:  python -m benchmarks.bench_import_time [--module main] [--top 15] [--repeat 5]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from core.tools import ToolCache
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_profile(module: str) -> list[tuple[int, int, str]]:
+    """[(self_us, cumulative_us, name), ...] aus der -X importtime-Ausgabe eines frischen Interpreters."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, cwd=PROJECT_ROOT)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def tool_discovery(names=("pandoc", "lualatex")) -> tuple[float, float]:
+    """Dauer der Werkzeug-Erkennung mit leerem und mit gefülltem Cache (neue Instanz = neuer Prozess)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / "tool_cache.json"
+        timings = []
+        for _ in range(2):
+            cache = ToolCache(cache_path)
+            start = time.perf_counter()
+            for name in names:
+                cache.find(name)
+            timings.append(time.perf_counter() - start)
+    return timings[0], timings[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    profiles = [import_profile(args.module) for _ in range(args.repeat)]
+    totals = [next(cum for _, cum, name in rows if name.strip() == args.module) for rows in profiles]
+    rows = profiles[totals.index(sorted(totals)[len(totals) // 2])]
+
+    print(f"import {args.module}: Median {statistics.median(totals) / 1000:.1f} ms über {args.repeat} Läufe")
+    print(f"\nTeuerste Importe (kumuliert, Median-Lauf):\n{'kumuliert':>11}{'selbst':>10}  Modul")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[1:args.top + 1]:
+        print(f"{cumulative_us / 1000:>8.1f} ms{self_us / 1000:>7.1f} ms  {name}")
+    print(f"\nTeuerste Importe (selbst):\n{'selbst':>11}  Modul")
+    for self_us, _, name in sorted(rows, key=lambda r: r[0], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>8.1f} ms  {name.strip()}")
+
+    cold, warm = tool_discovery()
+    print(f"\nWerkzeug-Erkennung (pandoc, lualatex): kalt {cold * 1000:.1f} ms, aus dem Cache {warm * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# benchmarks/bench_latex_format.py
+"""
+Benchmark: lualatex-Kompilierzeit einer Beispielklausur ohne vorkompiliertes Format,
+mit kaltem Format-Cache (inkl. Erzeugen des Formats) und mit warmem Cache.
+Benötigt pandoc, lualatex und mylatexformat.
+
+Aufruf:  python -m benchmarks.bench_latex_format [--tasks 6] [--repeat 3]
+"""
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from core.latex_format import LatexFormatCache, dumpable_preamble
+from core.latex_generator import _prepare_build_dir, compile_pdf_from_tex, generate_tex_file
+
+
+def sample_tasks(n: int):
+    return [f"## Aufgabe {i}\n\nBerechnen Sie $\\int_0^{i + 1} x^2\\,dx$ und begründen Sie den Rechenweg."
+            for i in range(n)]
+
+
+def compile_once(tasks, fmt_cache: LatexFormatCache | None):
+    """Dauer (Format-Erzeugung + Kompilierung) für einen Build in einem frischen Verzeichnis."""
+    with tempfile.TemporaryDirectory() as tmp:
+        build_dir = Path(tmp)
+        _prepare_build_dir(build_dir)
+        tex_path, err = generate_tex_file("Benchmark Modul", tasks, str(build_dir / "bench"))
+        if err:
+            raise RuntimeError(err)
+        start = time.perf_counter()
+        fmt_path = fmt_cache.get(dumpable_preamble(Path(tex_path).read_text(encoding="utf-8"))) if fmt_cache else None
+        ok, msg, _ = compile_pdf_from_tex(tex_path, fmt_path)
+        elapsed = time.perf_counter() - start
+        if not ok:
+            raise RuntimeError(msg)
+        return elapsed, fmt_path is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    missing = [tool for tool in ("pandoc", "lualatex") if not shutil.which(tool)]
+    if missing:
+        print(f"{', '.join(missing)} nicht gefunden, Benchmark übersprungen.")
+        sys.exit(1)
+
+    tasks = sample_tasks(args.tasks)
+    with tempfile.TemporaryDirectory() as fmt_dir:
+        fmt_cache = LatexFormatCache(Path(fmt_dir))
+        without = [compile_once(tasks, None)[0] for _ in range(args.repeat)]
+        cold, used_format = compile_once(tasks, fmt_cache)
+        if not used_format:
+            print("Format konnte nicht erzeugt werden (mylatexformat installiert?), Benchmark übersprungen.")
+            sys.exit(1)
+        warm = [compile_once(tasks, fmt_cache)[0] for _ in range(args.repeat)]
+
+    print(f"{'Variante':<22}{'Dauer':>10}")
+    print(f"{'ohne Format':<22}{statistics.median(without):>8.2f} s")
+    print(f"{'Format kalt':<22}{cold:>8.2f} s")
+    print(f"{'Format warm':<22}{statistics.median(warm):>8.2f} s")
+    print(f"Faktor warm vs. ohne: {statistics.median(without) / statistics.median(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_pandoc_batch.py
+"""
+Benchmark: pandoc pro Aufgabe vs. gebündelt (core.pandoc_batch.convert_many)
+für 10, 100 und 1000 Aufgaben, jeweils nach HTML und LaTeX. Benötigt pandoc.
+
+Aufruf:  python -m benchmarks.bench_pandoc_batch [--sizes 10 100 1000] [--to html5 latex]
+"""
+import argparse
+import shutil
+import sys
+import time
+
+from core.pandoc_batch import convert_many, convert_one
+
+
+def sample_tasks(n: int):
+    return [
+        f"## Aufgabe {i}\n\nGegeben sei $f(x) = x^{i % 7 + 2}$. Bestimmen Sie:\n\n"
+        f"1. die Ableitung $f'(x)$\n2. das Integral $\\int_0^1 f(x)\\,dx$\n\n"
+        f"| a | b |\n|---|---|\n| {i} | {i * 2} |\n\n**Hinweis:** *Rechenweg angeben.*"
+        for i in range(n)
+    ]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--to", nargs="+", default=["html5", "latex"])
+    args = parser.parse_args()
+
+    if not shutil.which("pandoc"):
+        print("pandoc nicht gefunden, Benchmark übersprungen.")
+        sys.exit(1)
+
+    print(f"{'Ziel':<8}{'Aufgaben':>10}{'pro Aufgabe':>14}{'gebündelt':>12}{'Faktor':>9}")
+    for to in args.to:
+        for n in args.sizes:
+            docs = sample_tasks(n)
+            per_task = timed(lambda: [convert_one(d, to) for d in docs])
+            batched = timed(lambda: convert_many(docs, to))
+            print(f"{to:<8}{n:>10}{per_task:>12.2f} s{batched:>10.2f} s{per_task / batched:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
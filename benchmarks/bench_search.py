@@ -0,0 +1,64 @@
+# benchmarks/bench_search.py
+"""
+Benchmark: DatabaseManager.search_tasks (FTS5) auf einer Datenbank mit 100k Aufgaben,
+für seltene, häufige und Präfix-Suchbegriffe, über alle Module und innerhalb eines Moduls.
+
+Aufruf:  python -m benchmarks.bench_search [--tasks 100000] [--modules 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from core.database_manager import DatabaseManager
+
+WORDS = ("Integral Ableitung Matrix Vektor Grenzwert Funktion Wahrscheinlichkeit Erwartungswert "
+         "Bilanz Kostenrechnung Abschreibung Rückstellung Datenbank Normalform Schlüssel Relation "
+         "Algorithmus Laufzeit Rekursion Graph Netzwerk Protokoll Verschlüsselung Primzahl").split()
+
+
+def populate(db: DatabaseManager, n_tasks: int, n_modules: int, pools_per_module: int = 10):
+    rng = random.Random(1)
+    per_pool = max(1, n_tasks // (n_modules * pools_per_module))
+    for m in range(n_modules):
+        pools = ((f"Pool {p}", (f"## Aufgabe {m}.{p}.{t}\n\n" + " ".join(rng.choices(WORDS, k=40))
+                                + f"\n\nKennung K{m}x{p}x{t}." for t in range(per_pool)))
+                 for p in range(pools_per_module))
+        db.bulk_import(f"Modul {m}", pools, on_conflict="keep")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, DatabaseManager(os.path.join(tmp, "bench.db")) as db:
+        db.setup_database()
+        start = time.perf_counter()
+        populate(db, args.tasks, args.modules)
+        print(f"{args.tasks} Aufgaben angelegt und indiziert in {time.perf_counter() - start:.1f} s")
+        module_id = db.get_modules()[0][0]
+
+        cases = [
+            ("selten", "K7x3x12", None),
+            ("häufig", "Integral", None),
+            ("zwei Wörter", "Matrix Vektor", None),
+            ("Präfix", "Verschl", None),
+            ("häufig, ein Modul", "Integral", module_id),
+        ]
+        print(f"{'Suche':<22}{'Treffer':>9}{'Median':>11}{'max':>10}")
+        for label, query, mod in cases:
+            samples = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                hits = db.search_tasks(query, module_id=mod, limit=20)
+                samples.append((time.perf_counter() - t0) * 1000)
+            print(f"{label:<22}{len(hits):>9}{statistics.median(samples):>8.2f} ms{max(samples):>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark: Time-to-Interactive des Desktop-Starts (main.init_worker) ohne pywebview.
+Ein Ersatzfenster protokolliert, wann die UI geladen wird (TTI) und wann alle Startschritte
+einschließlich der Werkzeug-Prüfungen beendet sind.
+Als Vergleich läuft dieselbe Schrittfolge wie vor dem Task-Graphen nacheinander, mit den festen
+0,25 s Pausen nach jedem Schritt und die UI erst ganz am Ende (--mode sequential).
+
+Aufruf:  python -m benchmarks.bench_startup [--db PFAD] [--repeat 5] [--mode both|graph|sequential]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import main as app
+
+
+class FakeWindow:
+    def __init__(self):
+        self.loaded_at = None
+
+    def evaluate_js(self, script):
+        pass
+
+    def load_url(self, url):
+        self.loaded_at = time.perf_counter()
+
+
+def sequential_init_worker(window: FakeWindow, api: "app.Api"):
+    """Der frühere init_worker: alle Schritte nacheinander, je 0,25 s Pause, UI zuletzt."""
+    steps = [
+        ("DB: Tabellen prüfen & anlegen", 10, api._setup_database),
+        ("Datenbank: Module laden", 20, api.get_modules),
+        ("Pandoc/PDF prüfen", 25, app.check_pandoc),
+        ("LaTeX-Engine warm starten", 20, lambda: app.warmup_latex(window, api)),
+        ("Plugins & Worker starten", 20, lambda: threading.Thread(target=api.get_modules, daemon=True).start()),
+        ("Fertig - UI wird geladen", 5, lambda: None),
+    ]
+    progress = 0
+    try:
+        for name, weight, fn in steps:
+            window.evaluate_js(f"window.setProgress({progress}, 'Starte: {app.escape_js(name)}')")
+            try:
+                fn()
+            except Exception as e:
+                window.evaluate_js(f"window.setProgress({progress}, 'Fehler: {app.escape_js(name)} — {app.escape_js(str(e))}')")
+            progress = min(progress + weight, 99)
+            window.evaluate_js(f"window.setProgress({progress}, '... {app.escape_js(name)} abgeschlossen')")
+            time.sleep(0.25)
+    finally:
+        window.evaluate_js("window.setProgress(100, 'Fertig. Öffne Anwendung...')")
+        time.sleep(0.25)
+        window.load_url("index.html")
+
+
+def measure(db_path: str, init_worker=app.init_worker):
+    start = time.perf_counter()
+    api = app.Api(db_path, defer_setup=True)
+    window = FakeWindow()
+    worker = threading.Thread(target=init_worker, args=(window, api))
+    worker.start()
+    worker.join()
+    total = time.perf_counter() - start
+    api._close()
+    return window.loaded_at - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="bestehende Datenbank (Standard: neue, leere Datenbank)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mode", choices=("both", "graph", "sequential"), default="both",
+                        help="Task-Graph (init_worker), frühere Schrittfolge oder beides")
+    args = parser.parse_args()
+
+    modes = {"graph": ("Task-Graph", app.init_worker), "sequential": ("nacheinander", sequential_init_worker)}
+    selected = list(modes) if args.mode == "both" else [args.mode]
+    print(f"{'':<36}{'Median':>10}{'max':>10}")
+    for mode in selected:
+        label, init_worker = modes[mode]
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = args.db or os.path.join(tmp, "bench.db")
+            samples = [measure(db_path, init_worker) for _ in range(args.repeat)]
+        for i, what in enumerate(("UI geladen (TTI)", "alle Startschritte")):
+            values = [s[i] for s in samples]
+            print(f"{f'{label}: {what}':<36}{statistics.median(values):>8.3f} s{max(values):>8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# core/build_cache.py
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+BUILD_CACHE_DIR = PROJECT_ROOT / "data" / "build_cache"
+# Größenlimit in MB; per Umgebungsvariable konfigurierbar (wird auch an Worker-Prozesse vererbt)
+BUILD_CACHE_SIZE_ENV = "GENESIS_BUILD_CACHE_MB"
+DEFAULT_MAX_MB = 512
+
+
+def _file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class BuildCache:
+    """
+    Inhaltsadressierter Cache für fertige Klausur-PDFs unter data/build_cache/<key>.pdf.
+    Der Schlüssel ist ein Hash aus finalem .tex-Quelltext, Template und Asset-Inhalten.
+    Treffer aktualisieren die mtime der Datei, sodass beim Überschreiten des Größenlimits
+    die am längsten ungenutzten PDFs zuerst entfernt werden (LRU).
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else BUILD_CACHE_DIR
+        if max_bytes is None:
+            max_bytes = int(float(os.environ.get(BUILD_CACHE_SIZE_ENV, DEFAULT_MAX_MB)) * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (Pfad, mtime, Größe) -> sha256, damit Assets nicht bei jedem Build neu gehasht werden
+        self._asset_digests: Dict[Tuple[str, int, int], str] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def key_for(self, tex_source: str, template: str, asset_paths: Iterable[Path] = ()) -> str:
+        h = hashlib.sha256()
+        for part in (tex_source, template):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        for path in sorted(Path(p) for p in asset_paths):
+            h.update(path.name.encode("utf-8"))
+            h.update(self._asset_digest(path).encode("ascii") if path.exists() else b"missing")
+        return h.hexdigest()
+
+    def _asset_digest(self, path: Path) -> str:
+        st = path.stat()
+        cache_key = (str(path), st.st_mtime_ns, st.st_size)
+        digest = self._asset_digests.get(cache_key)
+        if digest is None:
+            digest = _file_digest(path)
+            self._asset_digests[cache_key] = digest
+        return digest
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Pfad der gecachten PDF oder None; ein Treffer zählt als zuletzt benutzt."""
+        if not self.enabled:
+            return None
+        entry = self._entry_path(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        return entry
+
+    def put(self, key: str, pdf_path: Path) -> Optional[Path]:
+        """Legt die PDF atomar im Cache ab und räumt danach bis zum Größenlimit auf."""
+        if not self.enabled:
+            return None
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry = self._entry_path(key)
+            staging = self.cache_dir / f".{key}.{uuid.uuid4().hex}.part"
+            shutil.copy2(pdf_path, staging)
+            os.replace(staging, entry)
+            os.utime(entry)
+            self.evict()
+            return entry
+        except OSError as e:
+            logger.warning(f"PDF konnte nicht im Build-Cache abgelegt werden: {e}")
+            return None
+
+    def evict(self):
+        """Entfernt die am längsten ungenutzten Einträge, bis der Cache unter max_bytes liegt."""
+        entries = []
+        for entry in self.cache_dir.glob("*.pdf"):
+            try:
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry))
+            except FileNotFoundError:
+                continue
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+                logger.debug(f"Build-Cache: {entry.name} entfernt (LRU).")
+            except FileNotFoundError:
+                pass
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        entries = list(self.cache_dir.glob("*.pdf")) if self.cache_dir.exists() else []
+        size = 0
+        for entry in entries:
+            try:
+                size += entry.stat().st_size
+            except FileNotFoundError:
+                pass
+        return {"hits": self.hits, "misses": self.misses, "entries": len(entries),
+                "size_bytes": size, "max_bytes": self.max_bytes}
+
+
+_default_cache: Optional[BuildCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_build_cache() -> BuildCache:
+    """Prozessweiter Standard-Cache (Zähler gelten pro Prozess)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = BuildCache()
+        return _default_cache
@@ -0,0 +1,62 @@
+# core/changes.py
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# so viele Ereignisse kann ein Client nachholen (get_changes); wer weiter zurückliegt, lädt komplett neu
+MAX_RECENT_CHANGES = 1000
+
+
+class ChangeFeed:
+    """
+    Fortlaufend nummerierte Änderungsereignisse an Modulen, Pools und Aufgaben.
+    Jede Änderung erhöht die Datenversion um eins; ein Ereignis ist
+    {"version", "entity", "id", "op", "time", ...} mit op "add", "update" oder "delete" und den Feldern,
+    die die Oberfläche zum Nachziehen einer einzelnen Zeile braucht (z. B. module_id, pool_id, raw_md).
+    on_change(event) wird nach jeder Änderung aufgerufen (Push); fehlt ein Ereignis beim Client
+    (Versionssprung), holt er die Lücke mit since() nach.
+    Die Version gilt pro Prozess und beginnt bei jedem Start wieder bei 0.
+    Änderungen, die nicht einzeln bekannt sind (z. B. aus einem anderen Prozess), werden als
+    op "reload" veröffentlicht; der Client lädt dann komplett neu.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[dict], None]] = None, keep: int = MAX_RECENT_CHANGES):
+        self.on_change = on_change
+        self._recent: deque = deque(maxlen=keep)
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, entity: str, entity_id: int, op: str, **data) -> dict:
+        with self._lock:
+            self._version += 1
+            event = {"version": self._version, "entity": entity, "id": entity_id, "op": op,
+                     "time": round(time.time(), 3), **data}
+            self._recent.append(event)
+        if self.on_change:
+            try:
+                self.on_change(event)
+            except Exception as e:
+                logger.debug(f"on_change Fehler: {e}")
+        return event
+
+    def since(self, version: int) -> dict:
+        """
+        Alle Ereignisse nach `version`: {"version", "changes", "complete"}.
+        complete ist False, wenn Ereignisse dazwischen schon verworfen wurden, ein "reload" darunter
+        ist oder `version` nicht aus diesem Prozess stammt – der Client muss dann komplett neu laden.
+        """
+        with self._lock:
+            oldest = self._recent[0]["version"] if self._recent else self._version + 1
+            changes = [event for event in self._recent if event["version"] > version]
+            return {"version": self._version,
+                    "changes": changes,
+                    "complete": oldest - 1 <= version <= self._version
+                                and not any(event["op"] == "reload" for event in changes)}
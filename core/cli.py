@@ -0,0 +1,171 @@
+# core/cli.py
+"""
+Kommandozeile für Stapelläufe ohne GUI (z. B. auf Build-Servern).
+Importiert weder webview noch tkinter; Fortschritt kommt als JSON Lines auf stdout,
+Log-Ausgaben gehen nach stderr.
+
+    python -m core.cli modules
+    python -m core.cli generate --module 3 --module "Mathe 1" --variants 4 --seed 42 --workers 8
+    python -m core.cli generate --all --output-dir out/
+    python -m core.cli rebuild out/*.manifest.json --only-changed
+
+Exit-Codes: 0 alles gebaut, 1 mindestens ein Build fehlgeschlagen, 2 ungültige Eingabe
+(unbekanntes Modul, fehlende Datenbank, ...).
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from .database_manager import DatabaseManager
+from .exam_builder import MAX_VARIANTS, ExamBuilder
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DB_PATH = PROJECT_ROOT / "data" / "klausur.db"
+
+EXIT_OK = 0
+EXIT_BUILD_FAILED = 1
+EXIT_USAGE = 2
+
+
+def emit(event: str, **fields):
+    """Eine Fortschrittsmeldung als JSON-Zeile auf stdout."""
+    sys.stdout.write(json.dumps({"event": event, **fields}, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def _progress(label: str, status: str, info: dict):
+    fields = {"module_id": info.get("module_id"), "variant": info.get("variant"), "label": label, "status": status}
+    if status == "queued":
+        fields["task_ids"] = info.get("task_ids")
+    elif status == "done":
+        fields.update(path=info.get("path"), cached=info.get("cached", False), passes=info.get("passes"))
+    elif status == "unchanged":
+        fields["path"] = info.get("path")
+    elif status == "stage":
+        fields["stage"] = info.get("stage")
+        if "pass" in info:
+            fields["pass"] = info["pass"]
+    else:
+        fields["message"] = info.get("message")
+    emit("build", **fields)
+
+
+def resolve_modules(db: DatabaseManager, selectors: list, all_modules: bool) -> list[int]:
+    """Modul-IDs zu den Angaben auf der Kommandozeile (ID oder exakter Name); ValueError bei Unbekanntem."""
+    modules = db.get_modules()
+    if all_modules:
+        return [module_id for module_id, _ in modules]
+    by_id = {module_id: name for module_id, name in modules}
+    by_name = {name: module_id for module_id, name in modules}
+    resolved = []
+    for selector in selectors:
+        if selector.isdigit() and int(selector) in by_id:
+            resolved.append(int(selector))
+        elif selector in by_name:
+            resolved.append(by_name[selector])
+        else:
+            raise ValueError(f"Unbekanntes Modul: {selector}")
+    return list(dict.fromkeys(resolved))
+
+
+def _parse_seed(seed):
+    if seed is None:
+        return None
+    return int(seed) if seed.lstrip("-").isdigit() else seed
+
+
+def cmd_modules(db: DatabaseManager, args) -> int:
+    for module_id, name in db.get_modules():
+        plan = db.get_exam_plan(module_id, with_content=False)
+        emit("module", module_id=module_id, name=name,
+             pools=len(plan["items"]) if plan else 0,
+             tasks_per_exam=sum(item["draw_count"] for item in plan["items"]) if plan else 0)
+    return EXIT_OK
+
+
+def cmd_generate(db: DatabaseManager, args) -> int:
+    try:
+        module_ids = resolve_modules(db, args.module or [], args.all)
+    except ValueError as e:
+        emit("error", message=str(e))
+        return EXIT_USAGE
+    if not module_ids:
+        emit("error", message="Keine Module angegeben (--module oder --all).")
+        return EXIT_USAGE
+
+    if args.filename and len(module_ids) > 1:
+        emit("error", message="--filename ist nur bei genau einem Modul möglich.")
+        return EXIT_USAGE
+
+    emit("start", modules=module_ids, variants=args.variants, seed=args.seed, workers=args.workers)
+    success, results = ExamBuilder(db).build_modules(module_ids, args.variants, seed=args.seed,
+                                                     filename=args.filename, output_dir=args.output_dir,
+                                                     max_workers=args.workers, on_progress=_progress)
+    if not success:
+        emit("error", message=results)
+        return EXIT_USAGE
+    return _summary(results)
+
+
+def cmd_rebuild(db: DatabaseManager, args) -> int:
+    emit("start", manifests=[str(path) for path in args.manifests], only_changed=args.only_changed)
+    _, results = ExamBuilder(db).rebuild_from_manifests(args.manifests, only_changed=args.only_changed,
+                                                        max_workers=args.workers, on_progress=_progress)
+    return _summary(results)
+
+
+def _summary(results: list) -> int:
+    failed = [result for result in results if not result["success"]]
+    emit("summary", succeeded=len(results) - len(failed), failed=len(failed),
+         results=[{key: result.get(key) for key in ("module_id", "variant", "success", "path", "manifest", "seed",
+                                                    "status", "message") if key in result} for result in results])
+    return EXIT_BUILD_FAILED if failed else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m core.cli", description="Genesis Exam Maker ohne GUI.")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Pfad zur Datenbank (Standard: data/klausur.db)")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Log-Ausgaben auf stderr (-v INFO, -vv DEBUG)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("modules", help="Module mit Klausurplan auflisten")
+
+    generate = commands.add_parser("generate", help="Klausuren bzw. Varianten erzeugen")
+    generate.add_argument("--module", "-m", action="append", help="Modul-ID oder Name (mehrfach möglich)")
+    generate.add_argument("--all", action="store_true", help="alle Module")
+    generate.add_argument("--variants", "-n", type=int, default=1, help=f"Varianten pro Modul (1..{MAX_VARIANTS})")
+    generate.add_argument("--seed", type=_parse_seed, help="Seed für eine reproduzierbare Auswahl")
+    generate.add_argument("--filename", help="Dateiname (nur bei genau einem Modul)")
+    generate.add_argument("--output-dir", "-o", help="Zielordner (Standard: data/generated_exams)")
+    generate.add_argument("--workers", "-j", type=int, help="parallele Builds (Standard: Anzahl CPU-Kerne)")
+
+    rebuild = commands.add_parser("rebuild", help="Klausuren aus Manifesten ohne neue Auslosung neu bauen")
+    rebuild.add_argument("manifests", nargs="+", type=Path, help="*.manifest.json")
+    rebuild.add_argument("--only-changed", action="store_true", help="nur Klausuren mit geänderten Aufgaben")
+    rebuild.add_argument("--workers", "-j", type=int, help="parallele Builds (Standard: Anzahl CPU-Kerne)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+                        level=(logging.WARNING, logging.INFO, logging.DEBUG)[min(args.verbose, 2)])
+
+    if args.command == "generate" and not 1 <= args.variants <= MAX_VARIANTS:
+        emit("error", message=f"--variants muss zwischen 1 und {MAX_VARIANTS} liegen.")
+        return EXIT_USAGE
+    if not Path(args.db).is_file():
+        emit("error", message=f"Datenbank nicht gefunden: {args.db}")
+        return EXIT_USAGE
+
+    with DatabaseManager(args.db) as db:
+        db.setup_database()
+        return {"modules": cmd_modules, "generate": cmd_generate, "rebuild": cmd_rebuild}[args.command](db, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
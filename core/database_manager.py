@@ -1,20 +1,260 @@
 # core/database_manager.py
 import sqlite3
 import os
+import queue
+import re
+import hashlib
+import unicodedata
 import logging
-from typing import Tuple, List, Optional
+import threading
+from contextlib import contextmanager
+from typing import Tuple, List, Optional, Dict, Iterator, Iterable, Callable, Union
 
 logger = logging.getLogger(__name__)
 
+# PRAGMAs, die auf jeder neuen Verbindung gesetzt werden.
+# synchronous=NORMAL ist im WAL-Modus sicher (kein Korruptionsrisiko, nur der letzte Commit
+# kann bei Stromausfall verloren gehen) und spart ein fsync pro Transaktion.
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA busy_timeout = 30000",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",      # ~16 MB Page-Cache pro Verbindung
+    "PRAGMA mmap_size = 268435456",    # bis zu 256 MB per mmap lesen
+    "PRAGMA temp_store = MEMORY",
+)
+# so viele freie Verbindungen hält der Pool eines DatabaseManagers offen
+DEFAULT_POOL_SIZE = 8
+# höchstens so viele eigene Zählerstände merkt sich ein DatabaseManager zwischen zwei
+# data_changes_since-Aufrufen; darüber meldet der nächste Aufruf vorsichtshalber eine fremde Änderung
+MAX_TRACKED_WRITES = 10000
+
+
+# --- Schema-Migrationen ---
+# Jede Migration hebt PRAGMA user_version um eins an und läuft in einer eigenen Transaktion.
+# Neue Schema-Änderungen werden als weitere Funktion an MIGRATIONS angehängt.
+def _migrate_v1_indexes(cur: sqlite3.Cursor):
+    """Sekundärindizes für Pool-/Aufgaben-Lookups und die FK-Cascade-Deletes."""
+    # tasks(pool_id): WHERE pool_id = ? und ON DELETE CASCADE von pools; id ist als rowid enthalten
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pool_id ON tasks (pool_id)")
+    # pools(module_id, name): deckt "SELECT id, name ... WHERE module_id = ? ORDER BY name" komplett ab
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_pools_module_name ON pools (module_id, name)")
+
+
+def _migrate_v2_render_cache(cur: sqlite3.Cursor):
+    """Persistenter Cache für pandoc-Ausgaben, Schlüssel = Hash aus Inhalt, Format und pandoc-Version."""
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS render_cache (
+            cache_key TEXT PRIMARY KEY,
+            task_id INTEGER,
+            fmt TEXT NOT NULL,
+            converter_version TEXT NOT NULL,
+            output TEXT NOT NULL,
+            FOREIGN KEY (task_id) REFERENCES tasks (id) ON DELETE CASCADE
+        )
+    ''')
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_render_cache_task_id ON render_cache (task_id)")
+
+
+def content_hash(content_md: str) -> str:
+    """sha256 des Markdown-Texts; Grundlage der Duplikaterkennung beim Import."""
+    return hashlib.sha256(content_md.encode("utf-8")).hexdigest()
+
+
+def _migrate_v3_content_hash(cur: sqlite3.Cursor):
+    """Spalte tasks.content_hash (inkl. Nachberechnung) und Index für Duplikat-Lookups pro Pool."""
+    cur.execute("ALTER TABLE tasks ADD COLUMN content_hash TEXT")
+    cur.connection.create_function("genesis_content_hash", 1, content_hash, deterministic=True)
+    cur.execute("UPDATE tasks SET content_hash = genesis_content_hash(content_md)")
+    # zusätzlich zu idx_tasks_pool_id: der nach Hash sortierte Index taugt nicht für nach id sortierte Pool-Scans
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pool_hash ON tasks (pool_id, content_hash)")
+
+
+def _migrate_v4_search_index(cur: sqlite3.Cursor):
+    """
+    FTS5-Volltextindex über tasks.content_md (external content), per Trigger synchron gehalten.
+    Die zweite Spalte pool_ref enthält das Token "p<pool_id>", damit sich die Suche innerhalb
+    eines Moduls als MATCH-Bedingung ausdrücken lässt, statt jeden Treffer nachträglich zu joinen.
+    """
+    cur.execute("CREATE VIEW IF NOT EXISTS tasks_fts_source AS SELECT id, content_md, 'p' || pool_id AS pool_ref FROM tasks")
+    cur.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            content_md,
+            pool_ref,
+            content='tasks_fts_source',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, content_md, pool_ref) VALUES (new.id, new.content_md, 'p' || new.pool_id);
+        END
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, content_md, pool_ref)
+            VALUES ('delete', old.id, old.content_md, 'p' || old.pool_id);
+        END
+    ''')
+    cur.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF content_md, pool_id ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, content_md, pool_ref)
+            VALUES ('delete', old.id, old.content_md, 'p' || old.pool_id);
+            INSERT INTO tasks_fts (rowid, content_md, pool_ref) VALUES (new.id, new.content_md, 'p' || new.pool_id);
+        END
+    ''')
+    cur.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def _migrate_v5_task_keyset_index(cur: sqlite3.Cursor):
+    """
+    get_task_page braucht tasks(pool_id) (nach id sortiert, rowid ist Teil des Index), um per
+    "id > ?" direkt an der Cursor-Position weiterzulesen. Der Index stammt aus v1; frühere Stände
+    von v3 haben ihn gelöscht, nur für solche Datenbanken legt v5 ihn wieder an. Sonst No-op.
+    """
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pool_id ON tasks (pool_id)")
+
+
+def _migrate_v6_exam_config_items(cur: sqlite3.Cursor):
+    """
+    Klausur-Konfiguration relational: eine Zeile pro Position mit Pool, Anzahl zu ziehender
+    Aufgaben und Gewichtung. Bestehende CSV-Werte aus exam_configs.pool_order werden übernommen;
+    nicht (mehr) existierende Pools und ungültige Einträge fallen dabei weg.
+    """
+    cur.execute('''
+        CREATE TABLE IF NOT EXISTS exam_config_items (
+            config_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            pool_id INTEGER NOT NULL,
+            draw_count INTEGER NOT NULL DEFAULT 1 CHECK (draw_count >= 1),
+            weight REAL NOT NULL DEFAULT 1 CHECK (weight > 0),
+            PRIMARY KEY (config_id, position),
+            FOREIGN KEY (config_id) REFERENCES exam_configs (id) ON DELETE CASCADE,
+            FOREIGN KEY (pool_id) REFERENCES pools (id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    # für ON DELETE CASCADE beim Löschen eines Pools
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_exam_config_items_pool_id ON exam_config_items (pool_id)")
+    existing_pools = {row[0] for row in cur.execute("SELECT id FROM pools")}
+    rows = []
+    for config_id, pool_order in cur.execute("SELECT id, pool_order FROM exam_configs").fetchall():
+        pool_ids = [int(p) for p in (pool_order or "").split(",") if p.strip().isdigit()]
+        position = 0
+        for pool_id in pool_ids:
+            if pool_id in existing_pools:
+                position += 1
+                rows.append((config_id, position, pool_id))
+    cur.executemany("INSERT OR IGNORE INTO exam_config_items (config_id, position, pool_id) VALUES (?, ?, ?)", rows)
+
+
+def _migrate_v7_data_state(cur: sqlite3.Cursor):
+    """
+    Änderungszähler für Module, Pools, Aufgaben und Klausurpläne: jede Schreibtransaktion von
+    DatabaseManager erhöht ihn (auch aus anderen Prozessen wie der Tk-Oberfläche oder der CLI),
+    siehe DatabaseManager.data_changes_since.
+    """
+    cur.execute("CREATE TABLE IF NOT EXISTS data_state (id INTEGER PRIMARY KEY CHECK (id = 1), counter INTEGER NOT NULL)")
+    cur.execute("INSERT OR IGNORE INTO data_state (id, counter) VALUES (1, 0)")
+
+
+MIGRATIONS = [
+    _migrate_v1_indexes,
+    _migrate_v2_render_cache,
+    _migrate_v3_content_hash,
+    _migrate_v4_search_index,
+    _migrate_v5_task_keyset_index,
+    _migrate_v6_exam_config_items,
+    _migrate_v7_data_state,
+]
+CONFLICT_POLICIES = ("skip", "keep", "cancel")
+
+# Markierung der Treffer in search_tasks-Snippets (Steuerzeichen, damit der Aufrufer den Text
+# zuerst escapen und danach die Markierungen z. B. durch <mark> ersetzen kann)
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+SNIPPET_WORDS = 16
+MAX_SEARCH_RESULTS = 200
+# Seitengrößen für get_task_page
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Länge der ersten Zeile in der Zusammenfassung einer Aufgabe
+SUMMARY_FIRST_LINE_CHARS = 200
+# bei mehr Treffern rankt search_tasks nur die neuesten RANK_CANDIDATES nach bm25 (ranked_all False).
+# benchmarks.bench_search, 100k Aufgaben, Median häufiges Wort / Präfix / zwei Wörter:
+#   alle Treffer ranken ~260 / 285 / 270 ms, 10000 Kandidaten 52 / 54 / 89 ms, 2000 Kandidaten 26 / 28 / 47 ms
+RANK_CANDIDATES = 2000
+
+
+def _search_terms(text: str) -> List[str]:
+    return [term for term in (t.strip('"') for t in text.split()) if term]
+
+
+def fts_query(text: str) -> str:
+    """
+    Wandelt Benutzereingaben in eine sichere FTS5-Abfrage über content_md: jedes Wort wird als
+    Phrase gequotet (keine Syntaxfehler durch Sonderzeichen) und als Präfix gesucht; alle Wörter
+    müssen vorkommen. Leere Eingaben ergeben "".
+    """
+    terms = _search_terms(text)
+    if not terms:
+        return ""
+    return "content_md : (" + " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms) + ")"
+
+
+def _fold(text: str) -> str:
+    """Kleinschreibung ohne diakritische Zeichen, wie der unicode61-Tokenizer mit remove_diacritics."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def make_snippet(content_md: str, query: str, words: int = SNIPPET_WORDS) -> str:
+    """
+    Textausschnitt um den ersten Treffer mit markierten Suchbegriffen (Präfixvergleich wie fts_query).
+    Wird in Python statt mit snippet() erzeugt, damit FTS5 nur die IDs ranken muss.
+    """
+    prefixes = [_fold(term) for term in _search_terms(query)]
+    tokens = list(re.finditer(r"\w+", content_md))
+    hits = {i for i, m in enumerate(tokens) if any(_fold(m.group()).startswith(p) for p in prefixes)}
+    if not tokens:
+        return ""
+    first = max(0, (min(hits) if hits else 0) - words // 4)
+    last = min(len(tokens), first + words) - 1
+    # Originaltext des Fensters (inkl. Satzzeichen und Formeln), Treffer-Wörter markiert
+    parts = ["… "] if first > 0 else []
+    pos = tokens[first].start()
+    for i in range(first, last + 1):
+        match = tokens[i]
+        parts.append(content_md[pos:match.start()])
+        parts.append(f"{SNIPPET_START}{match.group()}{SNIPPET_END}" if i in hits else match.group())
+        pos = match.end()
+    if last + 1 < len(tokens):
+        parts.append(" …")
+    return " ".join("".join(parts).split())
+
 
 class DatabaseManager:
-    def __init__(self, db_path: str = 'data/klausur.db'):
+    def __init__(self, db_path: str = 'data/klausur.db', pool_size: int = DEFAULT_POOL_SIZE):
         """
         Robuster DatabaseManager:
          - speichert den db_path in self.db_path (Fix für deinen Fehler)
-         - öffnet pro Operation eine Verbindung (thread-safe)
+         - leiht Verbindungen aus einem begrenzten Pool aus (thread-safe, kein connect-per-operation),
+           unabhängig davon, in welchem Thread ein Aufruf läuft
+         - kann als Context-Manager verwendet werden (schließt alle Verbindungen beim Verlassen)
         """
         self.db_path = db_path
+        self.pool_size = pool_size
+        # freie Verbindungen; LIFO, damit die zuletzt benutzte (mit warmem Page-Cache) zuerst drankommt
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        # wird von close() erhöht; ausgeliehene Verbindungen älterer Generationen werden bei Rückgabe geschlossen
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Stände von data_state.counter aus eigenen Schreibtransaktionen (siehe data_changes_since);
+        # nur gesammelt, wenn jemand nachfragt (track_own_writes), sonst bliebe die Menge ohne Leser
+        self._own_writes = set()
+        self._tracking_writes = False
+        self._own_writes_dropped = False
+        self._seen_counter = 0
         # stelle sicher, dass das Verzeichnis existiert
         db_dir = os.path.dirname(os.path.abspath(self.db_path))
         if db_dir and not os.path.exists(db_dir):
@@ -26,67 +266,163 @@ class DatabaseManager:
 
         logger.debug(f"DatabaseManager initialisiert mit db_path={self.db_path}")
 
+    def __enter__(self) -> "DatabaseManager":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
     # --- interne Helfer ---
-    def _connect(self) -> Tuple[sqlite3.Connection, sqlite3.Cursor]:
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[Tuple[sqlite3.Connection, sqlite3.Cursor]]:
         """
-        Öffnet eine neue Verbindung und liefert (conn, cursor).
-        Wir setzen PRAGMA foreign_keys = ON für jede Verbindung.
+        Leiht (conn, cursor) aus dem Pool aus und gibt die Verbindung am Ende des Blocks zurück.
+        Ist keine frei, wird eine neue geöffnet; zurück in den Pool kommen höchstens pool_size,
+        überzählige werden geschlossen. Verschachtelte Aufrufe erhalten eigene Verbindungen und
+        warten daher nie auf sich selbst. Schreibzugriffe laufen in `with conn:`; eine bei der
+        Rückgabe noch offene Transaktion wird zurückgerollt, damit die Verbindung sauber bleibt.
         """
-        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
-        conn.execute("PRAGMA foreign_keys = ON")
-        cur = conn.cursor()
-        return conn, cur
+        with self._lock:
+            generation = self._generation
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection()
+            logger.debug("Neue DB-Verbindung geöffnet.")
+        try:
+            yield conn, conn.cursor()
+        finally:
+            self._release(conn, generation)
+
+    def _release(self, conn: sqlite3.Connection, generation: int):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                if generation == self._generation and self._idle.qsize() < self.pool_size:
+                    self._idle.put_nowait(conn)
+                    return
+            conn.close()
+        except Exception as e:
+            logger.debug(f"Fehler beim Zurückgeben einer DB-Verbindung: {e}")
+
+    @contextmanager
+    def _data_write(self):
+        """
+        Schreibtransaktion auf Modulen, Pools, Aufgaben oder Klausurplänen (wie `with conn:`):
+        erhöht zusätzlich data_state.counter und merkt sich den Stand als eigenen Schreibzugriff.
+        """
+        with self._connection() as (conn, cur):
+            counter = None
+            try:
+                with conn:
+                    yield conn, cur
+                    counter = self._bump_data_counter(conn)
+            except BaseException:
+                self._forget_own_write(counter)
+                raise
+
+    def _bump_data_counter(self, conn: sqlite3.Connection) -> Optional[int]:
+        """Erhöht data_state.counter in der laufenden Transaktion (eigener Cursor, lastrowid bleibt)."""
+        try:
+            conn.execute("UPDATE data_state SET counter = counter + 1 WHERE id = 1")
+        except sqlite3.OperationalError:
+            # Datenbank noch ohne Migration v7 (setup_database nicht aufgerufen): nichts zu zählen
+            return None
+        counter = conn.execute("SELECT counter FROM data_state WHERE id = 1").fetchone()[0]
+        # vor dem Commit eintragen, sonst hielte ein gleichzeitiger Leser den Stand kurz für fremd
+        if self._tracking_writes:
+            with self._lock:
+                self._own_writes.add(counter)
+                if len(self._own_writes) > MAX_TRACKED_WRITES:
+                    # bereits ausgewertete Stände verwerfen; reicht das nicht, lieber einmal zu viel neu laden
+                    self._own_writes = {value for value in self._own_writes if value > self._seen_counter}
+                    if len(self._own_writes) > MAX_TRACKED_WRITES:
+                        self._own_writes = {counter}
+                        self._own_writes_dropped = True
+        return counter
+
+    def _forget_own_write(self, counter: Optional[int]):
+        if counter is not None:
+            with self._lock:
+                self._own_writes.discard(counter)
 
     # --- Setup ---
     def setup_database(self):
-        """Erstellt Tabellen, falls sie noch nicht existieren."""
+        """Erstellt Tabellen, falls sie noch nicht existieren, und spielt ausstehende Migrationen ein."""
         try:
-            conn, cur = self._connect()
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS modules (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS pools (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    module_id INTEGER NOT NULL,
-                    FOREIGN KEY (module_id) REFERENCES modules (id) ON DELETE CASCADE
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    content_md TEXT NOT NULL,
-                    pool_id INTEGER NOT NULL,
-                    FOREIGN KEY (pool_id) REFERENCES pools (id) ON DELETE CASCADE
-                )
-            ''')
-            cur.execute('''
-                CREATE TABLE IF NOT EXISTS exam_configs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    module_id INTEGER NOT NULL UNIQUE,
-                    pool_order TEXT NOT NULL,
-                    FOREIGN KEY (module_id) REFERENCES modules (id) ON DELETE CASCADE
-                )
-            ''')
-            conn.commit()
-            conn.close()
-            logger.info("Tabellen-Setup abgeschlossen (oder bereits vorhanden).")
+            with self._connection() as (conn, cur):
+                # WAL ist persistent in der DB-Datei: Leser blockieren nicht mehr hinter einem Schreiber
+                journal_mode = cur.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+                logger.debug(f"SQLite journal_mode={journal_mode}")
+                with conn:
+                    cur.execute('''
+                        CREATE TABLE IF NOT EXISTS modules (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT NOT NULL UNIQUE
+                        )
+                    ''')
+                    cur.execute('''
+                        CREATE TABLE IF NOT EXISTS pools (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT NOT NULL,
+                            module_id INTEGER NOT NULL,
+                            FOREIGN KEY (module_id) REFERENCES modules (id) ON DELETE CASCADE
+                        )
+                    ''')
+                    cur.execute('''
+                        CREATE TABLE IF NOT EXISTS tasks (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            content_md TEXT NOT NULL,
+                            pool_id INTEGER NOT NULL,
+                            FOREIGN KEY (pool_id) REFERENCES pools (id) ON DELETE CASCADE
+                        )
+                    ''')
+                    cur.execute('''
+                        CREATE TABLE IF NOT EXISTS exam_configs (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            module_id INTEGER NOT NULL UNIQUE,
+                            pool_order TEXT NOT NULL,
+                            FOREIGN KEY (module_id) REFERENCES modules (id) ON DELETE CASCADE
+                        )
+                    ''')
+                self._apply_migrations(conn, cur)
+                logger.info("Tabellen-Setup abgeschlossen (oder bereits vorhanden).")
         except Exception as e:
             logger.exception(f"Fehler beim Setup der Datenbank: {e}")
             raise
 
+    def _apply_migrations(self, conn: sqlite3.Connection, cur: sqlite3.Cursor):
+        current = cur.execute("PRAGMA user_version").fetchone()[0]
+        for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+            # BEGIN IMMEDIATE: parallel startende Prozesse migrieren nicht gleichzeitig
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                # nochmal prüfen, ein anderer Prozess könnte schneller gewesen sein
+                if cur.execute("PRAGMA user_version").fetchone()[0] >= version:
+                    conn.rollback()
+                    continue
+                migration(cur)
+                cur.execute(f"PRAGMA user_version = {version}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            logger.info(f"Datenbank-Schema auf Version {version} migriert ({migration.__name__}).")
+
     # --- CRUD / Query-Methoden ---
     def add_module(self, name: str) -> Optional[int]:
         try:
-            conn, cur = self._connect()
-            cur.execute("INSERT INTO modules (name) VALUES (?)", (name,))
+            with self._data_write() as (conn, cur):
+                cur.execute("INSERT INTO modules (name) VALUES (?)", (name,))
             last_id = cur.lastrowid
-            conn.commit()
-            conn.close()
             logger.info(f"Modul '{name}' (ID: {last_id}) hinzugefügt.")
             return last_id
         except sqlite3.IntegrityError:
@@ -98,11 +434,9 @@ class DatabaseManager:
 
     def add_pool(self, name: str, module_id: int) -> Optional[int]:
         try:
-            conn, cur = self._connect()
-            cur.execute("INSERT INTO pools (name, module_id) VALUES (?, ?)", (name, module_id))
+            with self._data_write() as (conn, cur):
+                cur.execute("INSERT INTO pools (name, module_id) VALUES (?, ?)", (name, module_id))
             last_id = cur.lastrowid
-            conn.commit()
-            conn.close()
             logger.info(f"Pool '{name}' (ID: {last_id}) zu Modul ID {module_id} hinzugefügt.")
             return last_id
         except Exception as e:
@@ -111,11 +445,10 @@ class DatabaseManager:
 
     def add_task(self, content_md: str, pool_id: int) -> Optional[int]:
         try:
-            conn, cur = self._connect()
-            cur.execute("INSERT INTO tasks (content_md, pool_id) VALUES (?, ?)", (content_md, pool_id))
+            with self._data_write() as (conn, cur):
+                cur.execute("INSERT INTO tasks (content_md, pool_id, content_hash) VALUES (?, ?, ?)",
+                            (content_md, pool_id, content_hash(content_md)))
             last_id = cur.lastrowid
-            conn.commit()
-            conn.close()
             logger.info(f"Aufgabe (ID: {last_id}) zu Pool ID {pool_id} hinzugefügt.")
             return last_id
         except Exception as e:
@@ -123,23 +456,132 @@ class DatabaseManager:
             return None
 
     def update_task(self, task_id: int, new_content: str) -> bool:
+        """False auch, wenn es die Aufgabe nicht gibt."""
         try:
-            conn, cur = self._connect()
-            cur.execute("UPDATE tasks SET content_md = ? WHERE id = ?", (new_content, task_id))
-            conn.commit()
-            conn.close()
+            with self._data_write() as (conn, cur):
+                cur.execute("UPDATE tasks SET content_md = ?, content_hash = ? WHERE id = ?",
+                            (new_content, content_hash(new_content), task_id))
+                if cur.rowcount == 0:
+                    logger.warning(f"Aufgabe ID {task_id} nicht gefunden, nichts aktualisiert.")
+                    return False
+                cur.execute("DELETE FROM render_cache WHERE task_id = ?", (task_id,))
             logger.info(f"Aufgabe ID {task_id} aktualisiert.")
             return True
         except Exception as e:
             logger.exception(f"Fehler beim Aktualisieren der Aufgabe {task_id}: {e}")
             return False
 
+    def bulk_import(self, module_name: str, pools: Iterable[Tuple[str, Iterable[str]]],
+                    on_conflict: Union[str, Callable[[str], str]] = "skip", batch_size: int = 1000) -> dict:
+        """
+        Importiert ein Modul mit seinen Pools und Aufgaben in einer einzigen Transaktion.
+        pools: [(pool_name, [content_md, ...]), ...]; beides darf ein Generator sein (Streaming).
+        Duplikate werden pro Pool über den Index (pool_id, content_hash) erkannt, auch innerhalb
+        der importierten Daten. on_conflict ist eine Richtlinie aus CONFLICT_POLICIES oder eine
+        Funktion, die beim ersten Duplikat einmal gefragt wird und für den ganzen Import gilt.
+        Die Funktion wird vor der Schreibtransaktion gefragt (lesende Vorprüfung), damit z. B. ein
+        modaler Dialog nicht die Schreibsperre hält; dafür werden die Daten dann einmal vollständig
+        eingelesen. "cancel" bricht ab und rollt alles zurück (InterruptedError).
+        Liefert die Statistik inkl. module_id sowie last_task_id_before/last_task_id_after: die neu
+        eingefügten Aufgaben sind genau die IDs dazwischen (die Transaktion hält die Schreibsperre).
+        Fehler werden nicht abgefangen; die Transaktion wird dabei zurückgerollt.
+        """
+        policy = on_conflict if isinstance(on_conflict, str) else None
+        if policy is not None and policy not in CONFLICT_POLICIES:
+            raise ValueError(f"Unbekannte Konflikt-Richtlinie: {policy}")
+        if policy is None:
+            pools = [(pool_name, list(tasks)) for pool_name, tasks in pools]
+            duplicate = self._first_import_duplicate(module_name, pools)
+            # erst nach der Prüfung entstandene Duplikate (anderes Programm) werden übersprungen
+            policy = "skip"
+            if duplicate is not None:
+                policy = on_conflict(duplicate)
+                if policy not in CONFLICT_POLICIES:
+                    policy = "cancel"
+        if policy == "cancel":
+            raise InterruptedError("Import vom Benutzer abgebrochen.")
+        stats = {"modules_created": 0, "pools_created": 0, "tasks_added": 0, "tasks_skipped": 0}
+        with self._connection() as (conn, cur):
+            counter = None
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                stats["last_task_id_before"] = cur.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+                row = cur.execute("SELECT id FROM modules WHERE name = ?", (module_name,)).fetchone()
+                if row:
+                    module_id = row[0]
+                else:
+                    cur.execute("INSERT INTO modules (name) VALUES (?)", (module_name,))
+                    module_id = cur.lastrowid
+                    stats["modules_created"] += 1
+                stats["module_id"] = module_id
+
+                for pool_name, tasks in pools:
+                    row = cur.execute("SELECT id FROM pools WHERE module_id = ? AND name = ? ORDER BY id LIMIT 1",
+                                      (module_id, pool_name)).fetchone()
+                    if row:
+                        pool_id = row[0]
+                    else:
+                        cur.execute("INSERT INTO pools (name, module_id) VALUES (?, ?)", (pool_name, module_id))
+                        pool_id = cur.lastrowid
+                        stats["pools_created"] += 1
+
+                    batch = []
+                    batch_hashes = set()
+                    for content_md in tasks:
+                        task_hash = content_hash(content_md)
+                        duplicate = task_hash in batch_hashes or cur.execute(
+                            "SELECT 1 FROM tasks WHERE pool_id = ? AND content_hash = ? LIMIT 1",
+                            (pool_id, task_hash)).fetchone() is not None
+                        if duplicate and policy == "skip":
+                            stats["tasks_skipped"] += 1
+                            continue
+                        batch.append((content_md, pool_id, task_hash))
+                        batch_hashes.add(task_hash)
+                        if len(batch) >= batch_size:
+                            cur.executemany("INSERT INTO tasks (content_md, pool_id, content_hash) VALUES (?, ?, ?)", batch)
+                            stats["tasks_added"] += len(batch)
+                            batch.clear()
+                            batch_hashes.clear()
+                    if batch:
+                        cur.executemany("INSERT INTO tasks (content_md, pool_id, content_hash) VALUES (?, ?, ?)", batch)
+                        stats["tasks_added"] += len(batch)
+                stats["last_task_id_after"] = cur.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+                counter = self._bump_data_counter(conn)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                self._forget_own_write(counter)
+                raise
+            logger.info(f"Bulk-Import in Modul '{module_name}' abgeschlossen: {stats}")
+            return stats
+
+    def _first_import_duplicate(self, module_name: str, pools: List[Tuple[str, List[str]]]) -> Optional[str]:
+        """Lesende Vorprüfung für bulk_import: Inhalt des ersten Duplikats oder None (ohne Transaktion)."""
+        with self._connection() as (conn, cur):
+            row = cur.execute("SELECT id FROM modules WHERE name = ?", (module_name,)).fetchone()
+            module_id = row[0] if row else None
+            seen: Dict[str, set] = {}
+            for pool_name, tasks in pools:
+                pool_id = None
+                if module_id is not None:
+                    row = cur.execute("SELECT id FROM pools WHERE module_id = ? AND name = ? ORDER BY id LIMIT 1",
+                                      (module_id, pool_name)).fetchone()
+                    pool_id = row[0] if row else None
+                # gleichnamige Pools im Import landen im selben Pool
+                hashes = seen.setdefault(pool_name, set())
+                for content_md in tasks:
+                    task_hash = content_hash(content_md)
+                    if task_hash in hashes or (pool_id is not None and cur.execute(
+                            "SELECT 1 FROM tasks WHERE pool_id = ? AND content_hash = ? LIMIT 1",
+                            (pool_id, task_hash)).fetchone() is not None):
+                        return content_md
+                    hashes.add(task_hash)
+        return None
+
     def delete_module(self, module_id: int) -> bool:
         try:
-            conn, cur = self._connect()
-            cur.execute("DELETE FROM modules WHERE id = ?", (module_id,))
-            conn.commit()
-            conn.close()
+            with self._data_write() as (conn, cur):
+                cur.execute("DELETE FROM modules WHERE id = ?", (module_id,))
             logger.info(f"Modul ID {module_id} gelöscht.")
             return True
         except Exception as e:
@@ -148,10 +590,8 @@ class DatabaseManager:
 
     def delete_pool(self, pool_id: int) -> bool:
         try:
-            conn, cur = self._connect()
-            cur.execute("DELETE FROM pools WHERE id = ?", (pool_id,))
-            conn.commit()
-            conn.close()
+            with self._data_write() as (conn, cur):
+                cur.execute("DELETE FROM pools WHERE id = ?", (pool_id,))
             logger.info(f"Pool ID {pool_id} gelöscht.")
             return True
         except Exception as e:
@@ -159,11 +599,13 @@ class DatabaseManager:
             return False
 
     def delete_task(self, task_id: int) -> bool:
+        """False auch, wenn es die Aufgabe nicht gibt."""
         try:
-            conn, cur = self._connect()
-            cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-            conn.commit()
-            conn.close()
+            with self._data_write() as (conn, cur):
+                cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                if cur.rowcount == 0:
+                    logger.warning(f"Aufgabe ID {task_id} nicht gefunden, nichts gelöscht.")
+                    return False
             logger.info(f"Aufgabe ID {task_id} gelöscht.")
             return True
         except Exception as e:
@@ -172,94 +614,478 @@ class DatabaseManager:
 
     def get_modules(self) -> List[tuple]:
         try:
-            conn, cur = self._connect()
-            cur.execute("SELECT id, name FROM modules ORDER BY name")
-            rows = cur.fetchall()
-            conn.close()
-            return rows
+            with self._connection() as (conn, cur):
+                cur.execute("SELECT id, name FROM modules ORDER BY name")
+                rows = cur.fetchall()
+                return rows
         except Exception as e:
             logger.exception(f"get_modules Fehler: {e}")
             return []
 
     def get_pools_for_module(self, module_id: int) -> List[tuple]:
         try:
-            conn, cur = self._connect()
-            cur.execute("SELECT id, name FROM pools WHERE module_id = ? ORDER BY name", (module_id,))
-            rows = cur.fetchall()
-            conn.close()
-            return rows
+            with self._connection() as (conn, cur):
+                cur.execute("SELECT id, name FROM pools WHERE module_id = ? ORDER BY name", (module_id,))
+                rows = cur.fetchall()
+                return rows
         except Exception as e:
             logger.exception(f"get_pools_for_module Fehler: {e}")
             return []
 
     def get_tasks_from_pool(self, pool_id: int) -> List[tuple]:
         try:
-            conn, cur = self._connect()
-            cur.execute("SELECT id, content_md FROM tasks WHERE pool_id = ?", (pool_id,))
-            rows = cur.fetchall()
-            conn.close()
-            return rows
+            with self._connection() as (conn, cur):
+                cur.execute("SELECT id, content_md FROM tasks WHERE pool_id = ?", (pool_id,))
+                rows = cur.fetchall()
+                return rows
         except Exception as e:
             logger.exception(f"get_tasks_from_pool Fehler: {e}")
             return []
 
+    def get_task_page(self, pool_id: int, after_id: int = 0, limit: int = DEFAULT_PAGE_SIZE,
+                      with_content: bool = False) -> dict:
+        """
+        Eine Seite der Aufgaben eines Pools, nach id sortiert (Keyset-Pagination: after_id ist die
+        letzte id der vorherigen Seite, 0 für den Anfang; limit wird auf MAX_PAGE_SIZE begrenzt).
+        Liefert {"items": [(id, first_line, length[, content_md]), ...], "next_after_id": id oder None}.
+        Ohne with_content wird nur die Zusammenfassung (erste Zeile, Länge) geladen.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        content_col = ", content_md" if with_content else ""
+        try:
+            with self._connection() as (conn, cur):
+                cur.execute(f'''
+                    SELECT id,
+                           substr(content_md, 1, CASE instr(content_md, char(10))
+                                                     WHEN 0 THEN {SUMMARY_FIRST_LINE_CHARS}
+                                                     ELSE min(instr(content_md, char(10)) - 1, {SUMMARY_FIRST_LINE_CHARS})
+                                                 END),
+                           length(content_md){content_col}
+                    FROM tasks
+                    WHERE pool_id = ? AND id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', (pool_id, int(after_id or 0), limit + 1))
+                rows = cur.fetchall()
+                # eine Zeile mehr gelesen: so ist ohne COUNT bekannt, ob es eine weitere Seite gibt
+                items = rows[:limit]
+                next_after_id = items[-1][0] if len(rows) > limit else None
+                return {"items": items, "next_after_id": next_after_id}
+        except Exception as e:
+            logger.exception(f"get_task_page Fehler: {e}")
+            return {"items": [], "next_after_id": None}
+
+    def get_tasks_by_ids(self, task_ids: List[int]) -> Dict[int, str]:
+        """Liefert {task_id: content_md} für die angegebenen IDs (fehlende IDs fehlen im Ergebnis)."""
+        found: Dict[int, str] = {}
+        try:
+            with self._connection() as (conn, cur):
+                ids = list(dict.fromkeys(task_ids))
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    cur.execute(f"SELECT id, content_md FROM tasks WHERE id IN ({placeholders})", chunk)
+                    found.update(cur.fetchall())
+        except Exception as e:
+            logger.exception(f"get_tasks_by_ids Fehler: {e}")
+        return found
+
+    def get_task_hashes(self, task_ids: List[int]) -> Dict[int, str]:
+        """Liefert {task_id: content_hash} ohne den Markdown-Text zu lesen (für Manifest-Abgleiche)."""
+        found: Dict[int, str] = {}
+        try:
+            with self._connection() as (conn, cur):
+                ids = list(dict.fromkeys(task_ids))
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    cur.execute(f"SELECT id, content_hash FROM tasks WHERE id IN ({placeholders})", chunk)
+                    found.update(cur.fetchall())
+        except Exception as e:
+            logger.exception(f"get_task_hashes Fehler: {e}")
+        return found
+
+    def count_tasks_in_pool(self, pool_id: int) -> int:
+        try:
+            with self._connection() as (conn, cur):
+                return cur.execute("SELECT COUNT(*) FROM tasks WHERE pool_id = ?", (pool_id,)).fetchone()[0]
+        except Exception as e:
+            logger.exception(f"count_tasks_in_pool Fehler: {e}")
+            return 0
+
+    def get_module_tree(self, module_id: int, with_content: bool = True) -> Optional[dict]:
+        """
+        Lädt Modul -> Pools -> Aufgaben mit einer einzigen JOIN-Abfrage (statt einer Abfrage pro Pool).
+        Rückgabe: {"id", "name", "pools": [{"id", "name", "tasks": [...]}, ...]} oder None.
+        Die Aufgaben sind (id, content_md)-Tupel wie bei get_tasks_from_pool,
+        mit with_content=False nur die IDs (ohne den Markdown-Text zu laden).
+        """
+        try:
+            with self._connection() as (conn, cur):
+                content_col = "t.content_md" if with_content else "NULL"
+                cur.execute(f'''
+                    SELECT m.id, m.name, p.id, p.name, t.id, {content_col}
+                    FROM modules m
+                    LEFT JOIN pools p ON p.module_id = m.id
+                    LEFT JOIN tasks t ON t.pool_id = p.id
+                    WHERE m.id = ?
+                    ORDER BY p.name, p.id, t.id
+                ''', (module_id,))
+                tree = None
+                pool = None
+                for m_id, m_name, p_id, p_name, t_id, content_md in cur:
+                    if tree is None:
+                        tree = {"id": m_id, "name": m_name, "pools": []}
+                    if p_id is None:
+                        continue
+                    if pool is None or pool["id"] != p_id:
+                        pool = {"id": p_id, "name": p_name, "tasks": []}
+                        tree["pools"].append(pool)
+                    if t_id is not None:
+                        pool["tasks"].append((t_id, content_md) if with_content else t_id)
+                return tree
+        except Exception as e:
+            logger.exception(f"get_module_tree Fehler: {e}")
+            return None
+
+    def iter_module_rows(self, module_id: int, pool_id: Optional[int] = None) -> Iterator[tuple]:
+        """
+        Liefert (pool_id, pool_name, task_id, content_md) Zeile für Zeile direkt vom Cursor,
+        sortiert wie get_module_tree; leere Pools erscheinen einmal mit task_id None.
+        Für Exporte großer Module, ohne den ganzen Baum in den Speicher zu laden.
+        Fehler werden nicht abgefangen, sondern an den Aufrufer weitergereicht.
+        """
+        # die Verbindung bleibt ausgeliehen, solange der Generator lebt
+        with self._connection() as (conn, cur):
+            cur.execute('''
+                SELECT p.id, p.name, t.id, t.content_md
+                FROM pools p
+                LEFT JOIN tasks t ON t.pool_id = p.id
+                WHERE p.module_id = ? AND (? IS NULL OR p.id = ?)
+                ORDER BY p.name, p.id, t.id
+            ''', (module_id, pool_id, pool_id))
+            yield from cur
+
+    def iter_task_id_range(self, after_id: int, up_to_id: int, chunk_size: int = 500) -> Iterator[List[tuple]]:
+        """
+        Liefert die Aufgaben mit after_id < id <= up_to_id als Listen von (task_id, content_md),
+        höchstens chunk_size pro Liste (Keyset über id). Fehler werden an den Aufrufer weitergereicht.
+        """
+        with self._connection() as (conn, cur):
+            while after_id < up_to_id:
+                rows = cur.execute("SELECT id, content_md FROM tasks WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                                   (after_id, up_to_id, chunk_size)).fetchall()
+                if not rows:
+                    return
+                yield rows
+                after_id = rows[-1][0]
+
+    # --- Volltextsuche ---
+    def search_tasks(self, query: str, module_id: Optional[int] = None, limit: int = 20,
+                     offset: int = 0) -> List[dict]:
+        """
+        Volltextsuche über alle Aufgaben (optional nur in einem Modul), immer sortiert nach bm25
+        (rank, kleiner = besser). Bei mehr als RANK_CANDIDATES Treffern werden nur die neuesten
+        RANK_CANDIDATES Treffer gerankt; ranked_all ist dann False.
+        Liefert [{"task_id", "pool_id", "pool_name", "module_id", "module_name", "snippet", "rank", "ranked_all"}, ...];
+        Treffer im Snippet sind mit SNIPPET_START/SNIPPET_END markiert.
+        """
+        match = fts_query(query or "")
+        if not match:
+            return []
+        limit = max(1, min(int(limit), MAX_SEARCH_RESULTS))
+        try:
+            with self._connection() as (conn, cur):
+                if module_id is not None:
+                    pool_ids = [row[0] for row in cur.execute("SELECT id FROM pools WHERE module_id = ?", (module_id,))]
+                    if not pool_ids:
+                        return []
+                    match = "pool_ref : (" + " OR ".join(f"p{pool_id}" for pool_id in pool_ids) + f") AND {match}"
+                # bm25 bewertet jeden Treffer einzeln; sehr allgemeine Suchen ranken deshalb nur eine
+                # begrenzte Kandidatenmenge (die neuesten Treffer). Ein Kandidat mehr als RANK_CANDIDATES
+                # zeigt an, ob es weitere gibt – ohne die FTS-Abfrage ein zweites Mal auszuführen.
+                ranked = cur.execute('''
+                    SELECT rowid, score, count(*) OVER () FROM (
+                        SELECT rowid, bm25(tasks_fts) AS score FROM tasks_fts WHERE tasks_fts MATCH ?
+                        ORDER BY rowid DESC
+                        LIMIT ?
+                    )
+                    ORDER BY score
+                    LIMIT ? OFFSET ?
+                ''', (match, RANK_CANDIDATES + 1, limit, max(0, int(offset)))).fetchall()
+                if not ranked:
+                    return []
+                ranked_all = ranked[0][2] <= RANK_CANDIDATES
+                placeholders = ",".join("?" * len(ranked))
+                details = {row[0]: row for row in cur.execute(f'''
+                    SELECT t.id, t.content_md, p.id, p.name, m.id, m.name
+                    FROM tasks t
+                    JOIN pools p ON p.id = t.pool_id
+                    JOIN modules m ON m.id = p.module_id
+                    WHERE t.id IN ({placeholders})
+                ''', [task_id for task_id, _, _ in ranked])}
+                results = []
+                for task_id, rank, _ in ranked:
+                    if task_id not in details:
+                        continue
+                    _, content_md, p_id, p_name, m_id, m_name = details[task_id]
+                    results.append({"task_id": task_id, "pool_id": p_id, "pool_name": p_name, "module_id": m_id,
+                                    "module_name": m_name, "snippet": make_snippet(content_md, query), "rank": rank,
+                                    "ranked_all": ranked_all})
+                return results
+        except Exception as e:
+            logger.exception(f"search_tasks Fehler: {e}")
+            return []
+
+    def rebuild_search_index(self) -> bool:
+        """Baut den Volltextindex komplett aus tasks neu auf und optimiert ihn."""
+        try:
+            with self._connection() as (conn, cur):
+                with conn:
+                    cur.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+                    cur.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('optimize')")
+                logger.info("Volltextindex neu aufgebaut.")
+                return True
+        except Exception as e:
+            logger.exception(f"rebuild_search_index Fehler: {e}")
+            return False
+
     # --- zusätzliche Methoden ---
     def get_module_by_id(self, module_id: int) -> Optional[tuple]:
         try:
-            conn, cur = self._connect()
-            cur.execute("SELECT id, name FROM modules WHERE id = ?", (module_id,))
-            row = cur.fetchone()
-            conn.close()
-            return row
+            with self._connection() as (conn, cur):
+                cur.execute("SELECT id, name FROM modules WHERE id = ?", (module_id,))
+                row = cur.fetchone()
+                return row
         except Exception as e:
             logger.exception(f"get_module_by_id Fehler: {e}")
             return None
 
     def get_pool_with_module_info(self, pool_id: int) -> Optional[tuple]:
         try:
-            conn, cur = self._connect()
-            cur.execute('''
-                SELECT p.id, p.name, p.module_id, m.name
-                FROM pools p
-                LEFT JOIN modules m ON p.module_id = m.id
-                WHERE p.id = ?
-            ''', (pool_id,))
-            row = cur.fetchone()
-            conn.close()
-            return row
+            with self._connection() as (conn, cur):
+                cur.execute('''
+                    SELECT p.id, p.name, p.module_id, m.name
+                    FROM pools p
+                    LEFT JOIN modules m ON p.module_id = m.id
+                    WHERE p.id = ?
+                ''', (pool_id,))
+                row = cur.fetchone()
+                return row
         except Exception as e:
             logger.exception(f"get_pool_with_module_info Fehler: {e}")
             return None
 
+    def get_task_location(self, task_id: int) -> Optional[tuple]:
+        """(pool_id, module_id) einer Aufgabe oder None, wenn es sie nicht gibt."""
+        try:
+            with self._connection() as (conn, cur):
+                cur.execute('''
+                    SELECT t.pool_id, p.module_id
+                    FROM tasks t
+                    JOIN pools p ON t.pool_id = p.id
+                    WHERE t.id = ?
+                ''', (task_id,))
+                return cur.fetchone()
+        except Exception as e:
+            logger.exception(f"get_task_location Fehler: {e}")
+            return None
+
     def get_exam_config_for_module(self, module_id: int) -> Optional[tuple]:
         try:
-            conn, cur = self._connect()
-            cur.execute("SELECT id, module_id, pool_order FROM exam_configs WHERE module_id = ?", (module_id,))
-            row = cur.fetchone()
-            conn.close()
-            return row
+            with self._connection() as (conn, cur):
+                cur.execute("SELECT id, module_id, pool_order FROM exam_configs WHERE module_id = ?", (module_id,))
+                row = cur.fetchone()
+                return row
         except Exception as e:
             logger.exception(f"get_exam_config_for_module Fehler: {e}")
             return None
 
     def save_exam_config(self, module_id: int, pool_order_str: str) -> bool:
+        """
+        Speichert die Pool-Reihenfolge als CSV (je eine Aufgabe pro Pool), siehe save_exam_plan.
+        Wie bei Migration v6 fallen IDs weg, die zu keinem Pool des Moduls (mehr) gehören.
+        """
+        module_pools = {pool_id for pool_id, _ in self.get_pools_for_module(module_id)}
+        pool_ids = [int(p) for p in pool_order_str.split(",") if p.strip().isdigit()]
+        valid_ids = [pool_id for pool_id in pool_ids if pool_id in module_pools]
+        if len(valid_ids) != len(pool_ids):
+            logger.warning(f"save_exam_config: {len(pool_ids) - len(valid_ids)} unbekannte Pool-ID(s) für Modul ID {module_id} verworfen.")
+        return self.save_exam_plan(module_id, [(pool_id, 1, 1.0) for pool_id in valid_ids])
+
+    def save_exam_plan(self, module_id: int, items: List[tuple]) -> bool:
+        """
+        Speichert den Klausurplan eines Moduls: items = [(pool_id, draw_count, weight), ...] in Reihenfolge.
+        exam_configs.pool_order wird für ältere Leser als CSV mitgeführt.
+        """
         try:
-            conn, cur = self._connect()
-            # INSERT OR REPLACE: wir ersetzen die Konfiguration für das Modul
-            cur.execute("""
-                INSERT INTO exam_configs (module_id, pool_order)
-                VALUES (?, ?)
-                ON CONFLICT(module_id) DO UPDATE SET pool_order = excluded.pool_order
-            """, (module_id, pool_order_str))
-            conn.commit()
-            conn.close()
+            with self._data_write() as (conn, cur):
+                # INSERT OR REPLACE: wir ersetzen die Konfiguration für das Modul
+                cur.execute("""
+                    INSERT INTO exam_configs (module_id, pool_order)
+                    VALUES (?, ?)
+                    ON CONFLICT(module_id) DO UPDATE SET pool_order = excluded.pool_order
+                """, (module_id, ",".join(str(pool_id) for pool_id, _, _ in items)))
+                config_id = cur.execute("SELECT id FROM exam_configs WHERE module_id = ?", (module_id,)).fetchone()[0]
+                cur.execute("DELETE FROM exam_config_items WHERE config_id = ?", (config_id,))
+                cur.executemany(
+                    "INSERT INTO exam_config_items (config_id, position, pool_id, draw_count, weight) VALUES (?, ?, ?, ?, ?)",
+                    [(config_id, position, pool_id, int(draw_count), float(weight))
+                     for position, (pool_id, draw_count, weight) in enumerate(items, 1)])
             logger.info(f"Klausurkonfiguration für Modul ID {module_id} gespeichert.")
             return True
         except Exception as e:
             logger.exception(f"save_exam_config Fehler: {e}")
             return False
 
+    def get_exam_plan(self, module_id: int, with_content: bool = True) -> Optional[dict]:
+        """
+        Lädt Modul, Klausurplan und die Aufgaben aller beteiligten Pools mit einer JOIN-Abfrage.
+        Rückgabe: {"module_id", "module_name",
+                   "items": [{"position", "pool_id", "pool_name", "draw_count", "weight"}, ...],
+                   "tasks_by_pool": {pool_id: [(id, content_md), ...] bzw. [id, ...]}}
+        oder None, wenn das Modul nicht existiert. Ohne Konfiguration ist items leer.
+        """
+        try:
+            with self._connection() as (conn, cur):
+                content_col = "t.content_md" if with_content else "NULL"
+                cur.execute(f'''
+                    SELECT m.id, m.name, i.position, i.pool_id, p.name, i.draw_count, i.weight, t.id, {content_col}
+                    FROM modules m
+                    LEFT JOIN exam_configs c ON c.module_id = m.id
+                    LEFT JOIN exam_config_items i ON i.config_id = c.id
+                    LEFT JOIN pools p ON p.id = i.pool_id
+                    LEFT JOIN tasks t ON t.pool_id = i.pool_id
+                    WHERE m.id = ?
+                    ORDER BY i.position, t.id
+                ''', (module_id,))
+                plan = None
+                item = None
+                for m_id, m_name, position, pool_id, pool_name, draw_count, weight, t_id, content_md in cur:
+                    if plan is None:
+                        plan = {"module_id": m_id, "module_name": m_name, "items": [], "tasks_by_pool": {}}
+                    if position is None:
+                        continue
+                    if item is None or item["position"] != position:
+                        item = {"position": position, "pool_id": pool_id, "pool_name": pool_name,
+                                "draw_count": draw_count, "weight": weight}
+                        plan["items"].append(item)
+                        # derselbe Pool kann an mehreren Positionen vorkommen, Aufgaben nur einmal sammeln
+                        pool_tasks = plan["tasks_by_pool"].setdefault(pool_id, [])
+                        collect = not pool_tasks
+                    if t_id is not None and collect:
+                        pool_tasks.append((t_id, content_md) if with_content else t_id)
+                return plan
+        except Exception as e:
+            logger.exception(f"get_exam_plan Fehler: {e}")
+            return None
+
+    # --- Render-Cache (pandoc-Ausgaben) ---
+    def get_rendered(self, cache_keys: List[str]) -> Dict[str, str]:
+        """Liefert {cache_key: output} für alle vorhandenen Schlüssel."""
+        found = {}
+        try:
+            with self._connection() as (conn, cur):
+                # in Blöcken abfragen, SQLite begrenzt die Anzahl der Parameter
+                for i in range(0, len(cache_keys), 500):
+                    chunk = cache_keys[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    cur.execute(f"SELECT cache_key, output FROM render_cache WHERE cache_key IN ({placeholders})", chunk)
+                    found.update(cur.fetchall())
+        except Exception as e:
+            logger.exception(f"get_rendered Fehler: {e}")
+        return found
+
+    def store_rendered(self, rows: List[tuple]) -> bool:
+        """rows: [(cache_key, task_id, fmt, converter_version, output), ...]"""
+        try:
+            with self._connection() as (conn, cur):
+                with conn:
+                    cur.executemany('''
+                        INSERT INTO render_cache (cache_key, task_id, fmt, converter_version, output)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(cache_key) DO UPDATE SET task_id = COALESCE(excluded.task_id, task_id)
+                    ''', rows)
+                return True
+        except Exception as e:
+            logger.exception(f"store_rendered Fehler: {e}")
+            return False
+
+    def delete_rendered_for_task(self, task_id: int) -> bool:
+        try:
+            with self._connection() as (conn, cur):
+                with conn:
+                    cur.execute("DELETE FROM render_cache WHERE task_id = ?", (task_id,))
+                return True
+        except Exception as e:
+            logger.exception(f"delete_rendered_for_task Fehler: {e}")
+            return False
+
+    def purge_rendered(self, keep_version: str) -> int:
+        """Entfernt Cache-Einträge anderer Konverter-Versionen; liefert die Anzahl gelöschter Zeilen."""
+        try:
+            with self._connection() as (conn, cur):
+                with conn:
+                    cur.execute("DELETE FROM render_cache WHERE converter_version != ?", (keep_version,))
+                if cur.rowcount:
+                    logger.info(f"{cur.rowcount} veraltete Render-Cache-Einträge entfernt.")
+                return cur.rowcount
+        except Exception as e:
+            logger.exception(f"purge_rendered Fehler: {e}")
+            return 0
+
+    # --- Änderungen durch andere Schreiber ---
+    def get_data_counter(self) -> Optional[int]:
+        """Aktueller Stand von data_state.counter (None, wenn die Tabelle fehlt oder die DB nicht lesbar ist)."""
+        try:
+            with self._connection() as (conn, cur):
+                row = cur.execute("SELECT counter FROM data_state WHERE id = 1").fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logger.exception(f"get_data_counter Fehler: {e}")
+            return None
+
+    def track_own_writes(self) -> Optional[int]:
+        """Beginnt, eigene Schreibzugriffe für data_changes_since zu sammeln; liefert den aktuellen Zählerstand."""
+        self._tracking_writes = True
+        return self.get_data_counter()
+
+    def data_changes_since(self, counter: int) -> Tuple[Optional[int], bool]:
+        """
+        Liefert (aktueller Zählerstand, ob seit `counter` jemand anderes geschrieben hat): andere
+        DatabaseManager-Instanzen, andere Prozesse. Jeder Commit erhält einen eigenen Zählerstand,
+        daher bleibt ein fremder Schreibzugriff auch neben eigenen nicht unbemerkt.
+        Setzt track_own_writes() voraus, sonst gilt jeder Schreibzugriff als fremd.
+        """
+        current = self.get_data_counter()
+        if current is None:
+            return None, False
+        with self._lock:
+            external = self._own_writes_dropped or any(
+                value not in self._own_writes for value in range(counter + 1, current + 1))
+            self._own_writes_dropped = False
+            # erledigte Stände vergessen; noch nicht committete (> current) bleiben stehen
+            self._own_writes = {value for value in self._own_writes if value > current}
+            self._seen_counter = current
+        return current, external
+
     def close(self):
-        # Da wir pro-Operation Verbindungen öffnen und sofort schließen,
-        # gibt es hier nichts Großes zu schließen. Wir geben nur Info.
-        logger.info("DatabaseManager: keine persistenten Verbindungen zu schließen (per-op connections used).")
+        """
+        Schließt alle freien Verbindungen; gerade ausgeliehene werden bei ihrer Rückgabe geschlossen.
+        Der Manager bleibt verwendbar; der nächste Zugriff öffnet wieder eine Verbindung.
+        """
+        connections = []
+        with self._lock:
+            self._generation += 1
+            while True:
+                try:
+                    connections.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                logger.debug(f"Fehler beim Schließen einer DB-Verbindung: {e}")
+        if connections:
+            logger.info(f"DatabaseManager: {len(connections)} Verbindung(en) geschlossen.")
@@ -1,60 +1,412 @@
 # core/exam_builder.py
+import os
 import random
 import logging
+import threading
+from collections import Counter
+from concurrent.futures import CancelledError
+from typing import Callable, Optional
+
 from .database_manager import DatabaseManager
-from .latex_generator import generate_tex_file, compile_pdf_from_tex
+from .build_cache import get_build_cache
+from .exam_manifest import (build_manifest, changed_task_ids, iter_manifests, manifest_task_ids, new_seed,
+                            pdf_path_for, write_manifest)
+from .latex_generator import CANCEL_POLL_INTERVAL, BuildCancelled, generate_exam_pdf
+from .render_cache import RenderCache
 
 logger = logging.getLogger(__name__)
 
+MAX_VARIANTS = 52
+
+
+def variant_label(index: int) -> str:
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA', ..."""
+    label = ""
+    index += 1
+    while index:
+        index, rest = divmod(index - 1, 26)
+        label = chr(ord("A") + rest) + label
+    return label
+
+
+# im Worker-Prozess gesetzt (_init_build_worker): Rückkanal für Fortschritt und gemeinsames Abbruchsignal
+_worker_stage_queue = None
+_worker_cancel_event = None
+
+
+def _init_build_worker(stage_queue, cancel_event):
+    """Initializer des Prozess-Pools; Queue und Event lassen sich nur beim Prozessstart übergeben."""
+    global _worker_stage_queue, _worker_cancel_event
+    _worker_stage_queue, _worker_cancel_event = stage_queue, cancel_event
+
+
+def _build_variant_job(index: int, module_name: str, tasks: list, output_filename: str, output_dir: Optional[str],
+                       task_ids: Optional[list] = None, db_path: Optional[str] = None) -> dict:
+    """
+    Läuft im Worker-Prozess: pandoc-Konvertierung und lualatex für eine Variante.
+    Mit db_path nutzt der Worker den LaTeX-Fragment-Cache über eine eigene Verbindung.
+    Stufen gehen als (index, stufe, info) an den Elternprozess; ist das Abbruchsignal gesetzt,
+    wird lualatex beendet und BuildCancelled geworfen.
+    """
+    on_stage = (lambda name, info: _worker_stage_queue.put((index, name, info))) if _worker_stage_queue else None
+    cancel_check = _worker_cancel_event.is_set if _worker_cancel_event else None
+    if not db_path:
+        return generate_exam_pdf(module_name, tasks, output_filename, output_dir=output_dir,
+                                 on_stage=on_stage, cancel_check=cancel_check)
+    with DatabaseManager(db_path) as db:
+        return generate_exam_pdf(module_name, tasks, output_filename, output_dir=output_dir,
+                                 task_ids=task_ids, fragment_cache=RenderCache(db),
+                                 on_stage=on_stage, cancel_check=cancel_check)
+
+
+def _notify(on_progress, label: str, status: str, info: dict):
+    """Ruft den Fortschritts-Callback auf; Fehler darin brechen den Build nicht ab."""
+    if on_progress:
+        try:
+            on_progress(label, status, info)
+        except Exception as e:
+            logger.debug(f"on_progress Fehler: {e}")
+
 
 class ExamBuilder:
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, render_cache: Optional[RenderCache] = None):
         self.db = db_manager
+        # LaTeX-Fragmente der Aufgaben werden nur einmal pro Inhalt und pandoc-Version konvertiert
+        self.render_cache = render_cache or RenderCache(db_manager)
 
-    def build_exam_for_module(self, module_id: int):
+    def _load_exam_plan(self, module_id: int):
+        """
+        Lädt Modul, Klausurplan (Pools in Reihenfolge mit Anzahl) und die Aufgaben-IDs in einem Roundtrip.
+        Die IDs kommen allein aus dem Index tasks(pool_id), der Markdown-Text wird hier nicht gelesen.
+        Liefert (module_name, [(pool_id, draw_count), ...], {pool_id: [task_id, ...]}) oder wirft ValueError.
+        """
+        plan = self.db.get_exam_plan(module_id, with_content=False)
 
-        logger.info(f"Baue Klausur für Modul-ID {module_id}...")
+        if not plan:
+            raise ValueError(f"Fehler: Modul mit ID {module_id} nicht gefunden.")
+        if not plan["items"]:
+            raise ValueError(f"Fehler: Keine oder leere Klausur-Konfiguration für Modul '{plan['module_name']}' gefunden.")
 
-        module_info = self.db.get_module_by_id(module_id)
-        config_info = self.db.get_exam_config_for_module(module_id)
+        plan_items = [(item["pool_id"], item["draw_count"]) for item in plan["items"]]
+        logger.debug(f"-> Konfiguration gefunden: Pools und Anzahl {plan_items}")
+        return plan["module_name"], plan_items, plan["tasks_by_pool"]
 
-        if not module_info:
-            msg = f"Fehler: Modul mit ID {module_id} nicht gefunden."
-            logger.error(msg)
-            return False, msg
-        if not config_info or not config_info[2]:
-            msg = f"Fehler: Keine oder leere Klausur-Konfiguration für Modul '{module_info[1]}' gefunden."
-            logger.error(msg)
-            return False, msg
+    @staticmethod
+    def _select_variants(plan_items, task_ids_by_pool, count: int, rng) -> list:
+        """
+        Wählt für `count` Varianten vorab alle Aufgaben-IDs aus, pro Plan-Eintrag (pool_id, draw_count)
+        jeweils draw_count Aufgaben.
+        Innerhalb einer Variante kommt keine Aufgabe doppelt vor; über die Varianten hinweg
+        wird immer die bisher am seltensten verwendete Aufgabe genommen, sodass sich Varianten
+        nicht überschneiden, solange der Pool genügend Aufgaben hat.
+        Liefert pro Variante eine Liste von task_ids.
+        """
+        variants = [[] for _ in range(count)]
+        used_per_variant = [set() for _ in range(count)]
+        usage = Counter()
+
+        for pool_id, draw_count in plan_items:
+            pool_task_ids = list(task_ids_by_pool.get(pool_id, []))
+            rng.shuffle(pool_task_ids)
+            for v in range(count):
+                for _ in range(draw_count):
+                    chosen_id = ExamBuilder._least_used(pool_task_ids, used_per_variant[v], usage)
+                    if chosen_id is None:
+                        msg = f"Warnung: Kein einzigartige Aufgabe mehr in Pool {pool_id} verfügbar! Pool wird übersprungen."
+                        logger.warning(msg)
+                        break
+                    variants[v].append(chosen_id)
+                    used_per_variant[v].add(chosen_id)
+                    usage[chosen_id] += 1
+                    logger.debug(f"-> Variante {variant_label(v)}: wähle Aufgabe {chosen_id} aus Pool {pool_id}.")
+        return variants
+
+    @staticmethod
+    def _least_used(shuffled_ids, excluded, usage):
+        """
+        Erste ID in zufälliger Reihenfolge mit minimaler Nutzung, die nicht ausgeschlossen ist.
+        Bricht ab, sobald eine noch nie verwendete ID gefunden ist, statt den ganzen Pool zu prüfen.
+        """
+        best_id, best_usage = None, None
+        for task_id in shuffled_ids:
+            if task_id in excluded:
+                continue
+            used = usage[task_id]
+            if best_usage is None or used < best_usage:
+                best_id, best_usage = task_id, used
+                if used == 0:
+                    break
+        return best_id
 
-        module_name = module_info[1]
-        pool_ids_in_order = config_info[2].split(',')
-        logger.debug(f"-> Konfiguration gefunden: Reihenfolge der Pools ist {pool_ids_in_order}")
+    def _load_contents(self, variants: list) -> list:
+        """Lädt den Markdown-Text nur für die ausgewählten IDs; liefert pro Variante [(task_id, content_md), ...]."""
+        contents = self.db.get_tasks_by_ids([task_id for variant in variants for task_id in variant])
+        return [[(task_id, contents[task_id]) for task_id in variant if task_id in contents] for variant in variants]
 
-        selected_tasks_content = []
-        used_task_ids = set()
 
-        for pool_id_str in pool_ids_in_order:
-            pool_id = int(pool_id_str)
-            all_tasks_in_pool = self.db.get_tasks_from_pool(pool_id)
-            available_tasks = [task for task in all_tasks_in_pool if task[0] not in used_task_ids]
+    @staticmethod
+    def _write_manifest(pdf_path: str, manifest: dict) -> Optional[str]:
+        try:
+            return str(write_manifest(pdf_path, manifest))
+        except OSError as e:
+            logger.warning(f"Manifest für {pdf_path} konnte nicht geschrieben werden: {e}")
+            return None
 
-            if not available_tasks:
-                msg = f"Warnung: Kein einzigartige Aufgabe mehr in Pool {pool_id} verfügbar! Pool wird übersprungen."
-                logger.warning(msg)
+    def build_exam_for_module(self, module_id: int, filename: str | None = None, seed=None,
+                              on_progress: Optional[Callable[[str, str, dict], None]] = None,
+                              cancel_event: Optional[threading.Event] = None):
+        """
+        Wählt pro konfiguriertem Pool die konfigurierte Anzahl Aufgaben und erzeugt die Klausur-PDF.
+        Die Auswahl ist über `seed` reproduzierbar (ohne Seed wird einer gewürfelt); Seed und
+        gewählte Aufgaben mit Inhalts-Hash landen in einem Manifest neben der PDF.
+        on_progress und cancel_event wie bei build_exam_variants.
+        Liefert (True, {"path", "manifest", "seed", ...}) oder (False, Fehlermeldung).
+        """
+        seed = new_seed() if seed is None else seed
+        logger.info(f"Baue Klausur für Modul-ID {module_id} (seed={seed})...")
+        try:
+            jobs = self._plan_jobs(module_id, 1, seed, filename, None, single_as_exam=True, on_progress=on_progress)
+        except ValueError as e:
+            logger.error(str(e))
+            return False, str(e)
+        result = self._run_jobs(jobs, None, on_progress, cancel_event)[0]
+        if not result["success"]:
+            return False, result["message"]
+        return True, {**result, "seed": seed}
+
+    def build_exam_variants(self, module_id: int, count: int, seed=None, filename: str | None = None,
+                            max_workers: Optional[int] = None, output_dir: Optional[str] = None,
+                            on_progress: Optional[Callable[[str, str, dict], None]] = None,
+                            cancel_event: Optional[threading.Event] = None):
+        """
+        Erzeugt `count` Varianten (A, B, C, ...) derselben Klausur.
+        Die Auswahl erfolgt vorab für alle Varianten (reproduzierbar über `seed`, ohne Seed wird einer
+        gewürfelt), danach laufen pandoc und lualatex pro Variante in einem Prozess-Pool
+        (Standard: Anzahl CPU-Kerne). Jede Variante bekommt ein eigenes Manifest neben der PDF.
+        on_progress(label, status, info) wird mit status "queued", "stage", "done", "failed" oder "cancelled"
+        aufgerufen; bei "stage" enthält info die Stufe ("select", "convert", "cached", "compile" mit "pass").
+        Wird cancel_event gesetzt, werden wartende Varianten verworfen und laufende lualatex-Prozesse beendet.
+        Liefert (True, [{"variant", "success", "path"|"message", "manifest", "seed"}, ...]) oder (False, Fehlermeldung).
+        """
+        if not 1 <= count <= MAX_VARIANTS:
+            return False, f"Fehler: Anzahl der Varianten muss zwischen 1 und {MAX_VARIANTS} liegen."
+        seed = new_seed() if seed is None else seed
+        logger.info(f"Baue {count} Klausur-Varianten für Modul-ID {module_id} (seed={seed})...")
+        try:
+            jobs = self._plan_jobs(module_id, count, seed, filename, output_dir, on_progress=on_progress)
+        except ValueError as e:
+            logger.error(str(e))
+            return False, str(e)
+        results = self._run_jobs(jobs, max_workers, on_progress, cancel_event)
+        return True, [{"variant": job["label"], "seed": seed, **result} for job, result in zip(jobs, results)]
+
+    def build_modules(self, module_ids: list, count: int = 1, seed=None, filename: Optional[str] = None,
+                      output_dir: Optional[str] = None, max_workers: Optional[int] = None,
+                      on_progress: Optional[Callable[[str, str, dict], None]] = None,
+                      cancel_event: Optional[threading.Event] = None):
+        """
+        Baut Klausuren für mehrere Module in einem gemeinsamen Prozess-Pool (für Stapelläufe, z. B. die CLI).
+        Bei count == 1 entsteht pro Modul eine normale Klausur wie bei build_exam_for_module, sonst
+        `count` Varianten. Alle Module verwenden denselben Seed; die Auswahl bleibt pro Modul reproduzierbar.
+        Module ohne gültigen Klausurplan werden als fehlgeschlagen gemeldet, die übrigen trotzdem gebaut.
+        `filename` gilt nur, wenn genau ein Modul gebaut wird.
+        Liefert (True, [{"module_id", "variant", "success", "path"|"message", "manifest", "seed"}, ...]).
+        """
+        if not 1 <= count <= MAX_VARIANTS:
+            return False, f"Fehler: Anzahl der Varianten muss zwischen 1 und {MAX_VARIANTS} liegen."
+        seed = new_seed() if seed is None else seed
+        logger.info(f"Baue Klausuren für {len(module_ids)} Module mit je {count} Variante(n) (seed={seed})...")
+        results, jobs = [], []
+        for module_id in module_ids:
+            try:
+                jobs.extend(self._plan_jobs(module_id, count, seed, filename if len(module_ids) == 1 else None,
+                                            output_dir, single_as_exam=True, on_progress=on_progress))
+            except ValueError as e:
+                logger.error(str(e))
+                results.append({"module_id": module_id, "variant": None, "seed": seed, "success": False,
+                                "message": str(e)})
+        for job, result in zip(jobs, self._run_jobs(jobs, max_workers, on_progress, cancel_event)):
+            results.append({"module_id": job["manifest"]["module_id"], "variant": job["manifest"]["variant"],
+                            "seed": seed, **result})
+        return True, results
+
+    def _plan_jobs(self, module_id: int, count: int, seed, filename: Optional[str], output_dir: Optional[str],
+                   single_as_exam: bool = False, on_progress=None) -> list:
+        """
+        Wählt die Aufgaben für `count` Varianten eines Moduls und beschreibt die Builds als Jobs für _run_jobs.
+        Mit single_as_exam wird eine einzelne Variante wie eine normale Klausur benannt (ohne Variantenbuchstabe).
+        Wirft ValueError, wenn Modul oder Klausurplan fehlen oder nicht genug Aufgaben vorhanden sind.
+        """
+        module_name, plan_items, task_ids_by_pool = self._load_exam_plan(module_id)
+        _notify(on_progress, module_name, "stage", {"module_id": module_id, "variant": None, "stage": "select"})
+        variants = self._load_contents(self._select_variants(plan_items, task_ids_by_pool, count, random.Random(seed)))
+        if not all(variants):
+            raise ValueError(f"Fehler: Es konnten nicht für alle Varianten von '{module_name}' Aufgaben ausgewählt werden.")
+
+        base = filename or f"Klausur_{module_name.replace(' ', '_')}"
+        jobs = []
+        for index, selected_tasks in enumerate(variants):
+            label = None if single_as_exam and count == 1 else variant_label(index)
+            jobs.append({"label": label or base, "module_name": module_name, "tasks": selected_tasks,
+                         "filename": f"{base}_Variante_{label}" if label else base, "output_dir": output_dir,
+                         "manifest": build_manifest(module_id, module_name, seed, selected_tasks, plan_items,
+                                                    variant=label, variant_count=count)})
+        return jobs
+
+    def rebuild_from_manifests(self, manifest_paths: list, only_changed: bool = False,
+                               max_workers: Optional[int] = None,
+                               on_progress: Optional[Callable[[str, str, dict], None]] = None,
+                               cancel_event: Optional[threading.Event] = None):
+        """
+        Baut Klausuren aus ihren Manifesten neu, ohne erneut zu losen: es werden genau die dort
+        festgehaltenen Aufgaben mit ihrem aktuellen Inhalt verwendet. Unveränderte Aufgaben ergeben
+        denselben .tex-Quelltext und damit einen Treffer im Build-Cache.
+        Mit only_changed werden nur Klausuren neu gebaut, bei denen sich seit dem letzten Build eine
+        Aufgabe geändert hat oder die PDF fehlt; die übrigen werden mit status "unchanged" gemeldet.
+        Wurde eine Aufgabe inzwischen gelöscht, schlägt der Neubau dieser Klausur fehl.
+        on_progress erhält zusätzlich zu "queued"/"done"/"failed" den status "unchanged".
+        Liefert (True, [{"manifest", "variant", "success", "status", "changed_task_ids", "path"|"message"}, ...]).
+        """
+        loaded = list(iter_manifests(manifest_paths))
+        current_hashes = self.db.get_task_hashes(
+            [task_id for _, manifest, _ in loaded if manifest for task_id in manifest_task_ids(manifest)])
+
+        results, jobs, job_slots = [None] * len(loaded), [], []
+        for index, (path, manifest, error) in enumerate(loaded):
+            entry = {"manifest": str(path), "variant": manifest.get("variant") if manifest else None}
+            if error:
+                results[index] = {**entry, "success": False, "status": "failed", "message": error}
+                _notify(on_progress, str(path), "failed", {"manifest": str(path), "message": error})
+                continue
+            task_ids = manifest_task_ids(manifest)
+            missing = [task_id for task_id in task_ids if task_id not in current_hashes]
+            if missing:
+                msg = f"Aufgaben aus dem Manifest wurden inzwischen gelöscht: {missing}"
+                logger.warning(f"{path}: {msg}")
+                results[index] = {**entry, "success": False, "status": "failed", "message": msg}
+                _notify(on_progress, entry["variant"] or str(path), "failed",
+                        {"module_id": manifest.get("module_id"), "variant": entry["variant"], "message": msg})
                 continue
+            changed = changed_task_ids(manifest, current_hashes)
+            pdf_path = pdf_path_for(path, manifest)
+            entry["changed_task_ids"] = changed
+            if only_changed and not changed and pdf_path.is_file():
+                results[index] = {**entry, "success": True, "status": "unchanged", "path": str(pdf_path)}
+                _notify(on_progress, entry["variant"] or pdf_path.stem, "unchanged",
+                        {"module_id": manifest.get("module_id"), "variant": entry["variant"], "path": str(pdf_path)})
+                continue
+            jobs.append({"label": entry["variant"] or pdf_path.stem, "module_name": manifest["module_name"],
+                         "task_ids": task_ids, "filename": pdf_path.stem, "output_dir": str(pdf_path.parent),
+                         "source": manifest})
+            job_slots.append((index, entry))
+
+        contents = self.db.get_tasks_by_ids([task_id for job in jobs for task_id in job["task_ids"]])
+        for job in jobs:
+            source = job.pop("source")
+            job["tasks"] = [(task_id, contents[task_id]) for task_id in job.pop("task_ids")]
+            job["manifest"] = build_manifest(source["module_id"], source["module_name"], source["seed"], job["tasks"],
+                                             [(item["pool_id"], item["draw_count"]) for item in source.get("plan", [])],
+                                             variant=source.get("variant"), variant_count=source.get("variant_count", 1))
+        logger.info(f"Baue {len(jobs)} von {len(loaded)} Klausuren aus Manifesten neu...")
+        for (index, entry), result in zip(job_slots, self._run_jobs(jobs, max_workers, on_progress, cancel_event)):
+            status = "rebuilt" if result["success"] else "cancelled" if result.get("cancelled") else "failed"
+            results[index] = {**entry, "status": status, **result}
+        return True, results
+
+    def _run_jobs(self, jobs: list, max_workers: Optional[int], on_progress,
+                  cancel_event: Optional[threading.Event] = None) -> list:
+        """
+        Führt Builds aus (job: label, module_name, tasks, filename, output_dir, manifest) und schreibt nach
+        jedem erfolgreichen Build das Manifest neben die PDF. Ein einzelner Build läuft direkt in diesem
+        Prozess, mehrere in einem Prozess-Pool. Die Stufen jedes Builds gehen als status "stage" an on_progress.
+        Ist cancel_event gesetzt, werden noch nicht gestartete Builds verworfen und laufende lualatex-Prozesse
+        beendet; solche Builds liefern {"success": False, "cancelled": True}.
+        Liefert pro Job {"success", "path"|"message", "manifest", ...}.
+        """
+        def report(job, status, info):
+            _notify(on_progress, job["label"], status, {"module_id": job["manifest"]["module_id"],
+                                                        "variant": job["manifest"]["variant"], **info})
+
+        def stage(index, name, info):
+            if results[index] is None:
+                report(jobs[index], "stage", {"stage": name, **info})
+
+        def finish(index, build_info):
+            job = jobs[index]
+            results[index] = {"success": True, **build_info,
+                              "manifest": self._write_manifest(build_info["path"], job["manifest"])}
+            report(job, "done", build_info)
+
+        def fail(index, e):
+            job = jobs[index]
+            if isinstance(e, (BuildCancelled, CancelledError)):
+                logger.info(f"Build {job['label']} abgebrochen.")
+                results[index] = {"success": False, "cancelled": True, "message": "Build abgebrochen."}
+                report(job, "cancelled", {"message": "Build abgebrochen."})
+                return
+            logger.error(f"Build {job['label']} fehlgeschlagen: {e}")
+            results[index] = {"success": False, "message": str(e)}
+            report(job, "failed", {"message": str(e)})
+
+        cancel_check = cancel_event.is_set if cancel_event else None
+        results = [None] * len(jobs)
+        for job in jobs:
+            report(job, "queued", {"task_ids": [task_id for task_id, _ in job["tasks"]]})
+        if len(jobs) == 1:
+            job = jobs[0]
+            try:
+                finish(0, generate_exam_pdf(job["module_name"], [content for _, content in job["tasks"]],
+                                            job["filename"], output_dir=job["output_dir"],
+                                            task_ids=[task_id for task_id, _ in job["tasks"]],
+                                            fragment_cache=self.render_cache,
+                                            on_stage=lambda name, info: stage(0, name, info),
+                                            cancel_check=cancel_check))
+            except Exception as e:
+                fail(0, e)
+            return results
 
-            chosen_task = random.choice(available_tasks)
-            selected_tasks_content.append(chosen_task[1])
-            used_task_ids.add(chosen_task[0])
-            logger.debug(f"-> Wähle Aufgabe {chosen_task[0]} aus Pool {pool_id}.")
+        # erst hier laden: der Prozess-Pool wird nur für mehrere Builds gebraucht und kostet beim Import spürbar Zeit
+        import multiprocessing
+        import queue
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
-        if not selected_tasks_content:
-            msg = "Fehler: Es konnten keine Aufgaben ausgewählt werden. Klausur wird nicht erstellt."
-            logger.error(msg)
-            return False, msg
+        workers = max(1, min(len(jobs), max_workers or os.cpu_count() or 1))
+        # spawn statt fork: der Aufrufer (webview, Tk) hat bereits Threads laufen
+        ctx = multiprocessing.get_context("spawn")
+        stage_queue, worker_cancel = ctx.Queue(), ctx.Event()
 
-        output_filename = f"Klausur_{module_name.replace(' ', '_')}"
-        success, message = generate_exam_pdf(module_name, selected_tasks_content, output_filename)
+        def drain_stages():
+            while True:
+                try:
+                    stage(*stage_queue.get_nowait())
+                except queue.Empty:
+                    return
 
-        return success, message
\ No newline at end of file
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_build_worker,
+                                 initargs=(stage_queue, worker_cancel)) as pool:
+            futures = {}
+            for index, job in enumerate(jobs):
+                future = pool.submit(_build_variant_job, index, job["module_name"],
+                                     [content for _, content in job["tasks"]], job["filename"], job["output_dir"],
+                                     [task_id for task_id, _ in job["tasks"]], self.db.db_path)
+                futures[future] = index
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                drain_stages()
+                if cancel_check and cancel_check() and not worker_cancel.is_set():
+                    logger.info("Abbruch angefordert: verwerfe wartende Builds, beende laufende lualatex-Prozesse.")
+                    worker_cancel.set()
+                    for future in pending:
+                        future.cancel()
+                for future in finished:
+                    index = futures[future]
+                    try:
+                        build_info = future.result()
+                        # Worker zählen in ihrem eigenen Prozess; Treffer hier für die Statistik übernehmen
+                        get_build_cache().record(build_info.get("cached", False))
+                        finish(index, build_info)
+                    except Exception as e:
+                        fail(index, e)
+        stage_queue.close()
+        return results
@@ -0,0 +1,140 @@
+# core/exam_manifest.py
+import json
+import logging
+import os
+import secrets
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .database_manager import content_hash
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = "genesis-exam-manifest"
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def new_seed() -> int:
+    """Zufälliger Seed für Builds, bei denen der Aufrufer keinen vorgibt (wird im Manifest festgehalten)."""
+    return secrets.randbits(32)
+
+
+def manifest_path_for(pdf_path) -> Path:
+    """Klausur_X.pdf -> Klausur_X.manifest.json im selben Verzeichnis."""
+    pdf_path = Path(pdf_path)
+    return pdf_path.with_name(pdf_path.stem + MANIFEST_SUFFIX)
+
+
+def build_manifest(module_id: int, module_name: str, seed, tasks: list, plan_items: list,
+                   variant: Optional[str] = None, variant_count: int = 1) -> dict:
+    """
+    Manifest eines Builds: Seed, Klausurplan und die gewählten Aufgaben mit ihrem Inhalts-Hash.
+    tasks ist [(task_id, content_md), ...] in der Reihenfolge der Klausur.
+    """
+    return {
+        "format": MANIFEST_FORMAT,
+        "version": MANIFEST_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "module_id": module_id,
+        "module_name": module_name,
+        "seed": seed,
+        "variant": variant,
+        "variant_count": variant_count,
+        "plan": [{"pool_id": pool_id, "draw_count": draw_count} for pool_id, draw_count in plan_items],
+        "tasks": [{"id": task_id, "content_hash": content_hash(content)} for task_id, content in tasks],
+    }
+
+
+def write_manifest(pdf_path, manifest: dict) -> Path:
+    """Schreibt das Manifest neben die PDF; atomar, wie die PDF selbst."""
+    pdf_path = Path(pdf_path)
+    path = manifest_path_for(pdf_path)
+    manifest = {**manifest, "pdf": pdf_path.name}
+    staging = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+    with open(staging, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(staging, path)
+    return path
+
+
+def load_manifest(path) -> dict:
+    """Liest ein Manifest; wirft ValueError bei unlesbaren oder fremden Dateien."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Manifest {path} konnte nicht gelesen werden: {e}") from e
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{path} ist kein Klausur-Manifest.")
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Manifest-Version {manifest.get('version')} wird nicht unterstützt.")
+    if not manifest.get("tasks"):
+        raise ValueError(f"Manifest {path} enthält keine Aufgaben.")
+    pdf_name = manifest.get("pdf")
+    # nur ein Dateiname neben dem Manifest: ein Neubau darf nicht über "../" o. ä. woanders hinschreiben
+    if not isinstance(pdf_name, str) or Path(pdf_name).name != pdf_name or not pdf_name.lower().endswith(".pdf"):
+        raise ValueError(f"Manifest {path} enthält keinen gültigen PDF-Dateinamen.")
+    return manifest
+
+
+def manifest_task_ids(manifest: dict) -> list[int]:
+    return [int(task["id"]) for task in manifest["tasks"]]
+
+
+def changed_task_ids(manifest: dict, current_hashes: dict) -> list[int]:
+    """IDs, deren Inhalt sich seit dem Build geändert hat (gelöschte Aufgaben zählen nicht dazu)."""
+    return [int(task["id"]) for task in manifest["tasks"]
+            if int(task["id"]) in current_hashes and current_hashes[int(task["id"])] != task["content_hash"]]
+
+
+def find_manifests(directory, module_id: Optional[int] = None) -> list[dict]:
+    """
+    Alle lesbaren Manifeste in `directory` (optional nur eines Moduls), neueste zuerst.
+    Liefert [{"path", "module_id", "module_name", "seed", "variant", "created", "pdf_exists"}, ...].
+    """
+    found = []
+    for path in Path(directory).glob(f"*{MANIFEST_SUFFIX}"):
+        try:
+            manifest = load_manifest(path)
+        except ValueError as e:
+            logger.debug(str(e))
+            continue
+        if module_id is not None and manifest.get("module_id") != module_id:
+            continue
+        found.append({"path": str(path), "module_id": manifest.get("module_id"),
+                      "module_name": manifest.get("module_name"), "seed": manifest.get("seed"),
+                      "variant": manifest.get("variant"), "created": manifest.get("created"),
+                      "pdf_exists": (path.parent / manifest.get("pdf", "")).is_file()})
+    found.sort(key=lambda entry: entry["created"] or "", reverse=True)
+    return found
+
+
+def pdf_path_for(manifest_path, manifest: dict) -> Path:
+    return Path(manifest_path).parent / (manifest.get("pdf") or "")
+
+
+def manifest_paths_within(paths: Iterable, directory) -> list[Path]:
+    """
+    Löst die Manifest-Pfade auf (inkl. Symlinks) und wirft ValueError für jeden Pfad außerhalb
+    von `directory` oder ohne Manifest-Endung. Für Aufrufer, deren Pfade von außen kommen (Dienst, JS).
+    """
+    root = Path(directory).resolve()
+    resolved = []
+    for path in paths:
+        candidate = Path(str(path)).resolve()
+        if not candidate.name.endswith(MANIFEST_SUFFIX) or root not in candidate.parents:
+            raise ValueError(f"Manifest außerhalb von {root} oder ohne Endung {MANIFEST_SUFFIX}: {path}")
+        resolved.append(candidate)
+    return resolved
+
+
+def iter_manifests(paths: Iterable) -> Iterable[tuple]:
+    """(path, manifest | None, fehlermeldung | None) pro Pfad."""
+    for path in paths:
+        try:
+            yield path, load_manifest(path), None
+        except ValueError as e:
+            yield path, None, str(e)
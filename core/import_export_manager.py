@@ -1,106 +1,250 @@
 # core/import_export_manager.py
-import pickle
 import base64
+import gzip
+import io
 import json
 import logging
-from tkinter import messagebox
 import os
+import pickle
+import uuid
+from contextlib import contextmanager
+
+from .render_cache import RenderCache
+
+try:  # optional: schnellere und kleinere Exporte, wenn das Paket installiert ist
+    import zstandard
+except ImportError:
+    zstandard = None
 
 logger = logging.getLogger(__name__)
 
+EXPORT_FORMAT = "genesis_exam_export"
+# 2.0: JSON Lines (ein Datensatz pro Zeile), optional komprimiert
+# 1.0: JSON mit base64-kodiertem pickle (nur noch lesend unterstützt)
+EXPORT_VERSION = "2.0"
+LEGACY_VERSION = "1.0"
+COMPRESSIONS = ("gzip", "zstd", None)
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
 
-def export_data(db_manager, file_path, module_id, pool_id=None):
-    """Exportiert ein ganzes Modul oder einen einzelnen Pool in eine Datei."""
-    try:
-        export_obj = {
-            "module_name": db_manager.get_module_by_id(module_id)[1],
-            "pools": []
-        }
-
-        pools_to_export = []
-        if pool_id:  # Nur ein einzelner Pool
-            pools_to_export = [p for p in db_manager.get_pools_for_module(module_id) if p[0] == pool_id]
-        else:  # Alle Pools des Moduls
-            pools_to_export = db_manager.get_pools_for_module(module_id)
-
-        if not pools_to_export:
-            raise ValueError("Keine Pools zum Exportieren gefunden.")
 
-        for p_id, p_name in pools_to_export:
-            tasks = db_manager.get_tasks_from_pool(p_id)
-            task_contents = [content for task_id, content in tasks]
-            export_obj["pools"].append({"pool_name": p_name, "tasks": task_contents})
+class _LegacyUnpickler(pickle.Unpickler):
+    """v1-Exporte enthalten nur dict/list/str; jede Klasse oder Funktion wird abgelehnt."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Unerlaubtes Objekt in Exportdatei: {module}.{name}")
+
 
-        # Daten serialisieren und kodieren
-        pickled_data = pickle.dumps(export_obj)
-        base64_data = base64.b64encode(pickled_data).decode('utf-8')
+@contextmanager
+def _open_export_writer(file_path, compression):
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unbekannte Kompression: {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("Für zstd-Kompression muss das Paket 'zstandard' installiert sein.")
+    with open(file_path, "wb") as raw:
+        if compression == "gzip":
+            binary = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0)
+        elif compression == "zstd":
+            binary = zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+        else:
+            binary = raw
+        text = io.TextIOWrapper(binary, encoding="utf-8", newline="\n")
+        try:
+            yield text
+        finally:
+            text.flush()
+            text.detach()
+            # schreibt den gzip/zstd-Abschluss, ohne die Datei selbst zu schließen
+            if binary is not raw:
+                binary.close()
 
-        # Finale JSON-Datei erstellen
-        final_export = {
-            "format": "genesis_exam_export",
-            "version": "1.0",
-            "data": base64_data
-        }
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(final_export, f, indent=2)
+@contextmanager
+def _open_export_reader(file_path):
+    """Öffnet eine Exportdatei als Text; die Kompression wird an den ersten Bytes erkannt."""
+    with open(file_path, "rb") as raw:
+        magic = raw.read(4)
+        raw.seek(0)
+        if magic.startswith(GZIP_MAGIC):
+            binary = gzip.GzipFile(fileobj=raw, mode="rb")
+        elif magic == ZSTD_MAGIC:
+            if zstandard is None:
+                raise ValueError("Die Datei ist zstd-komprimiert, das Paket 'zstandard' ist aber nicht installiert.")
+            binary = zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+        else:
+            binary = raw
+        with io.TextIOWrapper(binary, encoding="utf-8") as text:
+            yield text
+
+
+def _write_record(stream, record: dict):
+    stream.write(json.dumps(record, ensure_ascii=False))
+    stream.write("\n")
+
+
+def export_data(db_manager, file_path, module_id, pool_id=None, compression="gzip"):
+    """
+    Exportiert ein ganzes Modul oder einen einzelnen Pool in eine Datei (Format 2.0).
+    Die Datensätze werden einzeln vom DB-Cursor in die Datei gestreamt:
+    Kopfzeile, Modul, dann je Pool ein Pool-Datensatz gefolgt von seinen Aufgaben, zum Schluss
+    ein Abschluss-Datensatz mit den Zählern (erkennt abgeschnittene Dateien beim Import).
+    """
+    staging = f"{file_path}.{uuid.uuid4().hex}.part"
+    try:
+        module = db_manager.get_module_by_id(module_id)
+        if not module:
+            raise ValueError(f"Modul mit ID {module_id} nicht gefunden.")
+
+        pool_count = task_count = 0
+        with _open_export_writer(staging, compression) as out:
+            _write_record(out, {"format": EXPORT_FORMAT, "version": EXPORT_VERSION})
+            _write_record(out, {"type": "module", "name": module[1]})
+            current_pool = None
+            for p_id, p_name, t_id, content_md in db_manager.iter_module_rows(module_id, pool_id):
+                if p_id != current_pool:
+                    current_pool = p_id
+                    pool_count += 1
+                    _write_record(out, {"type": "pool", "name": p_name})
+                if t_id is not None:
+                    task_count += 1
+                    _write_record(out, {"type": "task", "content_md": content_md})
+            _write_record(out, {"type": "end", "pools": pool_count, "tasks": task_count})
+
+        if not pool_count:
+            raise ValueError("Keine Pools zum Exportieren gefunden.")
+        # erst die vollständige Datei sichtbar machen
+        os.replace(staging, file_path)
 
-        logger.info(f"Daten erfolgreich nach '{file_path}' exportiert.")
+        logger.info(f"Daten erfolgreich nach '{file_path}' exportiert ({pool_count} Pools, {task_count} Aufgaben).")
         return True, f"Erfolgreich nach {os.path.basename(file_path)} exportiert."
 
     except Exception as e:
         logger.error(f"Fehler beim Export: {e}")
         return False, f"Fehler beim Export: {e}"
+    finally:
+        if os.path.exists(staging):
+            os.remove(staging)
 
 
-def import_data(db_manager, file_path, on_conflict):
-    """Importiert Daten aus einer Datei und behandelt Duplikate."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            import_json = json.load(f)
+def _legacy_records(import_json: dict):
+    """Wandelt einen v1-Export in dieselbe Datensatzfolge wie Format 2.0 um."""
+    pickled_data = base64.b64decode(import_json["data"].encode('utf-8'))
+    import_obj = _LegacyUnpickler(io.BytesIO(pickled_data)).load()
+    yield {"type": "module", "name": import_obj["module_name"]}
+    for pool_data in import_obj["pools"]:
+        yield {"type": "pool", "name": pool_data["pool_name"]}
+        for task_content in pool_data["tasks"]:
+            yield {"type": "task", "content_md": task_content}
+    yield {"type": "end", "pools": len(import_obj["pools"]),
+           "tasks": sum(len(p["tasks"]) for p in import_obj["pools"])}
+
 
-        if import_json.get("format") != "genesis_exam_export":
+def iter_export_records(stream):
+    """
+    Liefert die Datensätze einer Exportdatei nacheinander (ohne Kopfzeile).
+    Format 2.0 wird zeilenweise gelesen; ein v1-Export ist ein einzelnes JSON-Dokument
+    und wird komplett geladen.
+    """
+    first_line = stream.readline()
+    try:
+        header = json.loads(first_line)
+    except json.JSONDecodeError:
+        header = None
+    if not isinstance(header, dict) or "data" in header or header.get("version") == LEGACY_VERSION:
+        # v1: eingerücktes JSON über mehrere Zeilen
+        import_json = json.loads(first_line + stream.read())
+        if import_json.get("format") != EXPORT_FORMAT or import_json.get("version", LEGACY_VERSION) != LEGACY_VERSION:
             raise ValueError("Ungültiges Dateiformat.")
+        yield from _legacy_records(import_json)
+        return
+
+    if header.get("format") != EXPORT_FORMAT:
+        raise ValueError("Ungültiges Dateiformat.")
+    if header.get("version") != EXPORT_VERSION:
+        raise ValueError(f"Nicht unterstützte Export-Version: {header.get('version')}")
+    for line_no, line in enumerate(stream, 2):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Beschädigter Datensatz in Zeile {line_no}: {e}")
+
+
+def _module_from_records(records):
+    """
+    Zerlegt die Datensatzfolge (module, (pool, task*)*, end) in (module_name, pools), wobei pools
+    ein Generator über (pool_name, Aufgaben-Generator) ist, passend für DatabaseManager.bulk_import.
+    Es wird nichts zwischengespeichert; die Aufgaben eines Pools müssen vor dem nächsten Pool
+    gelesen werden. Fehlt der Abschluss-Datensatz, wirft der Generator ValueError.
+    """
+    records = iter(records)
+    first = next(records, None)
+    if not first or first.get("type") != "module":
+        raise ValueError("Exportdatei enthält keinen Modul-Datensatz.")
+    pending = None
+
+    def tasks_of_pool():
+        nonlocal pending
+        for record in records:
+            if record.get("type") != "task":
+                pending = record
+                return
+            yield record["content_md"]
+
+    def pools():
+        nonlocal pending
+        record = next(records, None)
+        while record is not None:
+            kind = record.get("type")
+            if kind == "end":
+                return
+            if kind != "pool":
+                raise ValueError(f"Unerwarteter Datensatz '{kind}' vor dem ersten Pool-Datensatz.")
+            pending = None
+            tasks = tasks_of_pool()
+            yield record["name"], tasks
+            for _ in tasks:  # falls der Aufrufer nicht alle Aufgaben gelesen hat
+                pass
+            record = pending
+        raise ValueError("Exportdatei ist unvollständig (Abschluss-Datensatz fehlt).")
 
-        # Daten dekodieren und deserialisieren
-        base64_data = import_json["data"].encode('utf-8')
-        pickled_data = base64.b64decode(base64_data)
-        import_obj = pickle.loads(pickled_data)
-
-        # --- Import-Logik ---
-        stats = {"modules_created": 0, "pools_created": 0, "tasks_added": 0, "tasks_skipped": 0}
-
-        # Modul prüfen/erstellen
-        module_name = import_obj["module_name"]
-        existing_modules = db_manager.get_modules()
-        module_id = next((mid for mid, mname in existing_modules if mname == module_name), None)
-        if not module_id:
-            module_id = db_manager.add_module(module_name)
-            stats["modules_created"] += 1
-
-        # Pools und Aufgaben durchgehen
-        for pool_data in import_obj["pools"]:
-            pool_name = pool_data["pool_name"]
-            existing_pools = db_manager.get_pools_for_module(module_id)
-            pool_id = next((pid for pid, pname in existing_pools if pname == pool_name), None)
-            if not pool_id:
-                pool_id = db_manager.add_pool(pool_name, module_id)
-                stats["pools_created"] += 1
-
-            # Aufgaben prüfen und importieren
-            existing_tasks = {content for tid, content in db_manager.get_tasks_from_pool(pool_id)}
-            for task_content in pool_data["tasks"]:
-                if task_content in existing_tasks:
-                    # Konflikt gefunden
-                    action = on_conflict(task_content)  # Rufe die GUI-Funktion für die Entscheidung
-                    if action == "skip":
-                        stats["tasks_skipped"] += 1
-                        continue
-                    elif action == "cancel":
-                        raise InterruptedError("Import vom Benutzer abgebrochen.")
-
-                db_manager.add_task(task_content, pool_id)
-                stats["tasks_added"] += 1
+    return first["name"], pools()
+
+
+def warm_imported_tasks(db_manager, stats, chunk_size=500) -> int:
+    """
+    Erzeugt vorab die LaTeX-Fragmente genau der Aufgaben, die bulk_import eingefügt hat (stats von
+    bulk_import), damit der erste Klausur-Build kein pandoc braucht. Ruft pandoc auf und kann bei großen
+    Importen dauern; daher nur auf Wunsch (import_data(warm_cache=True)) oder im Hintergrund aufrufen.
+    Ohne Vorwärmen füllt sich der Cache beim ersten Build.
+    Liefert die Zahl fehlgeschlagener Konvertierungen.
+    """
+    failed = 0
+    try:
+        render_cache = RenderCache(db_manager)
+        for chunk in db_manager.iter_task_id_range(stats["last_task_id_before"], stats["last_task_id_after"],
+                                                   chunk_size):
+            failed += render_cache.warm(chunk)
+        if failed:
+            logger.warning(f"{failed} importierte Aufgabe(n) konnten nicht nach LaTeX konvertiert werden.")
+    except Exception as e:
+        logger.warning(f"LaTeX-Fragment-Cache konnte nicht vorgewärmt werden: {e}")
+    return failed
+
+
+def import_data(db_manager, file_path, on_conflict="skip", warm_cache=False):
+    """
+    Importiert Daten aus einer Datei (Format 2.0 oder 1.0) in einer einzigen Transaktion.
+    on_conflict: "skip", "keep" oder "cancel" für alle Duplikate, oder eine Funktion, die beim
+    ersten Duplikat einmal gefragt wird und eine dieser Richtlinien liefert.
+    Mit warm_cache werden danach die LaTeX-Fragmente der neuen Aufgaben erzeugt (warm_imported_tasks).
+    """
+    try:
+        with _open_export_reader(file_path) as stream:
+            module_name, pools = _module_from_records(iter_export_records(stream))
+            stats = db_manager.bulk_import(module_name, pools, on_conflict)
+        if warm_cache and stats["tasks_added"]:
+            warm_imported_tasks(db_manager, stats)
 
         summary = (f"Import abgeschlossen!\n\n"
                    f"Neue Module: {stats['modules_created']}\n"
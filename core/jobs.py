@@ -0,0 +1,163 @@
+# core/jobs.py
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUILD_WORKERS = 2
+DEFAULT_MAX_QUEUED = 64
+# abgeschlossene Jobs bleiben für Status-Abfragen erhalten, die ältesten werden verworfen
+KEEP_FINISHED_JOBS = 200
+MAX_PROGRESS_EVENTS = 500
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+# Felder aus den on_progress-Infos des ExamBuilder, die in Fortschrittsmeldungen übernommen werden
+PROGRESS_FIELDS = ("module_id", "variant", "stage", "pass", "path", "cached", "message")
+
+
+class JobQueueFull(RuntimeError):
+    """Es warten bereits max_queued Jobs; der Aufrufer soll es später erneut versuchen."""
+
+
+class Job:
+    """Ein eingereihter Build mit Status, Fortschrittsmeldungen und Ergebnis."""
+
+    def __init__(self, kind: str, params: dict, on_update: Optional[Callable[["Job", Optional[dict]], None]] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = JOB_QUEUED
+        self.progress: list[dict] = []
+        self.result = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.future = None
+        self._on_update = on_update
+
+    def report(self, label: str, status: str, info: dict):
+        """Als on_progress-Callback für ExamBuilder geeignet."""
+        event = {"time": round(time.time(), 3), "label": label, "status": status,
+                 **{key: info[key] for key in PROGRESS_FIELDS if key in info}}
+        if len(self.progress) < MAX_PROGRESS_EVENTS:
+            self.progress.append(event)
+        self._notify(event)
+
+    def _notify(self, event: Optional[dict] = None):
+        """Meldet eine Statusänderung (event None) oder Fortschrittsmeldung an den Listener des JobManager."""
+        if self._on_update:
+            try:
+                self._on_update(self, event)
+            except Exception as e:
+                logger.debug(f"on_update Fehler für Job {self.id}: {e}")
+
+    def to_dict(self, with_progress: bool = True) -> dict:
+        data = {"id": self.id, "kind": self.kind, "params": self.params, "status": self.status,
+                "created_at": self.created_at, "started_at": self.started_at, "finished_at": self.finished_at,
+                "result": self.result, "error": self.error}
+        if with_progress:
+            data["progress"] = list(self.progress)
+        return data
+
+
+class JobManager:
+    """
+    Warteschlange für Klausur-Builds mit einer festen Anzahl Build-Slots (Threads).
+    Die Builds selbst verteilen pandoc/lualatex ggf. weiter auf Prozesse; die Slots begrenzen,
+    wie viele Aufträge gleichzeitig laufen, damit mehrere Nutzer den Rechner nicht überlasten.
+    Status und Ergebnis sind per get()/list() abfragbar (Polling); zusätzlich wird on_update(job, event)
+    bei jeder Statusänderung (event None) und jeder Fortschrittsmeldung aufgerufen (Push, z. B. an die Oberfläche).
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_BUILD_WORKERS, max_queued: int = DEFAULT_MAX_QUEUED,
+                 on_update: Optional[Callable[[Job, Optional[dict]], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max_queued
+        self.on_update = on_update
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="genesis-build")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[[Job], object], params: Optional[dict] = None) -> Job:
+        """Reiht fn(job) ein; wirft JobQueueFull, wenn schon max_queued Jobs warten."""
+        job = Job(kind, params or {}, self._job_updated)
+        with self._lock:
+            queued = sum(1 for j in self._jobs.values() if j.status == JOB_QUEUED)
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"Es warten bereits {queued} Aufträge, bitte später erneut versuchen.")
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._run, job, fn)
+        logger.info(f"Job {job.id} ({kind}) eingereiht.")
+        job._notify()
+        return job
+
+    def _job_updated(self, job: Job, event: Optional[dict]):
+        if self.on_update:
+            self.on_update(job, event)
+
+    def _run(self, job: Job, fn: Callable[[Job], object]):
+        if job.cancel_event.is_set():
+            job.status, job.finished_at = JOB_CANCELLED, time.time()
+            job._notify()
+            return
+        job.status, job.started_at = JOB_RUNNING, time.time()
+        job._notify()
+        try:
+            job.result = fn(job)
+            job.status = JOB_CANCELLED if job.cancel_event.is_set() else JOB_DONE
+        except Exception as e:
+            logger.exception(f"Job {job.id} ({job.kind}) fehlgeschlagen: {e}")
+            job.error = str(e)
+            job.status = JOB_CANCELLED if job.cancel_event.is_set() else JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Job {job.id} ({job.kind}) beendet: {job.status}")
+            job._notify()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - KEEP_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        """Alle bekannten Jobs, neueste zuerst."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Bricht einen Job ab. Wartende Jobs werden sofort verworfen, laufende erhalten das Abbruchsignal
+        (job.cancel_event); die Build-Funktionen des ExamBuilder beenden daraufhin laufende lualatex-Prozesse.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+        job.cancel_event.set()
+        if job.status == JOB_QUEUED and job.future is not None and job.future.cancel():
+            job.status, job.finished_at = JOB_CANCELLED, time.time()
+            job._notify()
+        logger.info(f"Abbruch für Job {job.id} ({job.kind}) angefordert.")
+        return True
+
+    def shutdown(self, wait: bool = False):
+        for job in self.list():
+            if job.status == JOB_QUEUED:
+                self.cancel(job.id)
+        self._executor.shutdown(wait=wait)
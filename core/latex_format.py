@@ -0,0 +1,138 @@
+# core/latex_format.py
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .tools import find_lualatex
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LATEX_FORMAT_DIR = PROJECT_ROOT / "data" / "latex_formats"
+# "0" schaltet das vorkompilierte Format ab (z. B. zum Vergleichen oder bei Problemen mit einer TeX-Installation)
+LATEX_FORMAT_ENV = "GENESIS_LATEX_FORMAT"
+DUMP_MARKER = r"\csname endofdump\endcsname"
+
+
+def get_lualatex_version() -> str:
+    """Erste Zeile von `lualatex --version` (aus dem Werkzeug-Cache); leer, wenn lualatex fehlt."""
+    lualatex = find_lualatex()
+    return lualatex["version_line"] if lualatex else ""
+
+
+def dumpable_preamble(tex_source: str) -> Optional[str]:
+    """Teil des Dokuments vor DUMP_MARKER, oder None, wenn das Template keinen Marker enthält."""
+    index = tex_source.find(DUMP_MARKER)
+    if index < 0:
+        return None
+    return tex_source[:index]
+
+
+class LatexFormatCache:
+    """
+    Vorkompilierte LuaLaTeX-Formate (.fmt) für die feste Präambel des Klausur-Templates.
+    Das Format wird mit mylatexformat beim ersten Bedarf erzeugt und unter
+    data/latex_formats/exam-<hash>.fmt abgelegt. Der Hash umfasst Präambel und lualatex-Version,
+    ändert sich das Template oder die TeX-Installation, wird automatisch ein neues Format gebaut.
+    Schlägt der Bau fehl, wird das pro Schlüssel vermerkt und ohne Format kompiliert.
+    """
+
+    def __init__(self, format_dir: Optional[Path] = None):
+        self.format_dir = Path(format_dir) if format_dir else LATEX_FORMAT_DIR
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return os.environ.get(LATEX_FORMAT_ENV, "1") != "0"
+
+    def format_name(self, preamble: str) -> str:
+        h = hashlib.sha256()
+        for part in (preamble, get_lualatex_version()):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return f"exam-{h.hexdigest()[:16]}"
+
+    def format_path(self, preamble: str) -> Path:
+        """Ort des .fmt für diese Präambel (unabhängig davon, ob es schon gebaut ist)."""
+        return self.format_dir / f"{self.format_name(preamble)}.fmt"
+
+    def needs_build(self, preamble: str) -> bool:
+        """True, wenn get() für diese Präambel lualatex starten würde (weder Format noch Fehlversuch vorhanden)."""
+        if not self.enabled or not get_lualatex_version():
+            return False
+        name = self.format_name(preamble)
+        return not (self.format_dir / f"{name}.fmt").exists() and not (self.format_dir / f"{name}.failed").exists()
+
+    def get(self, preamble: str) -> Optional[Path]:
+        """Pfad zum passenden .fmt (wird bei Bedarf gebaut) oder None, wenn keins verfügbar ist."""
+        if not self.enabled or not get_lualatex_version():
+            return None
+        name = self.format_name(preamble)
+        fmt_path = self.format_path(preamble)
+        if fmt_path.exists():
+            return fmt_path
+        if (self.format_dir / f"{name}.failed").exists():
+            return None
+        with self._lock:
+            if fmt_path.exists():
+                return fmt_path
+            return self._build(name, preamble)
+
+    def _build(self, name: str, preamble: str) -> Optional[Path]:
+        logger.info(f"Erzeuge LuaLaTeX-Format {name} für die Klausur-Präambel...")
+        self.format_dir.mkdir(parents=True, exist_ok=True)
+        fmt_path = self.format_dir / f"{name}.fmt"
+        # in einem eigenen Verzeichnis bauen und atomar verschieben: parallele Worker-Prozesse
+        # können gleichzeitig bauen, sehen aber nie ein halb geschriebenes Format
+        with tempfile.TemporaryDirectory(prefix="genesis-fmt-", dir=self.format_dir) as tmp:
+            source = Path(tmp) / f"{name}.tex"
+            source.write_text(preamble + DUMP_MARKER + "\n", encoding="utf-8")
+            command = ["lualatex", "-ini", "-interaction=nonstopmode", f"-jobname={name}",
+                       f"-output-directory={tmp}", "&lualatex", "mylatexformat.ltx", source.name]
+            try:
+                result = subprocess.run(command, capture_output=True, text=True, cwd=tmp)
+            except OSError as e:
+                logger.warning(f"LuaLaTeX-Format konnte nicht erzeugt werden: {e}")
+                return None
+            built = Path(tmp) / f"{name}.fmt"
+            if result.returncode != 0 or not built.exists():
+                logger.warning(f"LuaLaTeX-Format konnte nicht erzeugt werden (Exit-Code {result.returncode}), "
+                               f"kompiliere ohne Format.")
+                logger.debug(f"LaTeX-Ausgabe:\n{result.stdout}")
+                (self.format_dir / f"{name}.failed").touch()
+                return None
+            os.replace(built, fmt_path)
+        self._remove_stale(name)
+        logger.info(f"LuaLaTeX-Format gespeichert: {fmt_path}")
+        return fmt_path
+
+    def _remove_stale(self, current_name: str):
+        """Entfernt Formate früherer Template-Stände."""
+        for entry in self.format_dir.glob("exam-*"):
+            if entry.stem != current_name and entry.suffix in (".fmt", ".failed"):
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+
+    def clear(self):
+        shutil.rmtree(self.format_dir, ignore_errors=True)
+
+
+_default_format_cache: Optional[LatexFormatCache] = None
+_default_format_cache_lock = threading.Lock()
+
+
+def get_format_cache() -> LatexFormatCache:
+    """Prozessweiter Standard-Cache für vorkompilierte Formate."""
+    global _default_format_cache
+    with _default_format_cache_lock:
+        if _default_format_cache is None:
+            _default_format_cache = LatexFormatCache()
+        return _default_format_cache
@@ -1,20 +1,27 @@
 # core/latex_generator.py
-import pypandoc
 import subprocess
 import os
+import re
+import time
+import hashlib
+import shutil
+import tempfile
+import uuid
 import logging
 from datetime import date
+from pathlib import Path
+
+from .build_cache import get_build_cache
+from .latex_format import dumpable_preamble, get_format_cache
+from .pandoc_batch import convert_many
+from .render_cache import LATEX_FRAGMENT_FORMAT
 
 logger = logging.getLogger(__name__)
 
 LATEX_TEMPLATE = r"""
 \documentclass[12pt, a4paper,ngerman]{{article}}
 \usepackage{{babel}}
-\usepackage{{fontspec}}
-\setmainfont{{TeX Gyre Termes}}
 \usepackage{{amsmath, graphicx}}
-\usepackage{{unicode-math}}
-\setmathfont{{Latin Modern Math}}
 % --- HIER IST DIE KORREKTUR für mehr Rand oben und links/rechts auf allen Seiten ---
 \usepackage[left=2.5cm, right=2.5cm, top=3.5cm, bottom=2.5cm]{{geometry}} % top=3.5cm für mehr Platz zur Kopfzeile
 % --- ENDE DER KORREKTUR ---
@@ -32,6 +39,14 @@ LATEX_TEMPLATE = r"""
 \renewcommand{{\headrulewidth}}{{0.4pt}}
 \renewcommand{{\footrulewidth}}{{0.4pt}}
 
+% --- Bis hierher steckt die Präambel im vorkompilierten Format (siehe core/latex_format.py) ---
+\csname endofdump\endcsname
+% Schriften werden von luaotfload zur Laufzeit geladen und lassen sich nicht mitdumpen
+\usepackage{{fontspec}}
+\setmainfont{{TeX Gyre Termes}}
+\usepackage{{unicode-math}}
+\setmathfont{{Latin Modern Math}}
+
 \begin{{document}}
 
 % --- Vereinfachtes Deckblatt ---
@@ -72,120 +87,260 @@ LATEX_TEMPLATE = r"""
 """
 
 
-def generate_tex_file(module_name: str, tasks: list[str], output_filename: str):
+# Platzhalter im Template, an dessen Stelle die Aufgaben eingesetzt werden
+TASKS_PLACEHOLDER = "% HIER WERDEN DIE AUFGABEN EINGEFÜGT"
+
+
+def generate_tex_file(module_name: str, tasks: list[str], output_filename: str,
+                      task_ids: list[int] | None = None, fragment_cache=None):
     logger.info("Konvertiere Markdown und erstelle .tex-Datei...")
     latex_tasks = []
-    for i, task_md in enumerate(tasks, 1):
-        try:
-            latex_content = pypandoc.convert_text(task_md, 'latex', format='md')
-            formatted_task = f"\\clearpage\n\\section*{{Aufgabe {i}}}\n{latex_content}\n\\vfill"
-            latex_tasks.append(formatted_task)
-        except OSError as e:
-            msg = f"Pandoc-Fehler: {e}.";
-            logger.error(msg);
+    if fragment_cache is not None:
+        # bereits konvertierte Aufgaben kommen aus dem Fragment-Cache, nur neue Inhalte laufen durch pandoc
+        results = fragment_cache.render_many(list(zip(task_ids or [None] * len(tasks), tasks)), LATEX_FRAGMENT_FORMAT)
+    else:
+        # alle Aufgaben in einem pandoc-Aufruf konvertieren, Fehler bleiben pro Aufgabe zuordenbar
+        results = convert_many(tasks, LATEX_FRAGMENT_FORMAT)
+    for i, (latex_content, error) in enumerate(results, 1):
+        if error:
+            msg = f"Pandoc-Fehler in Aufgabe {i}: {error}."
+            logger.error(msg)
             return None, msg
+        formatted_task = f"\\clearpage\n\\section*{{Aufgabe {i}}}\n{latex_content}\n\\vfill"
+        latex_tasks.append(formatted_task)
     full_latex_doc = LATEX_TEMPLATE.format(
         module_name=module_name,
-    ).replace("% HIER WERDEN DIE AUFGABEN EINGEFÜGT", "\n".join(latex_tasks))
+    ).replace(TASKS_PLACEHOLDER, "\n".join(latex_tasks))
     tex_filepath = f"{output_filename}.tex"
     with open(tex_filepath, "w", encoding="utf-8") as f:
         f.write(full_latex_doc)
     return tex_filepath, None
 
 
-def compile_pdf_from_tex(tex_filepath: str):
-    output_filename = tex_filepath.replace(".tex", "")
+# --- Rerun-Erkennung (wie latexmk): nur so viele lualatex-Läufe wie nötig ---
+MAX_LATEX_PASSES = 4
+RERUN_HINTS = re.compile(
+    r"Rerun to get|Label\(s\) may have changed|Please \(?re\)?run|rerunfilecheck Warning|Rerun LaTeX"
+)
+# .aux-Einträge, die erst im nächsten Lauf aufgelöst werden (Labels, Inhaltsverzeichnis, Zitate)
+AUX_CROSSREF_ENTRIES = re.compile(r"\\(newlabel|@writefile|bibcite|contentsline)\b")
+# wie oft ein laufendes lualatex auf einen Abbruch geprüft wird
+CANCEL_POLL_INTERVAL = 0.1
+
+
+class BuildCancelled(RuntimeError):
+    """Der Build wurde über cancel_check abgebrochen; ein laufendes lualatex wurde beendet."""
+
+
+def _read_file(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def _needs_rerun(log_content: str, aux_before: str, aux_after: str, first_pass: bool) -> bool:
+    if RERUN_HINTS.search(log_content):
+        return True
+    if first_pass:
+        # vor dem ersten Lauf gab es keine .aux; nur echte Querverweise brauchen einen zweiten Lauf
+        return bool(AUX_CROSSREF_ENTRIES.search(aux_after))
+    return hashlib.sha256(aux_before.encode()).digest() != hashlib.sha256(aux_after.encode()).digest()
+
+
+def _run_lualatex(command: list[str], build_dir: str, env, cancel_check=None) -> tuple[int, str]:
+    """
+    Startet lualatex und wartet auf das Ende; liefert (returncode, stdout).
+    Meldet cancel_check() zwischendurch True, wird der Prozess beendet und BuildCancelled geworfen.
+    """
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                          cwd=build_dir, env=env) as proc:
+        while True:
+            try:
+                stdout, _ = proc.communicate(timeout=CANCEL_POLL_INTERVAL if cancel_check else None)
+                return proc.returncode, stdout
+            except subprocess.TimeoutExpired:
+                if cancel_check():
+                    proc.kill()
+                    proc.communicate()
+                    raise BuildCancelled("Build abgebrochen, lualatex wurde beendet.")
+
+
+def compile_pdf_from_tex(tex_filepath: str, fmt_path: Path | None = None, on_pass=None, cancel_check=None):
+    """
+    Kompiliert die .tex-Datei mit lualatex. lualatex läuft im Verzeichnis der .tex-Datei
+    (relative Pfade wie assets/ werden dort aufgelöst) und schreibt alle Ausgaben mit
+    -output-directory ebenfalls dorthin; das Prozess-CWD wird nicht angefasst.
+    Ein weiterer Lauf erfolgt nur, wenn .log oder .aux ihn verlangen (höchstens MAX_LATEX_PASSES).
+    Mit fmt_path wird das vorkompilierte Präambel-Format (core/latex_format.py) geladen.
+    on_pass(lauf) wird vor jedem Lauf aufgerufen; meldet cancel_check() True, wird lualatex beendet
+    und BuildCancelled geworfen.
+    Liefert (success, message, pass_times) mit der Dauer jedes Laufs in Sekunden.
+    """
+    build_dir = os.path.dirname(os.path.abspath(tex_filepath))
+    tex_name = os.path.basename(tex_filepath)
+    job_path = os.path.join(build_dir, os.path.splitext(tex_name)[0])
+    pdf_filepath = job_path + ".pdf"
     log_content = ""
+    pass_times = []
     try:
-        command = ["lualatex", "-interaction=nonstopmode", tex_filepath]
-        logger.info("Führe lualatex aus...");
-        result = subprocess.run(command, capture_output=True, text=True)
-        if result.returncode == 0:
-            result = subprocess.run(command, capture_output=True, text=True)
-        log_content = result.stdout
-        if os.path.exists(f"{output_filename}.pdf"):
-            msg = f"PDF '{output_filename}.pdf' erfolgreich erstellt!";
+        command = ["lualatex", "-interaction=nonstopmode", f"-output-directory={build_dir}", tex_name]
+        env = None
+        if fmt_path:
+            command.insert(1, f"-fmt={Path(fmt_path).stem}")
+            env = dict(os.environ, TEXFORMATS=f"{Path(fmt_path).parent}{os.pathsep}")
+        aux_before = _read_file(job_path + ".aux")
+        for pass_no in range(1, MAX_LATEX_PASSES + 1):
+            logger.info(f"Führe lualatex aus (Lauf {pass_no})...");
+            if on_pass:
+                on_pass(pass_no)
+            started = time.perf_counter()
+            returncode, log_content = _run_lualatex(command, build_dir, env, cancel_check)
+            pass_times.append(time.perf_counter() - started)
+            if returncode != 0:
+                break
+            aux_after = _read_file(job_path + ".aux")
+            if not _needs_rerun(_read_file(job_path + ".log"), aux_before, aux_after, pass_no == 1):
+                break
+            aux_before = aux_after
+        else:
+            logger.warning(f"lualatex: nach {MAX_LATEX_PASSES} Läufen noch Rerun-Hinweise, breche ab.")
+        timings = ", ".join(f"{t:.2f}s" for t in pass_times)
+        if os.path.exists(pdf_filepath):
+            msg = f"PDF '{pdf_filepath}' erfolgreich erstellt ({len(pass_times)} Lauf/Läufe: {timings})!";
             logger.info(msg);
-            return True, msg
+            return True, msg, pass_times
         else:
             msg = "Fehler: Keine PDF erstellt.";
             logger.error(msg);
             logger.debug(f"LaTeX-Ausgabe:\n{log_content}");
-            return False, msg
+            return False, msg, pass_times
+    except BuildCancelled:
+        logger.info(f"lualatex abgebrochen: {tex_filepath}")
+        raise
     except FileNotFoundError:
         msg = "Fehler: 'lualatex' nicht gefunden.";
         logger.error(msg);
-        return False, msg
+        return False, msg, pass_times
     except Exception as e:
         msg = f"Unerwarteter Fehler: {e}";
         logger.error(msg);
         logger.debug(f"LaTeX-Ausgabe:\n{log_content}");
-        return False, msg
-    finally:
-        logger.debug("Räume temporäre Dateien auf...");
-        for ext in ['.aux', '.log', '.tex']:
-            if os.path.exists(output_filename + ext): os.remove(output_filename + ext)
-
-            # --- convenience wrapper for exam_builder / external callers ---
-            from pathlib import Path
-            import shutil
-
-            def generate_exam_pdf(module_name, tasks, output_filename: str | None = None):
-                """
-                High-level helper:
-                - prepares output folder (data/generated_exams)
-                - makes sure assets/genesis-exam-maker.png is available under <outdir>/assets/
-                - calls generate_tex_file(...) and compile_pdf_from_tex(...)
-                - returns absolute path to generated PDF or raises RuntimeError on failure
-                """
-                logger.info("generate_exam_pdf: starting generation...")
-
-                # prepare output directory
-                project_root = Path(__file__).resolve().parent.parent
-                outdir = project_root / "data" / "generated_exams"
-                outdir.mkdir(parents=True, exist_ok=True)
-
-                # ensure logo asset is available to the .tex (template uses assets/...)
-                src_asset = project_root / "assets" / "genesis-exam-maker.png"
-                if src_asset.exists():
-                    try:
-                        dst_assets_dir = outdir / "assets"
-                        dst_assets_dir.mkdir(exist_ok=True)
-                        shutil.copy2(src_asset, dst_assets_dir / src_asset.name)
-                    except Exception as e:
-                        logger.warning("Konnte Logo nicht kopieren: %s", e)
-                else:
-                    logger.warning("Logo-Quelle nicht gefunden: %s", src_asset)
-
-                # decide base name (no extension)
-                base = (output_filename or module_name or "exam").strip()
-                # sanitize some characters for filenames
-                base = base.replace(" ", "_")
-                if base.lower().endswith(".pdf"):
-                    base = base[:-4]
-
-                base_path = str(outdir / base)  # generate_tex_file will append .tex
-
-                # generate .tex
-                tex_path, err = generate_tex_file(module_name, tasks, base_path)
-                if err:
-                    logger.error("generate_tex_file error: %s", err)
-                    raise RuntimeError(f"Tex-Generierung fehlgeschlagen: {err}")
-
-                # compile to PDF
-                ok, msg = compile_pdf_from_tex(tex_path)
-                if not ok:
-                    logger.error("LaTeX compile error: %s", msg)
-                    raise RuntimeError(f"LaTeX-Kompilierung fehlgeschlagen: {msg}")
-
-                pdf_path = Path(tex_path.replace(".tex", ".pdf")).resolve()
-                if not pdf_path.exists():
-                    # try expected fallback
-                    candidate = outdir / (base + ".pdf")
-                    if candidate.exists():
-                        pdf_path = candidate.resolve()
-                    else:
-                        raise RuntimeError(f"PDF nicht gefunden nach Kompilierung (erwartet: {pdf_path})")
-
-                logger.info("generate_exam_pdf: PDF erstellt: %s", str(pdf_path))
-                return str(pdf_path)
+        return False, msg, pass_times
+
+
+# --- convenience wrapper for exam_builder / external callers ---
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+GENERATED_EXAMS_DIR = PROJECT_ROOT / "data" / "generated_exams"
+TEMPLATE_ASSETS = ["genesis-exam-maker.png"]
+
+
+def _prepare_build_dir(build_dir: Path):
+    """Kopiert die vom Template referenzierten Assets nach <build_dir>/assets/."""
+    dst_assets_dir = build_dir / "assets"
+    dst_assets_dir.mkdir(exist_ok=True)
+    for name in TEMPLATE_ASSETS:
+        src_asset = PROJECT_ROOT / "assets" / name
+        if src_asset.exists():
+            shutil.copy2(src_asset, dst_assets_dir / name)
+        else:
+            logger.warning("Logo-Quelle nicht gefunden: %s", src_asset)
+
+
+def _output_basename(module_name: str, output_filename: str | None) -> str:
+    base = (output_filename or module_name or "exam").strip()
+    # sanitize some characters for filenames
+    base = base.replace(" ", "_").replace("/", "_").replace("\\", "_")
+    if base.lower().endswith(".pdf"):
+        base = base[:-4]
+    return base or "exam"
+
+
+def _publish_pdf(pdf_source: Path, outdir: Path, base: str) -> Path:
+    pdf_path = (outdir / (base + ".pdf")).resolve()
+    # erst neben das Ziel kopieren, dann atomar ersetzen (Quelle kann auf einem anderen Dateisystem liegen)
+    staging = outdir / f".{base}.{uuid.uuid4().hex}.pdf.part"
+    shutil.copy2(pdf_source, staging)
+    os.replace(staging, pdf_path)
+    return pdf_path
+
+
+def generate_exam_pdf(module_name, tasks, output_filename: str | None = None, output_dir=None,
+                      build_cache=None, task_ids: list[int] | None = None, fragment_cache=None,
+                      on_stage=None, cancel_check=None) -> dict:
+    """
+    High-level helper:
+    - erzeugt .tex und PDF in einem eigenen temporären Build-Verzeichnis (mit Kopie der Assets),
+      sodass beliebig viele Builds parallel laufen können, auch für dasselbe Modul
+    - die feste Präambel wird aus einem vorkompilierten LuaLaTeX-Format geladen, sofern verfügbar
+    - mit fragment_cache (RenderCache) werden bereits konvertierte Aufgaben nicht erneut durch pandoc geschickt
+    - liegt für denselben .tex-Quelltext (inkl. Template und Assets) schon eine PDF im
+      Build-Cache, wird lualatex gar nicht erst gestartet
+    - verschiebt nur die fertige PDF nach output_dir (Standard: data/generated_exams);
+      das Ersetzen ist atomar, Leser sehen nie eine halb geschriebene Datei
+    - on_stage(stufe, info) meldet den Fortschritt: "convert", dann "cached" oder "compile" mit {"pass": n}
+    - cancel_check() wird zwischen den Stufen und während lualatex läuft abgefragt;
+      bei True wird lualatex beendet und BuildCancelled geworfen
+    - liefert {"path", "cached", "passes", "pass_times"} oder wirft RuntimeError
+    """
+    def stage(name, info=None):
+        if cancel_check and cancel_check():
+            raise BuildCancelled("Build abgebrochen.")
+        if on_stage:
+            try:
+                on_stage(name, info or {})
+            except Exception as e:
+                logger.debug(f"on_stage Fehler: {e}")
+
+    logger.info("generate_exam_pdf: starting generation...")
+    outdir = Path(output_dir) if output_dir else GENERATED_EXAMS_DIR
+    outdir.mkdir(parents=True, exist_ok=True)
+    base = _output_basename(module_name, output_filename)
+    cache = build_cache or get_build_cache()
+
+    with tempfile.TemporaryDirectory(prefix="genesis-build-") as tmp:
+        build_dir = Path(tmp)
+        _prepare_build_dir(build_dir)
+
+        stage("convert")
+        tex_path, err = generate_tex_file(module_name, tasks, str(build_dir / base), task_ids, fragment_cache)
+        if err:
+            logger.error("generate_tex_file error: %s", err)
+            raise RuntimeError(f"Tex-Generierung fehlgeschlagen: {err}")
+
+        with open(tex_path, encoding="utf-8") as f:
+            tex_source = f.read()
+        cache_key = cache.key_for(tex_source, LATEX_TEMPLATE,
+                                  [PROJECT_ROOT / "assets" / name for name in TEMPLATE_ASSETS])
+        cached_pdf = cache.get(cache_key)
+        cache.record(cached_pdf is not None)
+        if cached_pdf is not None:
+            stage("cached")
+            pdf_path = _publish_pdf(cached_pdf, outdir, base)
+            logger.info("generate_exam_pdf: PDF aus dem Build-Cache: %s", str(pdf_path))
+            return {"path": str(pdf_path), "cached": True, "passes": 0, "pass_times": []}
+
+        fmt_path = None
+        preamble = dumpable_preamble(tex_source)
+        if preamble is not None:
+            fmt_path = get_format_cache().get(preamble)
+        on_pass = lambda pass_no: stage("compile", {"pass": pass_no})
+        ok, msg, pass_times = compile_pdf_from_tex(tex_path, fmt_path, on_pass, cancel_check)
+        if not ok and fmt_path:
+            logger.warning("Kompilierung mit vorkompiliertem Format fehlgeschlagen, versuche es ohne: %s", msg)
+            ok, msg, pass_times = compile_pdf_from_tex(tex_path, None, on_pass, cancel_check)
+        if not ok:
+            logger.error("LaTeX compile error: %s", msg)
+            raise RuntimeError(f"LaTeX-Kompilierung fehlgeschlagen: {msg}")
+
+        built_pdf = build_dir / (base + ".pdf")
+        if not built_pdf.exists():
+            raise RuntimeError(f"PDF nicht gefunden nach Kompilierung (erwartet: {built_pdf})")
+
+        cache.put(cache_key, built_pdf)
+        pdf_path = _publish_pdf(built_pdf, outdir, base)
+
+    logger.info("generate_exam_pdf: PDF erstellt: %s", str(pdf_path))
+    return {"path": str(pdf_path), "cached": False, "passes": len(pass_times),
+            "pass_times": [round(t, 3) for t in pass_times]}
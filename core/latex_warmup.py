@@ -0,0 +1,128 @@
+# core/latex_warmup.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+from .latex_format import LATEX_FORMAT_DIR, dumpable_preamble, get_format_cache
+from .latex_generator import LATEX_TEMPLATE, TASKS_PLACEHOLDER, _prepare_build_dir, compile_pdf_from_tex
+from .tools import find_lualatex
+
+logger = logging.getLogger(__name__)
+
+WARMUP_MARKER = LATEX_FORMAT_DIR / "warmup.json"
+# "0" schaltet den Aufwärmlauf beim Start ab
+WARMUP_ENV = "GENESIS_LATEX_WARMUP"
+# Text und Formel, damit luaotfload sowohl die Text- als auch die Mathe-Schrift in seinen Cache aufnimmt
+WARMUP_BODY = r"""\clearpage
+\section*{Aufwärmlauf}
+Äpfel, Öl, Übung, Straße -- „Anführungszeichen“ und €.
+\[ \int_0^1 x^2 \, dx = \frac{1}{3}, \qquad \sum_{k=1}^{n} k = \frac{n(n+1)}{2} \]"""
+
+_warmup_lock = threading.Lock()
+
+
+def warmup_document() -> str:
+    """Minimales Dokument mit der echten Präambel des Klausur-Templates."""
+    return LATEX_TEMPLATE.format(module_name="Aufwärmlauf").replace(TASKS_PLACEHOLDER, WARMUP_BODY)
+
+
+def warmup_key(tex_source: str, lualatex: dict) -> str:
+    """
+    Ändert sich, sobald ein neuer Aufwärmlauf nötig ist: anderes Template, andere oder aktualisierte
+    lualatex-Binärdatei, anderes Benutzerkonto (luaotfload legt seinen Cache pro Benutzer an).
+    """
+    h = hashlib.sha256()
+    for part in (tex_source, lualatex["path"], lualatex["version_line"], str(lualatex["mtime_ns"]), str(Path.home())):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _read_marker() -> dict:
+    try:
+        with open(WARMUP_MARKER, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _write_marker(key: str, seconds: float):
+    try:
+        WARMUP_MARKER.parent.mkdir(parents=True, exist_ok=True)
+        staging = WARMUP_MARKER.with_name(f".{WARMUP_MARKER.name}.{uuid.uuid4().hex}.part")
+        with open(staging, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "seconds": round(seconds, 3), "created": time.time()}, f)
+        os.replace(staging, WARMUP_MARKER)
+    except OSError as e:
+        logger.debug(f"Marker für den LaTeX-Aufwärmlauf konnte nicht geschrieben werden: {e}")
+
+
+def warm_up_latex(on_progress: Optional[Callable[[int, str], None]] = None, force: bool = False) -> dict:
+    """
+    Kompiliert ein minimales Dokument mit der Präambel des Klausur-Templates in einem temporären
+    Verzeichnis. Dabei wird das vorkompilierte Präambel-Format gebaut und luaotfload baut seine
+    Schriften-Datenbank auf – beides bezahlt sonst der erste echte Klausur-Build (auf einem frischen
+    Rechner leicht mehrere zehn Sekunden).
+    Ein Marker (data/latex_formats/warmup.json) vermerkt den erfolgreichen Lauf; solange er passt
+    und das Format existiert, wird der Aufwärmlauf übersprungen.
+    on_progress(prozent, meldung) meldet den Fortschritt.
+    Liefert {"status": "fresh"|"warmed"|"skipped"|"failed", "message", "seconds"}.
+    """
+    def report(percent, message):
+        if on_progress:
+            try:
+                on_progress(percent, message)
+            except Exception as e:
+                logger.debug(f"on_progress Fehler: {e}")
+
+    start = time.perf_counter()
+
+    def result(status, message):
+        report(100, message)
+        return {"status": status, "message": message, "seconds": round(time.perf_counter() - start, 3)}
+
+    if os.environ.get(WARMUP_ENV, "1") == "0":
+        return result("skipped", "LaTeX-Aufwärmlauf ist abgeschaltet.")
+    lualatex = find_lualatex()
+    if not lualatex:
+        return result("skipped", "lualatex nicht gefunden, kein Aufwärmlauf.")
+
+    tex_source = warmup_document()
+    key = warmup_key(tex_source, lualatex)
+    preamble = dumpable_preamble(tex_source)
+    fmt_cache = get_format_cache()
+    with _warmup_lock:
+        format_ready = preamble is None or not fmt_cache.needs_build(preamble)
+        if not force and format_ready and _read_marker().get("key") == key:
+            return result("fresh", "LaTeX-Caches sind aktuell.")
+
+        logger.info("LaTeX-Aufwärmlauf: baue Format und Schriften-Cache auf...")
+        fmt_path = None
+        if preamble is not None:
+            report(10, "LaTeX: Präambel-Format wird erzeugt...")
+            fmt_path = fmt_cache.get(preamble)
+
+        report(40, "LaTeX: Schriften-Cache wird aufgebaut (einmalig, kann dauern)...")
+        with tempfile.TemporaryDirectory(prefix="genesis-warmup-") as tmp:
+            build_dir = Path(tmp)
+            _prepare_build_dir(build_dir)
+            tex_path = build_dir / "warmup.tex"
+            tex_path.write_text(tex_source, encoding="utf-8")
+            ok, msg, _ = compile_pdf_from_tex(str(tex_path), fmt_path)
+            if not ok and fmt_path:
+                ok, msg, _ = compile_pdf_from_tex(str(tex_path))
+
+        if not ok:
+            logger.warning(f"LaTeX-Aufwärmlauf fehlgeschlagen: {msg}")
+            return result("failed", f"LaTeX-Aufwärmlauf fehlgeschlagen: {msg}")
+        seconds = time.perf_counter() - start
+        _write_marker(key, seconds)
+        logger.info(f"LaTeX-Aufwärmlauf abgeschlossen nach {seconds:.1f} s.")
+        return result("warmed", f"LaTeX bereit (Caches aufgebaut in {seconds:.1f} s).")
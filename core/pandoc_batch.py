@@ -0,0 +1,107 @@
+# core/pandoc_batch.py
+import logging
+import re
+import uuid
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Dokumente pro pandoc-Aufruf; begrenzt Speicher und den Schaden, falls ein Batch neu einzeln laufen muss
+DEFAULT_CHUNK_SIZE = 250
+
+# Fußnoten und Referenz-Links gelten in pandoc dokumentweit und würden zwischen Aufgaben
+# vermischt werden; solche Aufgaben werden deshalb einzeln konvertiert.
+_DOCUMENT_GLOBAL_SYNTAX = re.compile(r"\[\^|^[ ]{0,3}\[[^\]]+\]:", re.MULTILINE)
+
+ConversionResult = Tuple[Optional[str], Optional[str]]  # (output, error)
+
+
+# Teil des Render-Cache-Schlüssels (render_cache.get_converter_version): ändert sich die Ausgabe
+# bei gleichem Inhalt, werden alte Einträge so verworfen
+CONVERTER_OPTIONS = "-auto_identifiers"
+
+
+def _source_format(fmt: str) -> str:
+    # Ohne automatische Header-IDs, einzeln wie im Batch: im Batch hinge die ID einer Aufgabe sonst
+    # von ihren Nachbarn ab (pandoc nummeriert doppelte IDs dokumentweit durch), und die Ausgabe
+    # einer Aufgabe muss unabhängig davon sein, wie sie konvertiert wurde (Render- und PDF-Cache
+    # sind inhaltsadressiert). pypandoc kennt den Alias "md" nur ohne Extensions.
+    base = {"md": "markdown"}.get(fmt, fmt)
+    return f"{base}{CONVERTER_OPTIONS}"
+
+
+def convert_one(document: str, to: str, fmt: str = "md") -> ConversionResult:
+    import pypandoc  # erst beim ersten Konvertieren laden, nicht schon beim Programmstart
+
+    try:
+        return _normalize(pypandoc.convert_text(document, to, format=_source_format(fmt))), None
+    except (OSError, RuntimeError) as e:
+        return None, str(e)
+
+
+def convert_many(documents: List[str], to: str, fmt: str = "md",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[ConversionResult]:
+    """
+    Konvertiert viele Markdown-Dokumente mit wenigen pandoc-Aufrufen.
+    Die Dokumente werden mit eindeutigen Trenn-Absätzen verbunden, in einem Prozess konvertiert
+    und an den Markern wieder aufgeteilt. Liefert pro Dokument (output, error) in Eingabereihenfolge.
+    Schlägt ein Batch fehl oder lässt er sich nicht sauber aufteilen (z.B. offener Codeblock),
+    wird er einzeln konvertiert, sodass Fehler weiterhin pro Aufgabe gemeldet werden.
+    Überschriften erhalten keine automatischen IDs (id=/\\label{}), damit ein Dokument einzeln und
+    im Batch dieselbe Ausgabe ergibt.
+    """
+    results: List[Optional[ConversionResult]] = [None] * len(documents)
+    batchable = []
+    for i, doc in enumerate(documents):
+        if _DOCUMENT_GLOBAL_SYNTAX.search(doc):
+            results[i] = convert_one(doc, to, fmt)
+        else:
+            batchable.append(i)
+
+    for start in range(0, len(batchable), chunk_size):
+        indices = batchable[start:start + chunk_size]
+        if len(indices) == 1:
+            results[indices[0]] = convert_one(documents[indices[0]], to, fmt)
+            continue
+        try:
+            outputs = _convert_chunk([documents[i] for i in indices], to, fmt)
+        except OSError as e:
+            # pandoc fehlt: jeder Einzelaufruf würde genauso scheitern
+            for i in indices:
+                results[i] = (None, str(e))
+            continue
+        if outputs is None:
+            logger.debug(f"pandoc-Batch mit {len(indices)} Dokumenten nicht aufteilbar, konvertiere einzeln.")
+            for i in indices:
+                results[i] = convert_one(documents[i], to, fmt)
+        else:
+            for i, output in zip(indices, outputs):
+                results[i] = (output, None)
+    return results
+
+
+def _convert_chunk(documents: List[str], to: str, fmt: str) -> Optional[List[str]]:
+    """Ein pandoc-Aufruf für mehrere Dokumente; None, wenn Konvertierung oder Aufteilen scheitert."""
+    token = f"GEMSPLIT{uuid.uuid4().hex}X"
+    # Marker als eigener Absatz nach jedem Dokument; nur [A-Za-z0-9], damit kein Format ihn escaped
+    source = "".join(f"{doc}\n\n{token}{i}\n\n" for i, doc in enumerate(documents))
+    import pypandoc
+
+    try:
+        output = pypandoc.convert_text(source, to, format=_source_format(fmt))
+    except RuntimeError as e:
+        logger.debug(f"pandoc-Batch fehlgeschlagen: {e}")
+        return None
+
+    # HTML verpackt den Marker in <p>…</p>, LaTeX lässt ihn als eigenen Absatz stehen
+    parts = re.split(rf"(?:<p>)?{token}(\d+)(?:</p>)?", output)
+    # parts = [doc0, "0", doc1, "1", ..., rest]
+    markers = parts[1::2]
+    if markers != [str(i) for i in range(len(documents))] or parts[-1].strip():
+        return None
+    return [_normalize(part) for part in parts[0:-1:2]]
+
+
+def _normalize(output: str) -> str:
+    output = output.strip("\n")
+    return f"{output}\n" if output else ""
@@ -0,0 +1,163 @@
+# core/render_cache.py
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .pandoc_batch import CONVERTER_OPTIONS, convert_many
+from .tools import find_pandoc
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_ENTRIES = 2048
+# Zielformat der Aufgaben-Fragmente, aus denen generate_tex_file die Klausur zusammensetzt
+LATEX_FRAGMENT_FORMAT = "latex"
+
+
+def get_pandoc_version() -> str:
+    """Pandoc-Version (aus dem Werkzeug-Cache, ohne pypandoc zu laden)."""
+    pandoc = find_pandoc()
+    if not pandoc or not pandoc["version"]:
+        logger.warning("Pandoc-Version konnte nicht ermittelt werden.")
+        return "unknown"
+    return pandoc["version"]
+
+
+def get_converter_version() -> str:
+    """Teil des Cache-Schlüssels: pandoc-Version plus die Konvertierungsoptionen aus pandoc_batch."""
+    return f"{get_pandoc_version()}{CONVERTER_OPTIONS}"
+
+
+def render_cache_key(content_md: str, fmt: str, converter_version: str) -> str:
+    """Schlüssel = sha256(Zielformat, Konverter-Version, Markdown-Inhalt)."""
+    h = hashlib.sha256()
+    for part in (fmt, converter_version, content_md):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class RenderCache:
+    """
+    Zweistufiger Cache für pandoc-Ausgaben (HTML für die Anzeige, LaTeX-Fragmente für die Klausuren):
+     - im Speicher als LRU (OrderedDict) mit begrenzter Größe
+     - persistent in der SQLite-Tabelle render_cache (über den DatabaseManager)
+    Da der Schlüssel den Inhalt enthält, erzeugt geänderter Text automatisch einen neuen Schlüssel;
+    invalidate_task() entfernt zusätzlich die alten Einträge einer Aufgabe.
+    """
+
+    def __init__(self, db_manager, max_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 converter_version: Optional[str] = None):
+        self.db = db_manager
+        self.max_entries = max_entries
+        self._converter_version = converter_version
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        # Index in beide Richtungen, damit verdrängte Schlüssel auch aus _task_keys verschwinden
+        self._task_keys: Dict[int, Set[str]] = {}
+        self._key_tasks: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+        self._purged = False
+
+    @property
+    def converter_version(self) -> str:
+        if self._converter_version is None:
+            self._converter_version = get_converter_version()
+        return self._converter_version
+
+    def key_for(self, content_md: str, fmt: str) -> str:
+        return render_cache_key(content_md, fmt, self.converter_version)
+
+    def get_many(self, contents: Iterable[str], fmt: str) -> Dict[str, str]:
+        """Liefert {content_md: output} für alle Inhalte, die im Speicher oder in SQLite liegen."""
+        keys = {self.key_for(c, fmt): c for c in contents}
+        found: Dict[str, str] = {}
+        missing = []
+        with self._lock:
+            for key, content in keys.items():
+                output = self._memory.get(key)
+                if output is None:
+                    missing.append(key)
+                else:
+                    self._memory.move_to_end(key)
+                    found[content] = output
+        if missing:
+            for key, output in self.db.get_rendered(missing).items():
+                found[keys[key]] = output
+                self._remember(key, output)
+        return found
+
+    def put_many(self, entries: List[Tuple[Optional[int], str, str]], fmt: str):
+        """Speichert [(task_id, content_md, output), ...] im Speicher und in SQLite."""
+        if not entries:
+            return
+        self._purge_stale_once()
+        rows = []
+        for task_id, content, output in entries:
+            key = self.key_for(content, fmt)
+            self._remember(key, output, task_id)
+            rows.append((key, task_id, fmt, self.converter_version, output))
+        self.db.store_rendered(rows)
+
+    def render_many(self, entries: List[Tuple[Optional[int], str]], fmt: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Liefert für [(task_id, content_md), ...] die Ausgaben als [(output, error), ...] in derselben
+        Reihenfolge. Fehlende Einträge werden mit einem einzigen pandoc-Aufruf erzeugt und gespeichert;
+        fehlgeschlagene Konvertierungen werden nicht gecacht.
+        """
+        cached = self.get_many((content for _, content in entries), fmt)
+        misses = {}
+        for task_id, content in entries:
+            if content not in cached and content not in misses:
+                misses[content] = task_id
+        errors = {}
+        fresh = []
+        for (content, task_id), (output, error) in zip(misses.items(), convert_many(list(misses), fmt)):
+            if error:
+                errors[content] = error
+            else:
+                cached[content] = output
+                fresh.append((task_id, content, output))
+        self.put_many(fresh, fmt)
+        return [(cached.get(content), errors.get(content)) for _, content in entries]
+
+    def warm(self, entries: List[Tuple[Optional[int], str]], fmts: Iterable[str] = (LATEX_FRAGMENT_FORMAT,)) -> int:
+        """Füllt den Cache vorab (z. B. nach einem Massenimport); liefert die Zahl fehlgeschlagener Konvertierungen."""
+        failed = 0
+        for fmt in fmts:
+            failed += sum(1 for _, error in self.render_many(entries, fmt) if error)
+        return failed
+
+    def invalidate_task(self, task_id: int):
+        """Verwirft alle gecachten Ausgaben einer Aufgabe (nach update_task/delete_task)."""
+        with self._lock:
+            for key in self._task_keys.pop(task_id, set()):
+                self._memory.pop(key, None)
+                self._forget_key(key)
+        self.db.delete_rendered_for_task(task_id)
+
+    def _remember(self, key: str, output: str, task_id: Optional[int] = None):
+        with self._lock:
+            self._memory[key] = output
+            self._memory.move_to_end(key)
+            if task_id is not None:
+                self._task_keys.setdefault(task_id, set()).add(key)
+                self._key_tasks.setdefault(key, set()).add(task_id)
+            while len(self._memory) > self.max_entries:
+                evicted, _ = self._memory.popitem(last=False)
+                self._forget_key(evicted)
+
+    def _forget_key(self, key: str):
+        # nur mit gehaltenem self._lock aufrufen
+        for task_id in self._key_tasks.pop(key, set()):
+            keys = self._task_keys.get(task_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._task_keys[task_id]
+
+    def _purge_stale_once(self):
+        # Einträge einer älteren pandoc-Version werden nie mehr getroffen; einmal pro Prozess aufräumen
+        if not self._purged:
+            self._purged = True
+            self.db.purge_rendered(keep_version=self.converter_version)
@@ -0,0 +1,290 @@
+# core/service.py
+"""
+Dienst-Modus: stellt die Methoden von main.Api per HTTP/JSON bereit, sodass mehrere Nutzer
+gegen eine gemeinsame Datenbank arbeiten und Builds in eine Warteschlange stellen können.
+Nur Standardbibliothek (asyncio), keine externen Dienste; pywebview wird nicht geladen.
+
+    python -m core.service [--host 127.0.0.1] [--port 8765] [--db data/klausur.db] [--build-workers 2]
+
+Jede Anfrage braucht "Authorization: Bearer <token>". Ohne --token/GENESIS_SERVICE_TOKEN erzeugt
+der Dienst beim Start ein Token und legt es neben der Datenbank ab (service.token, nur für den
+Benutzer lesbar). POST-Aufrufe verlangen "Content-Type: application/json"; Anfragen mit Origin-Header
+und – bei Bindung an Loopback – mit fremdem Host-Header werden abgelehnt, damit Webseiten im Browser
+des Benutzers (einfache Cross-Origin-POSTs, DNS-Rebinding) den Dienst nicht aufrufen können.
+
+    GET    /api/health
+    GET    /api/methods            verfügbare Api-Methoden
+    POST   /api/<methode>          Body {"args": [...], "kwargs": {...}} oder eine JSON-Liste (args)
+    GET    /api/jobs               = list_jobs
+    GET    /api/jobs/<id>          = get_job (Status-Polling)
+    DELETE /api/jobs/<id>          = cancel_job
+
+Builds laufen ausschließlich über start_build (Warteschlange mit festen Build-Slots), die
+blockierenden build_*-Methoden sind hier gesperrt. Antworten: {"result": ...} bzw. {"error": ...}.
+"""
+import argparse
+import asyncio
+import hmac
+import inspect
+import json
+import logging
+import os
+import secrets
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_REQUEST_WORKERS = 8
+SERVICE_TOKEN_ENV = "GENESIS_SERVICE_TOKEN"
+# erzeugtes Token, im Verzeichnis der Datenbank
+SERVICE_TOKEN_FILE = "service.token"
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_HEADERS = 100
+KEEPALIVE_TIMEOUT = 15
+# blockieren bis zu Minuten; Builds gehen über start_build
+EXCLUDED_METHODS = {"build_exam_for_module", "build_exam_variants", "rebuild_exams"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, close: bool = False):
+        super().__init__(message)
+        self.status = status
+        # z. B. nach 413: der ungelesene Body liegt noch auf dem Socket, die Verbindung ist unbrauchbar
+        self.close = close
+
+
+class ApiService:
+    """
+    asyncio-HTTP-Server vor einer Api-Instanz.
+    Api-Aufrufe laufen in einem festen Thread-Pool; der gemeinsame DatabaseManager leiht ihnen
+    Verbindungen aus seinem Pool, die über alle Anfragen hinweg wiederverwendet werden.
+    """
+
+    def __init__(self, api, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: str | None = None,
+                 request_workers: int = DEFAULT_REQUEST_WORKERS):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.token = token
+        self.methods = {name: member for name, member in inspect.getmembers(api, inspect.ismethod)
+                        if not name.startswith("_") and name not in EXCLUDED_METHODS}
+        self._executor = ThreadPoolExecutor(max_workers=request_workers, thread_name_prefix="genesis-api")
+
+    async def start(self) -> asyncio.AbstractServer:
+        """Öffnet den Port (bei port=0 wird self.port auf den vergebenen Port gesetzt)."""
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info(f"Genesis-Dienst läuft auf http://{self.host}:{self.port}/api/ ({len(self.methods)} Methoden)")
+        if not self.token:
+            logger.warning("Dienst läuft ohne Token; jeder lokale Prozess kann ihn aufrufen.")
+        return server
+
+    async def serve(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                keep_alive = False
+                try:
+                    method, target, version = self._parse_request_line(request_line)
+                    headers = await self._read_headers(reader)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    body = await self._read_body(reader, headers)
+                    self._check_origin(headers)
+                    self._check_token(headers)
+                    self._check_content_type(method, headers)
+                    status, payload = HTTPStatus.OK, {"result": await self._dispatch(method, target, body)}
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                    keep_alive = keep_alive and not e.close
+                except (ValueError, asyncio.LimitOverrunError) as e:
+                    status, payload, keep_alive = HTTPStatus.BAD_REQUEST, {"error": f"Ungültige Anfrage: {e}"}, False
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.exception(f"Fehler in der HTTP-Verbindung: {e}")
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_request_line(line: bytes):
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError("fehlerhafte Anfragezeile")
+        return parts[0].upper(), parts[1], parts[2]
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> dict:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Zu viele Header.")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bytes:
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Anfrage größer als {MAX_BODY_BYTES} Bytes.",
+                            close=True)
+        return await reader.readexactly(length) if length > 0 else b""
+
+    def _check_origin(self, headers: dict):
+        """
+        Browser schicken bei Cross-Origin-Anfragen immer einen Origin-Header; der Dienst hat keine
+        Web-Clients, also wird jeder abgelehnt. Der Host-Header muss bei Loopback-Bindung auf
+        127.0.0.1/localhost:<port> zeigen, sonst kann eine Seite per DNS-Rebinding mitlesen.
+        """
+        if "origin" in headers:
+            raise HttpError(HTTPStatus.FORBIDDEN, "Anfragen aus dem Browser (Origin-Header) sind nicht erlaubt.")
+        if self.host in LOOPBACK_HOSTS:
+            allowed = {f"{name}:{self.port}" for name in ("127.0.0.1", "localhost", "[::1]")}
+            if headers.get("host", "").lower() not in allowed:
+                raise HttpError(HTTPStatus.FORBIDDEN, f"Unerwarteter Host-Header: {headers.get('host', '')!r}")
+
+    @staticmethod
+    def _check_content_type(method: str, headers: dict):
+        # text/plain & Co. darf ein Browser ohne Preflight senden, application/json nicht
+        if method == "POST" and headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            raise HttpError(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "POST erwartet Content-Type: application/json.")
+
+    def _check_token(self, headers: dict):
+        if not self.token:
+            return
+        scheme, _, supplied = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(supplied.strip(), self.token):
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Token fehlt oder ist ungültig.")
+
+    async def _dispatch(self, method: str, target: str, body: bytes):
+        path = unquote(urlsplit(target).path).rstrip("/")
+        parts = path.split("/")[1:]
+        if not parts or parts[0] != "api":
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Unbekannter Pfad: {path or '/'}")
+        route = parts[1:]
+
+        if method == "GET" and route == ["health"]:
+            return {"ok": True}
+        if method == "GET" and route == ["methods"]:
+            return sorted(self.methods)
+        if route[:1] == ["jobs"] and len(route) <= 2:
+            if method == "GET" and len(route) == 1:
+                return await self._call("list_jobs", [], {})
+            if method == "GET":
+                job = await self._call("get_job", [route[1]], {})
+                if job is None:
+                    raise HttpError(HTTPStatus.NOT_FOUND, f"Job {route[1]} nicht gefunden.")
+                return job
+            if method == "DELETE" and len(route) == 2:
+                return await self._call("cancel_job", [route[1]], {})
+        if method == "POST" and len(route) == 1:
+            args, kwargs = self._parse_call(body)
+            return await self._call(route[0], args, kwargs)
+        raise HttpError(HTTPStatus.NOT_FOUND, f"Unbekannter Aufruf: {method} {path}")
+
+    @staticmethod
+    def _parse_call(body: bytes):
+        if not body.strip():
+            return [], {}
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Body ist kein gültiges JSON: {e}")
+        if isinstance(data, list):
+            return data, {}
+        if isinstance(data, dict) and isinstance(data.get("args", []), list) and isinstance(data.get("kwargs", {}), dict):
+            return data.get("args", []), data.get("kwargs", {})
+        raise HttpError(HTTPStatus.BAD_REQUEST, 'Erwartet {"args": [...], "kwargs": {...}} oder eine Liste.')
+
+    async def _call(self, name: str, args: list, kwargs: dict):
+        fn = self.methods.get(name)
+        if fn is None:
+            if name in EXCLUDED_METHODS:
+                raise HttpError(HTTPStatus.FORBIDDEN, f"{name} ist im Dienst-Modus gesperrt, bitte start_build verwenden.")
+            raise HttpError(HTTPStatus.NOT_FOUND, f"Unbekannte Methode: {name}")
+        try:
+            inspect.signature(fn).bind(*args, **kwargs)
+        except TypeError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Ungültige Parameter für {name}: {e}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: HTTPStatus, payload, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+def write_service_token(path: str) -> str:
+    """Erzeugt ein zufälliges Token und schreibt es nur für den Benutzer lesbar nach `path`."""
+    token = secrets.token_urlsafe(32)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    logger.info(f"Dienst-Token erzeugt: {path}")
+    return token
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.service", description="Genesis Exam Maker als HTTP/JSON-Dienst.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Adresse (Standard: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (Standard: {DEFAULT_PORT})")
+    parser.add_argument("--db", help="Pfad zur Datenbank (Standard: data/klausur.db)")
+    parser.add_argument("--build-workers", type=int, default=None, help="gleichzeitige Builds (Standard: 2)")
+    parser.add_argument("--request-workers", type=int, default=DEFAULT_REQUEST_WORKERS,
+                        help=f"Threads für Api-Aufrufe (Standard: {DEFAULT_REQUEST_WORKERS})")
+    parser.add_argument("--token", default=os.environ.get(SERVICE_TOKEN_ENV),
+                        help=f"verlangt 'Authorization: Bearer <token>' (Standard: ${SERVICE_TOKEN_ENV}, "
+                             f"sonst neu erzeugt und in {SERVICE_TOKEN_FILE} neben der Datenbank abgelegt)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from main import Api
+    from .jobs import DEFAULT_BUILD_WORKERS
+
+    build_workers = args.build_workers or DEFAULT_BUILD_WORKERS
+    logger.info(f"Build-Slots: {build_workers}")
+    api = Api(args.db, build_workers=build_workers)
+    token = args.token or write_service_token(os.path.join(os.path.dirname(os.path.abspath(api.db_path)), SERVICE_TOKEN_FILE))
+    service = ApiService(api, args.host, args.port, token=token, request_workers=args.request_workers)
+    try:
+        asyncio.run(service.serve())
+    except KeyboardInterrupt:
+        logger.info("Dienst beendet.")
+    finally:
+        service.close()
+        api._close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
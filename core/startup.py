@@ -0,0 +1,84 @@
+# core/startup.py
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTask:
+    """Ein Startschritt mit Gewicht für die Fortschrittsanzeige und den Schritten, auf die er wartet."""
+
+    def __init__(self, name: str, label: str, fn: Callable[[], object], weight: int = 1, deps: Iterable[str] = ()):
+        self.name = name
+        self.label = label
+        self.fn = fn
+        self.weight = weight
+        self.deps = tuple(deps)
+
+
+def run_task_graph(tasks: list, on_progress: Optional[Callable[[int, str], None]] = None,
+                   on_ready: Optional[Callable[[], None]] = None, ready_after: Iterable[str] = (),
+                   max_workers: Optional[int] = None,
+                   on_failed: Optional[Callable[[dict], None]] = None) -> dict:
+    """
+    Führt die Startschritte nebenläufig aus, jeweils sobald alle Abhängigkeiten fertig sind.
+    on_progress(prozent, meldung) wird bei Start und Ende jedes Schritts aufgerufen (Prozent nach Gewicht
+    der fertigen Schritte), on_ready() einmal, sobald alle Schritte aus ready_after erfolgreich fertig
+    sind – die übrigen laufen danach weiter. Ist einer davon fehlgeschlagen, wird stattdessen
+    on_failed({name: fehler}) aufgerufen. Ein fehlgeschlagener Schritt hält abhängige Schritte nicht auf.
+    Liefert {name: {"ok", "result", "error", "seconds"}}; blockiert, bis alle Schritte beendet sind.
+    """
+    by_name = {task.name: task for task in tasks}
+    unknown = {dep for task in tasks for dep in task.deps if dep not in by_name}
+    if unknown:
+        raise ValueError(f"Unbekannte Abhängigkeiten im Startablauf: {sorted(unknown)}")
+    ready_after = set(ready_after)
+    total_weight = sum(task.weight for task in tasks) or 1
+    results, pending, running = {}, dict(by_name), {}
+    done_weight = 0
+    ready_called = False
+
+    def notify(message: str):
+        if on_progress and not ready_called:
+            try:
+                on_progress(min(99, round(100 * done_weight / total_weight)), message)
+            except Exception as e:
+                logger.debug(f"on_progress Fehler: {e}")
+
+    def timed(task: StartupTask):
+        start = time.perf_counter()
+        try:
+            return {"ok": True, "result": task.fn(), "error": None, "seconds": time.perf_counter() - start}
+        except Exception as e:
+            logger.exception(f"Fehler beim Startschritt '{task.label}': {e}")
+            return {"ok": False, "result": None, "error": str(e), "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(tasks) or 1, thread_name_prefix="genesis-startup") as pool:
+        while pending or running:
+            for name, task in list(pending.items()):
+                if all(dep in results for dep in task.deps):
+                    del pending[name]
+                    notify(f"Starte: {task.label}")
+                    running[pool.submit(timed, task)] = task
+            if not running:
+                raise ValueError(f"Zyklische Abhängigkeiten im Startablauf: {sorted(pending)}")
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                task = running.pop(future)
+                results[task.name] = future.result()
+                done_weight += task.weight
+                state = "abgeschlossen" if results[task.name]["ok"] else f"Fehler — {results[task.name]['error']}"
+                logger.debug(f"Startschritt '{task.label}' nach {results[task.name]['seconds']:.3f}s {state}")
+                notify(f"{task.label}: {state}")
+            if not ready_called and ready_after <= results.keys():
+                ready_called = True
+                failed = {name: results[name]["error"] for name in ready_after if not results[name]["ok"]}
+                callback, args = (on_failed, (failed,)) if failed else (on_ready, ())
+                try:
+                    if callback:
+                        callback(*args)
+                except Exception as e:
+                    logger.exception(f"on_ready/on_failed Fehler: {e}")
+    return results
@@ -0,0 +1,145 @@
+# core/tools.py
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TOOL_CACHE_PATH = PROJECT_ROOT / "data" / "tool_cache.json"
+VERSION_TIMEOUT = 30
+_VERSION_NUMBER = re.compile(r"\d+(?:\.\d+)+")
+
+
+def _probe_version(path: str) -> str:
+    """Erste Zeile von `<tool> --version`; leer, wenn das Programm nicht antwortet."""
+    try:
+        result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=VERSION_TIMEOUT)
+        return result.stdout.splitlines()[0].strip() if result.returncode == 0 and result.stdout else ""
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+class ToolCache:
+    """
+    Pfade und Versionen externer Programme (pandoc, lualatex), über Programmstarts hinweg in
+    data/tool_cache.json gespeichert. Ein Eintrag gilt, solange Pfad, Größe und mtime der Binärdatei
+    (nach Auflösen von Symlinks) gleich bleiben; erst dann wird `<tool> --version` erneut gestartet.
+    Innerhalb eines Prozesses wird jedes Programm nur einmal geprüft.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self.cache_path = Path(cache_path) if cache_path else TOOL_CACHE_PATH
+        self._entries: Optional[dict] = None
+        self._checked: dict = {}
+        self._lock = threading.Lock()
+
+    def find(self, name: str, fallback: Optional[Callable[[], Optional[str]]] = None) -> Optional[dict]:
+        """
+        {"name", "path", "version", "version_line", "mtime_ns", "size"} oder None, wenn das Programm fehlt.
+        fallback() darf einen Pfad liefern, falls das Programm nicht im PATH liegt.
+        """
+        with self._lock:
+            if name in self._checked:
+                return self._checked[name]
+            entry = self._discover(name, fallback)
+            self._checked[name] = entry
+            return entry
+
+    def version(self, name: str, fallback: Optional[Callable[[], Optional[str]]] = None) -> str:
+        """Versionsnummer (z. B. "3.1.9"), leer, wenn das Programm fehlt."""
+        entry = self.find(name, fallback)
+        return entry["version"] if entry else ""
+
+    def _discover(self, name: str, fallback) -> Optional[dict]:
+        path = shutil.which(name)
+        if path is None and fallback is not None:
+            try:
+                path = fallback()
+            except Exception as e:
+                logger.debug(f"Suche nach {name} über Fallback fehlgeschlagen: {e}")
+        if not path:
+            logger.info(f"{name} nicht gefunden.")
+            return None
+        try:
+            stat = os.stat(os.path.realpath(path))
+        except OSError as e:
+            logger.info(f"{name} unter {path} nicht lesbar: {e}")
+            return None
+
+        entries = self._load()
+        cached = entries.get(name)
+        if cached and cached.get("path") == path and cached.get("mtime_ns") == stat.st_mtime_ns \
+                and cached.get("size") == stat.st_size:
+            logger.debug(f"{name}: {cached['version_line']} (aus dem Cache)")
+            return cached
+
+        version_line = _probe_version(path)
+        match = _VERSION_NUMBER.search(version_line)
+        entry = {"name": name, "path": path, "version": match.group(0) if match else version_line,
+                 "version_line": version_line, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+        logger.info(f"{name} gefunden: {path} ({version_line or 'Version unbekannt'})")
+        entries[name] = entry
+        self._save(entries)
+        return entry
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.cache_path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self, entries: dict):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            staging = self.cache_path.with_name(f".{self.cache_path.name}.{uuid.uuid4().hex}.part")
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(staging, self.cache_path)
+        except OSError as e:
+            logger.debug(f"Werkzeug-Cache konnte nicht gespeichert werden: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries, self._checked = {}, {}
+            try:
+                self.cache_path.unlink()
+            except OSError:
+                pass
+
+
+def _pypandoc_path() -> Optional[str]:
+    """pypandoc kennt zusätzlich mitgelieferte pandoc-Binaries (pypandoc_binary, ~/.local)."""
+    import pypandoc
+    return pypandoc.get_pandoc_path()
+
+
+def find_pandoc() -> Optional[dict]:
+    return get_tool_cache().find("pandoc", _pypandoc_path)
+
+
+def find_lualatex() -> Optional[dict]:
+    return get_tool_cache().find("lualatex")
+
+
+_default_tool_cache: Optional[ToolCache] = None
+_default_tool_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolCache:
+    """Prozessweiter Standard-Cache für gefundene Programme."""
+    global _default_tool_cache
+    with _default_tool_cache_lock:
+        if _default_tool_cache is None:
+            _default_tool_cache = ToolCache()
+        return _default_tool_cache
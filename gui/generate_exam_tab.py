@@ -6,7 +6,7 @@ import threading
 import queue
 import random
 from core.database_manager import DatabaseManager
-from core.latex_generator import generate_tex_file, compile_pdf_from_tex
+from core.latex_generator import generate_exam_pdf
 
 logger = logging.getLogger(__name__)
 
@@ -120,17 +120,13 @@ class GenerateExamTab(ttk.Frame):
 
             if not selected_tasks_content: raise ValueError("Es konnten keine Aufgaben ausgewählt werden.")
 
-            q.put((40, "Konvertiere Markdown zu LaTeX...", None))
+            q.put((40, "Konvertiere Markdown und kompiliere PDF mit LuaLaTeX...", None))
             output_filename = f"Klausur_{module_name.replace(' ', '_')}"
 
-            # Übergebe die Anzahl der Aufgaben für die Punktetabelle
-            tex_filepath, error = generate_tex_file(module_name, selected_tasks_content, output_filename)
-            if error: raise RuntimeError(error)
+            # eigenes temporäres Build-Verzeichnis, nur die fertige PDF landet in data/generated_exams
+            build_info = generate_exam_pdf(module_name, selected_tasks_content, output_filename)
 
-            q.put((70, "Kompiliere PDF mit LuaLaTeX...", None))
-            success, message = compile_pdf_from_tex(tex_filepath)
-
-            q.put(("DONE", "Fertig!", (success, message)))
+            q.put(("DONE", "Fertig!", (True, f"PDF '{build_info['path']}' erfolgreich erstellt!")))
         except Exception as e:
             logger.error(f"Fehler im Worker-Thread: {e}")
             q.put(("DONE", "Fehler!", (False, str(e))))
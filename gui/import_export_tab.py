@@ -94,18 +94,17 @@ class ImportExportTab(ttk.Frame):
         if not file_path: return
 
         def ask_on_conflict(task_content):
-            """Diese Funktion wird vom Importer aufgerufen, wenn ein Duplikat gefunden wird."""
-            # Einfacher Dialog als Beispiel. Kann erweitert werden.
-            # TRUE = skip, FALSE = cancel
+            """Wird vom Importer beim ersten Duplikat aufgerufen; die Antwort gilt für den ganzen Import."""
             user_choice = messagebox.askyesnocancel(
                 "Konflikt gefunden",
                 "Eine Aufgabe mit dem folgenden Inhalt existiert bereits:\n\n"
                 f"{task_content[:200]}...\n\n"
-                "Möchtest du diese Aufgabe überspringen (Ja) oder den gesamten Import abbrechen (Nein)?",
+                "Sollen alle Duplikate übersprungen (Ja) oder trotzdem importiert werden (Nein)?\n"
+                "Abbrechen bricht den gesamten Import ab.",
                 icon='warning'
             )
             if user_choice is None: return "cancel"
-            return "skip" if user_choice else "cancel"
+            return "skip" if user_choice else "keep"
 
         success, message = import_data(self.db_manager, file_path, ask_on_conflict)
         if success:
@@ -1,23 +1,29 @@
 # main.py
 import os
 import sys
+import html
+import json
 import time
-import shutil
-import subprocess
 import threading
 from pathlib import Path
 
-import webview
-import pypandoc
-
 import logging
 
-from core.database_manager import DatabaseManager
-from core.exam_builder import ExamBuilder
+from core.database_manager import DatabaseManager, SNIPPET_START, SNIPPET_END, DEFAULT_PAGE_SIZE
+from core.render_cache import RenderCache
+from core.build_cache import get_build_cache
+from core.changes import ChangeFeed
+from core.exam_manifest import find_manifests, manifest_paths_within
+from core.jobs import JobManager, JobQueueFull, DEFAULT_BUILD_WORKERS
+from core.startup import StartupTask, run_task_graph
+from core.tools import find_lualatex, find_pandoc
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 
+# how often the desktop app checks for writes from other processes (Tk GUI, CLI, imports)
+EXTERNAL_CHANGE_POLL_SECONDS = 1.0
+
 
 def get_default_db_path() -> str:
     """Sicheren absoluten Pfad zur Datenbank zurückgeben."""
@@ -30,32 +36,67 @@ def get_default_db_path() -> str:
 class Api:
     """
     API class that exposes Python functions to the JavaScript frontend.
-    Uses a db_path stored on the Api instance and opens short-lived DatabaseManager instances
-    for each call to avoid SQLite thread-safety issues.
+    Holds one shared DatabaseManager; calls borrow SQLite connections from its pool, so the
+    short-lived threads pywebview runs each JS call on don't pay connection setup every time.
+    Internal attributes are underscore-prefixed so pywebview doesn't expose them to JS.
     """
 
-    def __init__(self, db_path: str | None = None):
+    def __init__(self, db_path: str | None = None, build_workers: int = DEFAULT_BUILD_WORKERS,
+                 defer_setup: bool = False):
         self.db_path = db_path or get_default_db_path()
-        # try to ensure DB/tables exist (best-effort)
+        self._db = DatabaseManager(self.db_path)
+        # Markdown -> HTML cache (LRU in memory + render_cache table), keyed by content and pandoc version
+        self._render_cache = RenderCache(self._db)
+        # queued builds (start_build/get_job), shared by the desktop UI and the HTTP service
+        self._jobs = JobManager(max_workers=build_workers, on_update=self._push_job_update)
+        # data version + change events for modules/pools/tasks, so the UI patches rows instead of reloading
+        self._changes = ChangeFeed(on_change=self._push_change)
+        # desktop window, set in __main__; job updates and change events are pushed there via evaluate_js
+        self._window = None
+        # data_state counter seen last; writes by other processes/managers since then become a "reload" event
+        self._data_counter = None
+        self._data_counter_lock = threading.Lock()
+        self._stopping = threading.Event()
+        # filled by init_worker: per-step results and time-to-interactive of the desktop startup
+        self._startup_status = {}
+        # the desktop app defers this to init_worker so the window opens right away
+        if not defer_setup:
+            try:
+                self._setup_database()
+            except Exception:
+                # best-effort here: keep the object usable so callers (service) see structured errors
+                pass
+
+    def _setup_database(self):
+        """Ensures DB/tables exist; errors are logged and re-raised (the "db" startup step fails)."""
         try:
-            db = DatabaseManager(self.db_path)
-            db.setup_database()
-            db.close()
+            self._db.setup_database()
+            self._data_counter = self._db.track_own_writes()
             logger.info("Datenbank initialisiert unter %s", self.db_path)
         except Exception as e:
             logger.exception("Initialisierungsfehler beim Setup der Datenbank: %s", e)
-            # keep object available so frontend sees structured errors
+            raise
 
-    # --- helper to get a fresh db manager for each call ---
+    # --- helper returning the shared (connection-pooling) db manager ---
     def _get_db(self) -> DatabaseManager:
-        return DatabaseManager(self.db_path)
+        return self._db
+
+    def _exam_builder(self):
+        # imported on first build: pulls in the LaTeX pipeline, which the UI does not need at startup
+        from core.exam_builder import ExamBuilder
+        return ExamBuilder(self._get_db(), self._render_cache)
+
+    def _close(self):
+        """Cancels queued builds and closes all pooled DB connections (called on application exit)."""
+        self._stopping.set()
+        self._jobs.shutdown()
+        self._db.close()
 
     # --- READ helpers ---
     def get_modules(self):
         try:
             db = self._get_db()
             rows = db.get_modules()
-            db.close()
             return rows or []
         except Exception as e:
             logger.exception("get_modules Fehler: %s", e)
@@ -65,7 +106,6 @@ class Api:
         try:
             db = self._get_db()
             row = db.get_module_by_id(module_id)
-            db.close()
             return row
         except Exception as e:
             logger.exception("get_module_by_id Fehler: %s", e)
@@ -75,50 +115,93 @@ class Api:
         try:
             db = self._get_db()
             rows = db.get_pools_for_module(module_id)
-            db.close()
             return rows or []
         except Exception as e:
             logger.exception("get_pools_for_module Fehler: %s", e)
             return []
 
+    def get_module_tree(self, module_id, with_content: bool = False):
+        """Module -> pools -> tasks in one round trip; tasks are ids unless with_content is set."""
+        try:
+            db = self._get_db()
+            tree = db.get_module_tree(module_id, with_content=bool(with_content))
+            if tree and with_content:
+                for pool in tree["pools"]:
+                    pool["tasks"] = [{"id": task_id, "raw_md": raw_md} for task_id, raw_md in pool["tasks"]]
+            return tree
+        except Exception as e:
+            logger.exception("get_module_tree Fehler: %s", e)
+            return None
+
     def get_pool_with_module_info(self, pool_id):
         try:
             db = self._get_db()
             row = db.get_pool_with_module_info(pool_id)
-            db.close()
             return row
         except Exception as e:
             logger.exception("get_pool_with_module_info Fehler: %s", e)
             return None
 
+    def get_task_page(self, pool_id, after_id=0, limit=DEFAULT_PAGE_SIZE):
+        """
+        One page of a pool's tasks (keyset cursor on id). Only the tasks of this page are loaded
+        with full content and rendered to HTML.
+        Returns {"tasks": [{"id", "first_line", "length", "raw_md", "html"}], "next_after_id", "total"}.
+        """
+        try:
+            db = self._get_db()
+            pool_id = int(pool_id)
+            page = db.get_task_page(pool_id, int(after_id or 0), int(limit), with_content=True)
+            items = page["items"]
+            results = self._render_cache.render_many([(task_id, raw_md) for task_id, _, _, raw_md in items], "html5")
+            tasks = []
+            for (task_id, first_line, length, raw_md), (html_content, error) in zip(items, results):
+                if error:
+                    logger.warning("Rendering von Aufgabe %s fehlgeschlagen: %s", task_id, error)
+                    html_content = "<p><em>Error rendering Markdown. Is Pandoc installed?</em></p>"
+                tasks.append({"id": task_id, "first_line": first_line, "length": length,
+                              "raw_md": raw_md, "html": html_content})
+            # the total is only needed for the first page
+            total = db.count_tasks_in_pool(pool_id) if not after_id else None
+            return {"tasks": tasks, "next_after_id": page["next_after_id"], "total": total}
+        except Exception as e:
+            logger.exception("get_task_page Fehler: %s", e)
+            return {"tasks": [], "next_after_id": None, "total": 0}
+
     def get_tasks_from_pool(self, pool_id):
         try:
             db = self._get_db()
             tasks_from_db = db.get_tasks_from_pool(pool_id)
-            db.close()
-            processed_tasks = []
-            for task_id, raw_md in tasks_from_db:
-                try:
-                    html_content = pypandoc.convert_text(raw_md, "html5", format="md")
-                    processed_tasks.append({"id": task_id, "raw_md": raw_md, "html": html_content})
-                except OSError:
-                    error_html = "<p><em>Error rendering Markdown. Is Pandoc installed?</em></p>"
-                    processed_tasks.append({"id": task_id, "raw_md": raw_md, "html": error_html})
+            # cache misses are rendered with a single pandoc process
+            results = self._render_cache.render_many(tasks_from_db, "html5")
+            rendered = {}
+            for (task_id, raw_md), (html_content, error) in zip(tasks_from_db, results):
+                if error:
+                    logger.warning("Rendering von Aufgabe %s fehlgeschlagen: %s", task_id, error)
+                    html_content = "<p><em>Error rendering Markdown. Is Pandoc installed?</em></p>"
+                rendered[task_id] = html_content
+            processed_tasks = [
+                {"id": task_id, "raw_md": raw_md, "html": rendered[task_id]}
+                for task_id, raw_md in tasks_from_db
+            ]
             return processed_tasks
         except Exception as e:
             logger.exception("get_tasks_from_pool Fehler: %s", e)
             return []
 
     # --- MUTATE helpers (return dicts for JS) ---
+    # Every successful mutation publishes a change event (pushed to window.onDataChange) and
+    # returns the resulting data "version"; see get_changes.
     def add_module(self, module_name: str):
         try:
             if not module_name or not str(module_name).strip():
                 return {"success": False, "message": "Module name cannot be empty."}
             db = self._get_db()
             last_id = db.add_module(module_name)
-            db.close()
             if last_id:
-                return {"success": True, "message": f"Module '{module_name}' added.", "id": last_id}
+                event = self._changes.publish("module", last_id, "add", name=module_name)
+                return {"success": True, "message": f"Module '{module_name}' added.", "id": last_id,
+                        "version": event["version"]}
             return {"success": False, "message": f"Module '{module_name}' already exists."}
         except Exception as e:
             logger.exception("add_module Fehler: %s", e)
@@ -130,9 +213,10 @@ class Api:
                 return {"success": False, "message": "Pool name cannot be empty."}
             db = self._get_db()
             last_id = db.add_pool(pool_name, module_id)
-            db.close()
             if last_id:
-                return {"success": True, "message": f"Pool '{pool_name}' added.", "id": last_id}
+                event = self._changes.publish("pool", last_id, "add", name=pool_name, module_id=int(module_id))
+                return {"success": True, "message": f"Pool '{pool_name}' added.", "id": last_id,
+                        "version": event["version"]}
             return {"success": False, "message": "Could not add pool."}
         except Exception as e:
             logger.exception("add_pool Fehler: %s", e)
@@ -144,9 +228,11 @@ class Api:
                 return {"success": False, "message": "Task content cannot be empty."}
             db = self._get_db()
             last_id = db.add_task(task_content, pool_id)
-            db.close()
             if last_id:
-                return {"success": True, "message": "New task added.", "id": last_id}
+                pool = db.get_pool_with_module_info(pool_id)
+                event = self._changes.publish("task", last_id, "add", pool_id=int(pool_id),
+                                              module_id=pool[2] if pool else None, raw_md=task_content)
+                return {"success": True, "message": "New task added.", "id": last_id, "version": event["version"]}
             return {"success": False, "message": "Could not add task."}
         except Exception as e:
             logger.exception("add_task Fehler: %s", e)
@@ -155,9 +241,10 @@ class Api:
     def delete_module(self, module_id: int):
         try:
             db = self._get_db()
-            res = db.delete_module(module_id)
-            db.close()
-            return {"success": True, "message": f"Module {module_id} deleted."}
+            if not db.delete_module(module_id):
+                return {"success": False, "message": f"Module {module_id} could not be deleted."}
+            event = self._changes.publish("module", int(module_id), "delete")
+            return {"success": True, "message": f"Module {module_id} deleted.", "version": event["version"]}
         except Exception as e:
             logger.exception("delete_module Fehler: %s", e)
             return {"success": False, "message": str(e)}
@@ -165,9 +252,14 @@ class Api:
     def delete_pool(self, pool_id: int):
         try:
             db = self._get_db()
-            res = db.delete_pool(pool_id)
-            db.close()
-            return {"success": True, "message": f"Pool {pool_id} deleted."}
+            # looked up first: the event tells the UI which module's counters to patch
+            pool = db.get_pool_with_module_info(pool_id)
+            task_count = db.count_tasks_in_pool(pool_id)
+            if not db.delete_pool(pool_id):
+                return {"success": False, "message": f"Pool {pool_id} could not be deleted."}
+            event = self._changes.publish("pool", int(pool_id), "delete", module_id=pool[2] if pool else None,
+                                          task_count=task_count)
+            return {"success": True, "message": f"Pool {pool_id} deleted.", "version": event["version"]}
         except Exception as e:
             logger.exception("delete_pool Fehler: %s", e)
             return {"success": False, "message": str(e)}
@@ -175,9 +267,15 @@ class Api:
     def delete_task(self, task_id: int):
         try:
             db = self._get_db()
-            res = db.delete_task(task_id)
-            db.close()
-            return {"success": True, "message": f"Task {task_id} deleted."}
+            # looked up first: the event tells the UI which pool and module to patch
+            location = db.get_task_location(task_id)
+            if location is None:
+                return {"success": False, "message": f"Task {task_id} not found."}
+            if not db.delete_task(task_id):
+                return {"success": False, "message": f"Task {task_id} could not be deleted."}
+            self._render_cache.invalidate_task(task_id)
+            event = self._changes.publish("task", int(task_id), "delete", pool_id=location[0], module_id=location[1])
+            return {"success": True, "message": f"Task {task_id} deleted.", "version": event["version"]}
         except Exception as e:
             logger.exception("delete_task Fehler: %s", e)
             return {"success": False, "message": str(e)}
@@ -185,34 +283,302 @@ class Api:
     def update_task(self, task_id: int, new_content: str):
         try:
             db = self._get_db()
-            db.update_task(task_id, new_content)
-            db.close()
-            return {"success": True, "message": "Aufgabe aktualisiert."}
+            location = db.get_task_location(task_id)
+            if location is None:
+                return {"success": False, "message": f"Aufgabe {task_id} nicht gefunden."}
+            if not db.update_task(task_id, new_content):
+                return {"success": False, "message": "Aufgabe konnte nicht aktualisiert werden."}
+            self._render_cache.invalidate_task(task_id)
+            event = self._changes.publish("task", int(task_id), "update", pool_id=location[0],
+                                          module_id=location[1], raw_md=new_content)
+            return {"success": True, "message": "Aufgabe aktualisiert.", "version": event["version"]}
         except Exception as e:
             logger.exception("update_task Fehler: %s", e)
             return {"success": False, "message": str(e)}
 
+    # --- Change events (data version) ---
+    def get_data_version(self):
+        """Current data version; read it before a full load, then apply change events newer than it."""
+        self._check_external_changes()
+        return {"version": self._changes.version}
+
+    def get_changes(self, since_version=0):
+        """
+        Change events after `since_version`: {"version", "changes", "complete"}.
+        Used to fill gaps in the pushed events (and for polling in service mode);
+        if complete is False the caller must reload everything.
+        """
+        try:
+            self._check_external_changes()
+            return self._changes.since(int(since_version or 0))
+        except Exception as e:
+            logger.exception("get_changes Fehler: %s", e)
+            return {"version": self._changes.version, "changes": [], "complete": False}
+
+    def _check_external_changes(self):
+        """
+        Publishes a ("data", 0, "reload") event when modules, pools, tasks or exam plans were written
+        since the last check by anyone but this Api: the Tk GUI, the CLI, import_data or another process.
+        Those writes have no row-level events, so clients reload completely.
+        """
+        with self._data_counter_lock:
+            if self._data_counter is None:
+                self._data_counter = self._get_db().track_own_writes()
+                return
+            counter, external = self._get_db().data_changes_since(self._data_counter)
+            if counter is not None:
+                self._data_counter = counter
+        if external:
+            logger.info("Daten wurden außerhalb der Oberfläche geändert, Clients laden neu.")
+            self._changes.publish("data", 0, "reload")
+
+    def _start_change_watcher(self) -> bool:
+        """Startup step after "db": starts _watch_external_changes once the data_state table exists."""
+        if self._data_counter is None:
+            logger.warning("Datenbank nicht bereit, Änderungen anderer Programme werden nicht beobachtet.")
+            return False
+        threading.Thread(target=self._watch_external_changes, daemon=True, name="genesis-change-watcher").start()
+        return True
+
+    def _watch_external_changes(self, interval: float = EXTERNAL_CHANGE_POLL_SECONDS):
+        """Desktop: polls for external writes so the window is told without waiting for its next get_changes."""
+        while not self._stopping.wait(interval):
+            try:
+                self._check_external_changes()
+            except Exception as e:
+                logger.debug("Prüfung auf externe Änderungen fehlgeschlagen: %s", e)
+
+    # --- Exam plan (pools in order, tasks to draw per pool, weight) ---
+    def get_exam_plan(self, module_id):
+        try:
+            plan = self._get_db().get_exam_plan(int(module_id), with_content=False)
+            if plan:
+                plan.pop("tasks_by_pool", None)
+            return plan
+        except Exception as e:
+            logger.exception("get_exam_plan Fehler: %s", e)
+            return None
+
+    def save_exam_plan(self, module_id, items):
+        """items: [{"pool_id", "draw_count", "weight"}, ...] in exam order."""
+        try:
+            plan_items = [(int(i["pool_id"]), int(i.get("draw_count") or 1), float(i.get("weight") or 1))
+                          for i in items]
+            ok = self._get_db().save_exam_plan(int(module_id), plan_items)
+            if not ok:
+                return {"success": False, "message": "Klausurplan konnte nicht gespeichert werden."}
+            event = self._changes.publish("exam_plan", int(module_id), "update")
+            return {"success": True, "message": "Klausurplan gespeichert.", "version": event["version"]}
+        except Exception as e:
+            logger.exception("save_exam_plan Fehler: %s", e)
+            return {"success": False, "message": str(e)}
+
+    # --- Full-text search ---
+    def search_tasks(self, query: str, module_id=None, limit: int = 20, offset: int = 0):
+        """
+        Ranked full-text search over all tasks (or one module).
+        Returns [{"task_id", "pool_id", "pool_name", "module_id", "module_name", "snippet_html", "rank", "ranked_all"}, ...];
+        ranked_all is False when a very broad query was ranked among its most recent matches only;
+        snippet_html is escaped, matches are wrapped in <mark>.
+        """
+        try:
+            db = self._get_db()
+            hits = db.search_tasks(query, module_id=int(module_id) if module_id else None,
+                                   limit=int(limit), offset=int(offset))
+            for hit in hits:
+                hit["snippet_html"] = (html.escape(hit.pop("snippet"))
+                                       .replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>"))
+            return hits
+        except Exception as e:
+            logger.exception("search_tasks Fehler: %s", e)
+            return []
+
+    def rebuild_search_index(self):
+        try:
+            ok = self._get_db().rebuild_search_index()
+            return {"success": ok, "message": "Suchindex neu aufgebaut." if ok else "Suchindex konnte nicht neu aufgebaut werden."}
+        except Exception as e:
+            logger.exception("rebuild_search_index Fehler: %s", e)
+            return {"success": False, "message": str(e)}
+
     # --- Exam generation wrapper ---
-    def build_exam_for_module(self, module_id: int, filename: str = ""):
+    def build_exam_for_module(self, module_id: int, filename: str = "", seed=None):
         """
         Wrapper that uses ExamBuilder to generate the exam PDF.
+        Passing the `seed` of an earlier build reproduces its task selection.
         Returns a dict suitable for JS consumption.
         """
         try:
-            db = self._get_db()
-            builder = ExamBuilder(db)  # ExamBuilder should accept a DatabaseManager instance
-            # builder may use db and close it itself or not; to be safe we do not close db until after build
-            pdf_path = builder.build_exam_for_module(module_id, filename=filename or None)
-            # ensure closing DB after builder finished
-            try:
-                db.close()
-            except Exception:
-                pass
-            return {"success": True, "path": pdf_path}
+            builder = self._exam_builder()
+            success, result = builder.build_exam_for_module(module_id, filename=filename or None,
+                                                            seed=_parse_seed(seed))
+            if not success:
+                return {"success": False, "message": result}
+            return {"success": True, "path": result["path"], "cached": result.get("cached", False),
+                    "passes": result.get("passes"), "pass_times": result.get("pass_times"),
+                    "seed": result.get("seed"), "manifest": result.get("manifest"),
+                    "cache": get_build_cache().stats()}
         except Exception as e:
             logger.exception("build_exam_for_module Fehler: %s", e)
             return {"success": False, "message": str(e)}
 
+    def build_exam_variants(self, module_id: int, count: int, seed=None, filename: str = ""):
+        """
+        Builds `count` non-overlapping variants (A, B, C, ...) of the module's exam in parallel.
+        Returns {"success", "variants": [{"variant", "success", "path"|"message"}, ...]}.
+        """
+        try:
+            builder = self._exam_builder()
+            success, result = builder.build_exam_variants(int(module_id), int(count), seed=_parse_seed(seed),
+                                                          filename=filename or None)
+            if not success:
+                return {"success": False, "message": result}
+            return {"success": all(v["success"] for v in result), "variants": result,
+                    "cache": get_build_cache().stats()}
+        except Exception as e:
+            logger.exception("build_exam_variants Fehler: %s", e)
+            return {"success": False, "message": str(e)}
+
+    def list_exam_manifests(self, module_id=None):
+        """Manifests of earlier builds in the output folder (newest first), optionally for one module."""
+        try:
+            from core.latex_generator import GENERATED_EXAMS_DIR
+            return find_manifests(GENERATED_EXAMS_DIR, int(module_id) if module_id not in (None, "") else None)
+        except Exception as e:
+            logger.exception("list_exam_manifests Fehler: %s", e)
+            return []
+
+    def rebuild_exams(self, manifest_paths, only_changed: bool = True):
+        """
+        Rebuilds exams from their manifests with the recorded tasks (no new draw).
+        With only_changed, exams whose tasks are unchanged are skipped.
+        Returns {"success", "results": [{"manifest", "variant", "status", ...}, ...]}.
+        """
+        try:
+            if isinstance(manifest_paths, str):
+                manifest_paths = [manifest_paths]
+            manifest_paths = _output_manifest_paths(manifest_paths)
+            builder = self._exam_builder()
+            success, results = builder.rebuild_from_manifests(manifest_paths, only_changed=bool(only_changed))
+            return {"success": success and all(r["success"] for r in results), "results": results,
+                    "cache": get_build_cache().stats()}
+        except Exception as e:
+            logger.exception("rebuild_exams Fehler: %s", e)
+            return {"success": False, "message": str(e)}
+
+    # --- Build jobs (queued; polled by the caller or pushed to the desktop window) ---
+    def start_build(self, kind: str, params=None):
+        """
+        Queues a build and returns immediately with {"success", "job_id"}; poll get_job(job_id) for status.
+        In the desktop app every status change and stage (select, convert, compile pass N) is also
+        pushed to window.onJobUpdate(job) with the latest event in job.event.
+        kind "exam": {module_id, filename?, seed?}, "variants": {module_id, count, seed?, filename?},
+        "rebuild": {manifest_paths, only_changed?}.
+        """
+        params = dict(params or {})
+        try:
+            job = self._jobs.submit(kind, self._build_job_fn(kind, params), params)
+            return {"success": True, "job_id": job.id, "status": job.status}
+        except (ValueError, JobQueueFull) as e:
+            return {"success": False, "message": str(e)}
+        except KeyError as e:
+            return {"success": False, "message": f"Fehlender Parameter: {e}"}
+        except Exception as e:
+            logger.exception("start_build Fehler: %s", e)
+            return {"success": False, "message": str(e)}
+
+    def get_job(self, job_id: str):
+        """Status, progress events and (when finished) result of a queued build."""
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list_jobs(self):
+        """All known builds, newest first (without progress events)."""
+        return [job.to_dict(with_progress=False) for job in self._jobs.list()]
+
+    def cancel_job(self, job_id: str):
+        """Cancels a build; a running build stops its lualatex processes and ends as "cancelled"."""
+        return {"success": self._jobs.cancel(job_id)}
+
+    def _build_job_fn(self, kind: str, params: dict):
+        """Job function for start_build; raises ValueError for unknown kinds or missing parameters."""
+        if kind == "exam":
+            module_id = int(params["module_id"])
+
+            def run(job):
+                success, result = self._exam_builder().build_exam_for_module(
+                    module_id, filename=params.get("filename") or None, seed=_parse_seed(params.get("seed")),
+                    on_progress=job.report, cancel_event=job.cancel_event)
+                if not success:
+                    raise RuntimeError(result)
+                return result
+        elif kind == "variants":
+            module_id, count = int(params["module_id"]), int(params.get("count", 1))
+
+            def run(job):
+                success, result = self._exam_builder().build_exam_variants(
+                    module_id, count, seed=_parse_seed(params.get("seed")),
+                    filename=params.get("filename") or None, on_progress=job.report, cancel_event=job.cancel_event)
+                if not success:
+                    raise RuntimeError(result)
+                return {"success": all(v["success"] for v in result), "variants": result}
+        elif kind == "rebuild":
+            manifest_paths = params["manifest_paths"]
+            manifest_paths = _output_manifest_paths([manifest_paths] if isinstance(manifest_paths, str)
+                                                    else list(manifest_paths))
+
+            def run(job):
+                _, results = self._exam_builder().rebuild_from_manifests(
+                    manifest_paths, only_changed=bool(params.get("only_changed", True)), on_progress=job.report,
+                    cancel_event=job.cancel_event)
+                return {"success": all(r["success"] for r in results), "results": results}
+        else:
+            raise ValueError(f"Unbekannter Build-Typ: {kind}")
+        return run
+
+    def _push_to_window(self, handler: str, payload):
+        """Calls window.<handler>(payload) in the desktop window, if the page defines it (no-op in service mode)."""
+        window = self._window
+        if window is None:
+            return
+        try:
+            window.evaluate_js(f"window.{handler} && window.{handler}({json.dumps(payload, default=str)})")
+        except Exception as e:
+            logger.debug("%s konnte nicht an das Fenster gesendet werden: %s", handler, e)
+
+    def _push_job_update(self, job, event):
+        self._push_to_window("onJobUpdate", {**job.to_dict(with_progress=False), "event": event})
+
+    def _push_change(self, event):
+        self._push_to_window("onDataChange", event)
+
+    def get_startup_status(self):
+        """Results of the startup steps (tool probes keep running after the UI is shown)."""
+        return self._startup_status
+
+    def get_build_cache_stats(self):
+        """Hit/miss counters (this process) and size of the PDF build cache."""
+        try:
+            return get_build_cache().stats()
+        except Exception as e:
+            logger.exception("get_build_cache_stats Fehler: %s", e)
+            return {}
+
+
+def _output_manifest_paths(manifest_paths) -> list:
+    """Manifest paths from JS/HTTP callers; raises ValueError for anything outside the output folder."""
+    from core.latex_generator import GENERATED_EXAMS_DIR
+    return manifest_paths_within(manifest_paths, GENERATED_EXAMS_DIR)
+
+
+def _parse_seed(seed):
+    """Seeds from JS arrive as number or string; numeric strings become ints, "" means no seed."""
+    if seed is None or seed == "":
+        return None
+    if isinstance(seed, str) and seed.strip().lstrip("-").isdigit():
+        return int(seed.strip())
+    return seed
+
 
 # --- Initialization worker / helpers (UI loading splash) --- #
 def escape_js(s: str) -> str:
@@ -220,92 +586,66 @@ def escape_js(s: str) -> str:
 
 
 def check_pandoc() -> bool:
-    if shutil.which("pandoc"):
-        try:
-            r = subprocess.run(["pandoc", "--version"], capture_output=True, text=True, timeout=3)
-            return r.returncode == 0
-        except Exception:
-            return False
-    else:
-        try:
-            import pypandoc as _p
-            _p.get_pandoc_path()
-            try:
-                _p.convert_text("hello", "html5", format="md")
-            except Exception:
-                pass
-            return True
-        except Exception:
-            return False
+    """pandoc present? Path and version come from the on-disk tool cache (core.tools), no test conversion."""
+    return find_pandoc() is not None
 
 
-def warmup_latex() -> bool:
-    if shutil.which("pdflatex"):
-        try:
-            subprocess.run(["pdflatex", "--version"], capture_output=True, timeout=3)
-            return True
-        except Exception:
-            return False
-    return False
+def check_lualatex() -> bool:
+    """lualatex (the engine the exams are compiled with) present? Uses the on-disk tool cache."""
+    return find_lualatex() is not None
+
 
+def warmup_latex(window, api: Api) -> bool:
+    """
+    Background LaTeX warm-up (core.latex_warmup): builds the preamble format and the luaotfload font
+    cache once, so the first exam build doesn't pay for it. Progress goes to whichever page is shown
+    (loading page or index) and to Api.get_startup_status()["latex_warmup"].
+    """
+    from core.latex_warmup import warm_up_latex
 
-def startup_workers(api: Api):
-    def preload():
+    def report(percent, message):
+        api._startup_status["latex_warmup"] = {"percent": percent, "message": message, "done": percent >= 100}
         try:
-            # use api methods (they open their own DB connections)
-            api.get_modules()
-        except Exception as e:
-            logger.exception("Preload-Fehler: %s", e)
-    t = threading.Thread(target=preload, daemon=True)
-    t.start()
-    return True
+            window.evaluate_js(f"window.setWarmupProgress && window.setWarmupProgress({percent}, '{escape_js(message)}')")
+        except Exception:
+            logger.debug("Konnte Aufwärm-Fortschritt nicht per evaluate_js senden.")
+
+    result = warm_up_latex(on_progress=report)
+    api._startup_status["latex_warmup"]["status"] = result["status"]
+    return result["status"] != "failed"
 
 
-def init_worker(window: webview.Window, api: Api):
+def init_worker(window: "webview.Window", api: Api):
     """
-    Sequential startup steps reported to the web UI via window.evaluate_js.
-    Uses short-lived DB connections (no long-lived db on Api required).
+    Startup as a dependency-aware task graph (core.startup): DB setup, tool probes and the module
+    preload run concurrently, progress goes to the loading page via window.evaluate_js.
+    The UI is loaded as soon as the DB steps are done; the probes and the LaTeX warm-up finish in
+    the background and their results are available through Api.get_startup_status().
+    If a DB step fails, the loading page shows the error and the UI is not loaded.
     """
-    steps = [
-        ("DB: Tabellen prüfen & anlegen", 10, lambda: DatabaseManager(get_default_db_path()).setup_database()),
-        ("Datenbank: Module laden", 20, lambda: api.get_modules()),
-        ("Pandoc/PDF prüfen", 25, lambda: check_pandoc()),
-        ("LaTeX-Engine warm starten", 20, lambda: warmup_latex()),
-        ("Plugins & Worker starten", 20, lambda: startup_workers(api)),
-        ("Fertig - UI wird geladen", 5, lambda: None),
+    started = time.perf_counter()
+    tasks = [
+        StartupTask("db", "DB: Tabellen prüfen & anlegen", api._setup_database, weight=30),
+        StartupTask("modules", "Datenbank: Module laden", api.get_modules, weight=20, deps=("db",)),
+        StartupTask("changes", "Änderungen anderer Programme beobachten", api._start_change_watcher,
+                    weight=0, deps=("db",)),
+        StartupTask("pandoc", "Pandoc/PDF prüfen", check_pandoc, weight=25),
+        StartupTask("latex", "LaTeX-Engine prüfen", check_lualatex, weight=25),
+        StartupTask("latex_warmup", "LaTeX-Caches vorbereiten", lambda: warmup_latex(window, api),
+                    weight=0, deps=("latex",)),
     ]
 
-    progress = 0
-    try:
-        for name, weight, fn in steps:
-            try:
-                window.evaluate_js(f"window.setProgress({progress}, 'Starte: {escape_js(name)}')")
-            except Exception:
-                # if evaluate_js fails (window not ready), just continue; UI will poll later
-                logger.debug("Konnte progress nicht per evaluate_js senden (Window noch nicht bereit).")
-            # execute
-            try:
-                fn()
-            except Exception as e:
-                try:
-                    window.evaluate_js(f"window.setProgress({progress}, 'Fehler: {escape_js(name)} — {escape_js(str(e))}')")
-                except Exception:
-                    pass
-                logger.exception("Fehler beim Step '%s': %s", name, e)
-            progress += weight
-            if progress > 99:
-                progress = 99
-            try:
-                window.evaluate_js(f"window.setProgress({progress}, '... {escape_js(name)} abgeschlossen')")
-            except Exception:
-                pass
-            time.sleep(0.25)
-    finally:
+    def report(percent, message):
         try:
-            window.evaluate_js("window.setProgress(100, 'Fertig. Öffne Anwendung...')")
+            window.evaluate_js(f"window.setProgress({percent}, '{escape_js(message)}')")
         except Exception:
-            pass
-        time.sleep(0.25)
+            # if evaluate_js fails (window not ready), just continue; UI will poll later
+            logger.debug("Konnte progress nicht per evaluate_js senden (Window noch nicht bereit).")
+
+    def show_ui():
+        api._startup_status["tti"] = round(time.perf_counter() - started, 3)
+        logger.info("Startup: UI nach %.3f s bereit", api._startup_status["tti"])
+        report(100, "Fertig. Öffne Anwendung...")
         index_path = (Path(__file__).resolve().parent / "web" / "templates" / "index.html").resolve().as_uri()
         try:
             window.load_url(index_path)
@@ -316,17 +656,40 @@ def init_worker(window: webview.Window, api: Api):
             except Exception:
                 logger.exception("Konnte Index nicht laden.")
 
+    def show_failure(failed):
+        api._startup_status["failed"] = failed
+        labels = {task.name: task.label for task in tasks}
+        message = "; ".join(f"{labels[name]} — {error}" for name, error in failed.items())
+        logger.error("Startup: Anwendung kann nicht geöffnet werden: %s", message)
+        report(100, f"Fehler: {message}")
+
+    results = run_task_graph(tasks, report, show_ui, ready_after=("db", "modules"), on_failed=show_failure)
+    api._startup_status["steps"] = {
+        name: {"ok": r["ok"] and r["result"] is not False, "error": r["error"], "seconds": round(r["seconds"], 3)}
+        for name, r in results.items()}
+    api._startup_status["total"] = round(time.perf_counter() - started, 3)
+    logger.info("Startup abgeschlossen nach %.3f s: %s", api._startup_status["total"],
+                ", ".join(f"{name}={'ok' if r['ok'] else 'fehlgeschlagen'}"
+                          for name, r in api._startup_status["steps"].items()))
+
 
 if __name__ == "__main__":
-    api = Api()
+    # only the desktop app needs pywebview; the service mode (core.service) imports Api without it
+    import webview
+
+    api = Api(defer_setup=True)
     base = Path(__file__).resolve().parent
     loading_path = (base / "web" / "templates" / "loading.html").resolve().as_uri()
     # create window with loading page, then init_worker will swap to index.html
     window = webview.create_window("Genesis Exam Maker", loading_path, js_api=api, width=1000, height=700)
+    api._window = window
 
     # start init worker in background
     t = threading.Thread(target=init_worker, args=(window, api), daemon=True)
     t.start()
 
     # start webview loop
-    webview.start(debug=False)
+    try:
+        webview.start(debug=False)
+    finally:
+        api._close()
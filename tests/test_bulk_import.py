@@ -0,0 +1,59 @@
+# tests/test_bulk_import.py
+import sqlite3
+
+import pytest
+
+from core.database_manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "a.db"))
+    db.setup_database()
+    db.bulk_import("Analysis", [("Integrale", ["## A1", "## A2"])], on_conflict="keep")
+    yield db
+    db.close()
+
+
+def _pools():
+    # Generator wie beim Streaming-Import aus einer Datei
+    yield "Integrale", (task for task in ["## A2", "## A3"])
+    yield "Reihen", (task for task in ["## R1", "## R1"])
+
+
+def _task_count(db):
+    with db._connection() as (conn, cur):
+        return cur.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+def test_conflict_question_does_not_hold_the_write_lock(db):
+    asked = []
+
+    def on_conflict(content_md):
+        # ein anderes Programm muss währenddessen schreiben können
+        other = sqlite3.connect(db.db_path, timeout=0)
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+        other.close()
+        asked.append(content_md)
+        return "skip"
+
+    stats = db.bulk_import("Analysis", _pools(), on_conflict)
+    assert asked == ["## A2"]
+    assert stats["tasks_added"] == 2 and stats["tasks_skipped"] == 2
+    assert stats["last_task_id_after"] - stats["last_task_id_before"] == 2
+
+
+def test_cancel_writes_nothing(db):
+    with pytest.raises(InterruptedError):
+        db.bulk_import("Analysis", _pools(), lambda content_md: "cancel")
+    assert _task_count(db) == 2
+    assert len(db.get_pools_for_module(db.get_modules()[0][0])) == 1
+
+
+def test_no_question_without_duplicates(db):
+    def on_conflict(content_md):
+        raise AssertionError("keine Rückfrage erwartet")
+
+    stats = db.bulk_import("Analysis", [("Integrale", ["## A3"]), ("Reihen", ["## R1"])], on_conflict)
+    assert stats["tasks_added"] == 2 and stats["pools_created"] == 1
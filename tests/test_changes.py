@@ -0,0 +1,62 @@
+# tests/test_changes.py
+import pytest
+
+import main
+from core import database_manager
+from core.database_manager import DatabaseManager
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = main.Api(str(tmp_path / "a.db"))
+    yield api
+    api._close()
+
+
+def test_missing_task_is_an_error_without_event(api):
+    version = api.get_data_version()["version"]
+    assert api.delete_task(999)["success"] is False
+    assert api.update_task(999, "neu")["success"] is False
+    assert api.get_changes(version) == {"version": version, "changes": [], "complete": True}
+
+
+def test_external_write_becomes_reload_event(api):
+    module_id = api.add_module("Mathe")["id"]
+    version = api.get_data_version()["version"]
+    DatabaseManager(api.db_path).add_pool("von außen", module_id)
+    api.add_pool("von der Api", module_id)
+    changes = api.get_changes(version)
+    assert [(c["entity"], c["op"]) for c in changes["changes"]] == [("pool", "add"), ("data", "reload")]
+    assert changes["complete"] is False
+
+
+def test_own_writes_alone_need_no_reload(api):
+    module_id = api.add_module("Mathe")["id"]
+    version = api.get_data_version()["version"]
+    api.add_pool("A", module_id)
+    api.add_pool("B", module_id)
+    assert api.get_changes(version)["complete"] is True
+
+
+def test_untracked_manager_keeps_no_write_history(tmp_path):
+    db = DatabaseManager(str(tmp_path / "a.db"))
+    db.setup_database()
+    for i in range(20):
+        db.add_module(f"Modul {i}")
+    assert db._own_writes == set()
+    db.close()
+
+
+def test_tracked_writes_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(database_manager, "MAX_TRACKED_WRITES", 5)
+    db = DatabaseManager(str(tmp_path / "a.db"))
+    db.setup_database()
+    start = db.track_own_writes()
+    for i in range(20):
+        db.add_module(f"Modul {i}")
+    assert len(db._own_writes) <= 5
+    # Stände gingen verloren: lieber einmal zu viel neu laden als eine fremde Änderung verpassen
+    assert db.data_changes_since(start) == (start + 20, True)
+    db.add_module("danach")
+    assert db.data_changes_since(start + 20) == (start + 21, False)
+    db.close()
@@ -0,0 +1,73 @@
+# tests/test_database_pool.py
+import threading
+
+from core.database_manager import DatabaseManager
+
+
+def _open_counter(db, monkeypatch):
+    opened = []
+    original = db._open_connection
+
+    def counting():
+        conn = original()
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(db, "_open_connection", counting)
+    return opened
+
+
+def test_short_lived_threads_reuse_pooled_connections(tmp_path, monkeypatch):
+    # wie pywebview: jeder Aufruf in einem eigenen, kurzlebigen Thread
+    db = DatabaseManager(str(tmp_path / "a.db"))
+    db.setup_database()
+    opened = _open_counter(db, monkeypatch)
+    for i in range(50):
+        t = threading.Thread(target=db.add_module, args=(f"Modul {i}",))
+        t.start()
+        t.join()
+    assert len(db.get_modules()) == 50
+    assert len(opened) == 0
+    db.close()
+
+
+def test_pool_keeps_at_most_pool_size_idle_connections(tmp_path):
+    db = DatabaseManager(str(tmp_path / "a.db"), pool_size=2)
+    db.setup_database()
+    barrier = threading.Barrier(5)
+
+    def hold():
+        with db._connection() as (conn, cur):
+            barrier.wait()
+            cur.execute("SELECT 1").fetchone()
+
+    threads = [threading.Thread(target=hold) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert db._idle.qsize() == 2
+    db.close()
+    assert db._idle.qsize() == 0
+
+
+def test_connection_borrowed_during_close_is_not_reused(tmp_path):
+    db = DatabaseManager(str(tmp_path / "a.db"))
+    db.setup_database()
+    with db._connection() as (conn, _):
+        db.close()
+    assert db._idle.qsize() == 0
+    assert db.get_modules() == []
+
+
+def test_nested_checkouts_do_not_block(tmp_path):
+    db = DatabaseManager(str(tmp_path / "a.db"), pool_size=1)
+    db.setup_database()
+    module_id = db.add_module("Mathe")
+    db.add_pool("Pool", module_id)
+    rows = []
+    for row in db.iter_module_rows(module_id):
+        rows.append(row)
+        db.add_task("x", row[0])  # schreibt, während der Generator seine Verbindung hält
+    assert len(rows) == 1 and db.count_tasks_in_pool(rows[0][0]) == 1
+    db.close()
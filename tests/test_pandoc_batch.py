@@ -0,0 +1,40 @@
+# tests/test_pandoc_batch.py
+import shutil
+import sys
+import types
+
+import pytest
+
+from core import pandoc_batch
+from core.pandoc_batch import convert_many, convert_one
+
+DOCUMENTS = [
+    "## Aufgabe\n\nBerechne $\\int_0^1 x\\,dx$.",
+    "## Aufgabe\n\nZeige, dass *A* gilt.",
+    "## Lösung\n\n- eins\n- zwei",
+]
+
+
+def test_single_and_batched_conversions_use_the_same_format(monkeypatch):
+    formats = []
+
+    def convert_text(source, to, format):
+        formats.append(format)
+        return source
+
+    monkeypatch.setitem(sys.modules, "pypandoc", types.SimpleNamespace(convert_text=convert_text))
+    convert_one(DOCUMENTS[0], "html")
+    convert_many(DOCUMENTS, "html")
+    convert_many(DOCUMENTS[:1], "html")
+    assert len(formats) == 3
+    assert set(formats) == {"markdown" + pandoc_batch.CONVERTER_OPTIONS}
+
+
+@pytest.mark.parametrize("to", ["html", "latex"])
+def test_document_converts_identically_alone_and_in_a_batch(to):
+    pytest.importorskip("pypandoc")
+    if not shutil.which("pandoc"):
+        pytest.skip("pandoc nicht installiert")
+    alone = [convert_one(doc, to) for doc in DOCUMENTS]
+    assert all(error is None for _, error in alone)
+    assert convert_many(DOCUMENTS, to) == alone
@@ -0,0 +1,45 @@
+# tests/test_render_cache.py
+from core.render_cache import RenderCache
+
+
+class FakeDb:
+    def __init__(self):
+        self.rows = {}
+
+    def store_rendered(self, rows):
+        for key, _task_id, _fmt, _version, output in rows:
+            self.rows[key] = output
+
+    def get_rendered(self, keys):
+        return {key: self.rows[key] for key in keys if key in self.rows}
+
+    def purge_rendered(self, keep_version):
+        pass
+
+    def delete_rendered_for_task(self, task_id):
+        pass
+
+
+def _cache(max_entries):
+    return RenderCache(FakeDb(), max_entries=max_entries, converter_version="test")
+
+
+def test_evicted_keys_leave_the_task_index():
+    cache = _cache(max_entries=10)
+    for task_id in range(1000):
+        cache.put_many([(task_id, f"Aufgabe {task_id}", f"<p>{task_id}</p>")], "html")
+    assert len(cache._memory) == 10
+    assert set(cache._task_keys) == set(range(990, 1000))
+    assert sum(len(keys) for keys in cache._task_keys.values()) == 10
+    assert len(cache._key_tasks) == 10
+
+
+def test_shared_content_is_tracked_for_every_task():
+    cache = _cache(max_entries=2)
+    cache.put_many([(1, "gleich", "<p>x</p>"), (2, "gleich", "<p>x</p>")], "html")
+    cache.invalidate_task(1)
+    assert cache._task_keys == {} and cache._key_tasks == {}
+    assert len(cache._memory) == 0
+    # spätere Einträge verdrängen; der Index bleibt leer bzw. klein
+    cache.put_many([(3, "a", "A"), (4, "b", "B"), (5, "c", "C")], "html")
+    assert set(cache._task_keys) == {4, 5}
@@ -0,0 +1,81 @@
+# tests/test_service.py
+import asyncio
+import json
+
+import pytest
+
+from core.service import ApiService
+
+TOKEN = "geheim"
+
+
+class FakeApi:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_module(self, module_id):
+        self.deleted.append(module_id)
+        return {"success": True}
+
+
+async def _request(service, method, path, body=b"", headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", service.port)
+    headers = {"Host": f"127.0.0.1:{service.port}", "Authorization": f"Bearer {TOKEN}",
+               "Content-Length": str(len(body)), "Connection": "close", **(headers or {})}
+    head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items() if v is not None)
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    return int(status_line.split()[1]), json.loads(rest.partition(b"\r\n\r\n")[2])
+
+
+def _call(method, path, body=b"", headers=None):
+    api = FakeApi()
+    service = ApiService(api, "127.0.0.1", 0, token=TOKEN, request_workers=1)
+
+    async def run():
+        server = await service.start()
+        async with server:
+            return await _request(service, method, path, body, headers)
+
+    try:
+        status, payload = asyncio.run(run())
+    finally:
+        service.close()
+    return status, payload, api
+
+
+def test_json_post_is_accepted():
+    status, payload, api = _call("POST", "/api/delete_module", b"[1]", {"Content-Type": "application/json"})
+    assert status == 200 and payload == {"result": {"success": True}}
+    assert api.deleted == [1]
+
+
+@pytest.mark.parametrize("content_type", ["text/plain", "application/x-www-form-urlencoded", None])
+def test_simple_cross_origin_post_is_rejected(content_type):
+    status, _, api = _call("POST", "/api/delete_module", b"[1]", {"Content-Type": content_type})
+    assert status == 415
+    assert api.deleted == []
+
+
+def test_origin_header_is_rejected():
+    status, _, api = _call("POST", "/api/delete_module", b"[1]",
+                           {"Content-Type": "application/json", "Origin": "https://example.com"})
+    assert status == 403
+    assert api.deleted == []
+
+
+@pytest.mark.parametrize("host", ["evil.example:8765", "evil.example", None])
+def test_foreign_host_is_rejected(host):
+    status, _, api = _call("POST", "/api/delete_module", b"[1]", {"Content-Type": "application/json", "Host": host})
+    assert status == 403
+    assert api.deleted == []
+
+
+def test_missing_token_is_rejected():
+    status, _, api = _call("POST", "/api/delete_module", b"[1]",
+                           {"Content-Type": "application/json", "Authorization": None})
+    assert status == 401
+    assert api.deleted == []
@@ -144,7 +144,7 @@ document.addEventListener('DOMContentLoaded', () => {
         newPoolName.value = '';
         _currentModuleForPool = null;
         poolModuleIdDisplay.textContent = '—';
-        await fetchModules();
+        await syncChanges(res.version);
       } else {
         showToast(res && res.message ? res.message : 'Fehler beim Erstellen', true);
       }
@@ -155,7 +155,14 @@ document.addEventListener('DOMContentLoaded', () => {
   });
 
   // Create Exam modal
-  if(cancelCreateExam) cancelCreateExam.addEventListener('click', ()=> { closeModal(createExamModal); examStatus.textContent=''; });
+  if(cancelCreateExam) cancelCreateExam.addEventListener('click', async ()=> {
+    // while a build is running the button cancels it (kills lualatex); the modal closes afterwards
+    if(_examJobId){
+      const api = await getApiOrNull();
+      if(api){ examStatus.textContent = 'Wird abgebrochen...'; await api.cancel_job(_examJobId); return; }
+    }
+    closeModal(createExamModal); examStatus.textContent='';
+  });
   if(confirmCreateExam) confirmCreateExam.addEventListener('click', async ()=>{
     const moduleId = selectModule?.value;
     const filename = (examFilename?.value || '').trim();
@@ -183,27 +190,76 @@ document.addEventListener('DOMContentLoaded', () => {
       showToast(res && res.success ? 'Modul erstellt' : (res.message || 'Fehler'));
       closeModal(createModuleModal);
       newModuleName.value = '';
-      await fetchModules();
+      if(res && res.success) await syncChanges(res.version);
     }catch(e){
       console.error('createModule error', e);
       showToast('Fehler beim Erstellen', true);
     }
   }
 
+  // ---- exam builds run as backend jobs; status and stages are pushed via window.onJobUpdate ----
+  let _examJobId = null;
+  const _jobUpdates = {};
+  const STAGE_TEXT = {
+    select: 'Aufgaben werden ausgewählt...',
+    convert: 'Aufgaben werden konvertiert...',
+    cached: 'PDF aus dem Build-Cache...',
+  };
+
+  function describeJob(job){
+    const ev = job.event;
+    if(job.status === 'queued') return 'In der Warteschlange...';
+    if(job.status === 'done'){
+      const r = job.result || {};
+      return 'Fertig: ' + r.path + (r.seed != null ? ' (Seed ' + r.seed + ')' : '');
+    }
+    if(job.status === 'failed') return 'Fehler: ' + (job.error || 'unknown');
+    if(job.status === 'cancelled') return 'Abgebrochen';
+    if(ev && ev.status === 'stage'){
+      if(ev.stage === 'compile') return 'LaTeX-Kompilierung, Lauf ' + ev.pass + '...';
+      return STAGE_TEXT[ev.stage] || 'Generiere PDF...';
+    }
+    return 'Generiere PDF...';
+  }
+
+  function showExamJob(job){
+    if(examStatus) examStatus.textContent = describeJob(job);
+    if(job.status === 'done'){
+      _examJobId = null;
+      showToast('Klausur erstellt', false);
+      setTimeout(()=> closeModal(createExamModal), 800);
+    } else if(job.status === 'failed'){
+      _examJobId = null;
+      showToast('Fehler bei der Erstellung', true);
+    } else if(job.status === 'cancelled'){
+      _examJobId = null;
+      showToast('Build abgebrochen', false);
+    }
+  }
+
+  window.onJobUpdate = function(job){
+    if(!job) return;
+    if(job.id === _examJobId){ delete _jobUpdates[job.id]; showExamJob(job); return; }
+    // updates can arrive before start_build has returned the job id
+    _jobUpdates[job.id] = job;
+  };
+
   async function buildExam(moduleId, filename){
     const api = await getApiOrNull();
     if(!api){ showToast('Backend nicht erreichbar', true); return; }
+    if(_examJobId){ showToast('Es läuft bereits ein Build', true); return; }
     try{
-      examStatus.textContent = 'Generiere PDF...';
-      const res = await api.build_exam_for_module(moduleId, filename || '');
-      if(res && res.success){
-        examStatus.textContent = 'Fertig: ' + res.path;
-        showToast('Klausur erstellt', false);
-        setTimeout(()=> closeModal(createExamModal), 800);
-      } else {
+      examStatus.textContent = 'Build wird gestartet...';
+      const res = await api.start_build('exam', {module_id: moduleId, filename: filename || ''});
+      if(!res || !res.success){
         examStatus.textContent = 'Fehler: ' + (res && res.message ? res.message : 'unknown');
         showToast('Fehler bei der Erstellung', true);
+        return;
       }
+      _examJobId = res.job_id;
+      const early = _jobUpdates[res.job_id];
+      delete _jobUpdates[res.job_id];
+      if(early) showExamJob(early);
     } catch(e){
       console.error('buildExam error', e);
       examStatus.textContent = 'Fehler beim Generieren';
@@ -221,66 +277,43 @@ document.addEventListener('DOMContentLoaded', () => {
   function renderModules(modules){
     if(!modulesGrid) return;
     modulesGrid.innerHTML = '';
+    if(selectModule) selectModule.innerHTML = '<option value="">-- auswählen --</option>';
     if(!modules || modules.length===0){ showEmpty(true); return; }
     showEmpty(false);
 
-    if(selectModule) selectModule.innerHTML = '<option value="">-- auswählen --</option>';
-
     for(const m of modules){
       const id = Array.isArray(m) ? m[0] : (m.id || m[0]);
       const name = Array.isArray(m) ? m[1] : (m.name || m[1]);
-      const card = document.createElement('div');
-      card.className = 'module-card';
-      card.innerHTML = `
-        <div class="content">
-          <h3>${escapeHtml(name)}</h3>
-          <div class="meta">
-            <span class="module-count">Pools: <span data-pools="${id}">–</span></span>
-            <span>Aufgaben: <span data-tasks="${id}">–</span></span>
-          </div>
-        </div>
-        <div class="actions">
-          <button class="btn btn-ghost" data-action="open" data-id="${id}">Öffnen</button>
-          <button class="btn btn-ghost" data-action="add-pool" data-id="${id}">Pool +</button>
-          <button class="btn btn-ghost" data-action="delete" data-id="${id}">Löschen</button>
-        </div>
-      `;
-      modulesGrid.appendChild(card);
-
+      modulesGrid.appendChild(moduleCard(id, name));
       if(selectModule){
         const opt = document.createElement('option'); opt.value = id; opt.textContent = name;
         selectModule.appendChild(opt);
       }
-
-      // async counts
-      (async ()=>{
-        try{
-          const api = await getApiOrNull();
-          if(!api) return;
-          const pools = await api.get_pools_for_module(id);
-          const poolCount = pools ? pools.length : 0;
-          const poolSpan = document.querySelector(`[data-pools="${id}"]`);
-          poolSpan && (poolSpan.textContent = poolCount);
-
-          let taskTotal = 0;
-          for(const p of (pools || [])){
-            const pid = Array.isArray(p) ? p[0] : p.id;
-            const tasks = await api.get_tasks_from_pool(pid);
-            taskTotal += (tasks ? tasks.length : 0);
-            const tspan = document.querySelector(`[data-tasks="${id}"]`);
-            tspan && (tspan.textContent = taskTotal);
-          }
-        }catch(e){
-          console.warn('count error', e);
-        }
-      })();
+      loadModuleCounts(id);
     }
+  }
 
-    // attach handlers
-    modulesGrid.querySelectorAll('button').forEach(b=>{
+  function moduleCard(id, name){
+    const card = document.createElement('div');
+    card.className = 'module-card';
+    card.dataset.moduleId = id;
+    card.innerHTML = `
+      <div class="content">
+        <h3>${escapeHtml(name)}</h3>
+        <div class="meta">
+          <span class="module-count">Pools: <span data-pools="${id}">–</span></span>
+          <span>Aufgaben: <span data-tasks="${id}">–</span></span>
+        </div>
+      </div>
+      <div class="actions">
+        <button class="btn btn-ghost" data-action="open" data-id="${id}">Öffnen</button>
+        <button class="btn btn-ghost" data-action="add-pool" data-id="${id}">Pool +</button>
+        <button class="btn btn-ghost" data-action="delete" data-id="${id}">Löschen</button>
+      </div>
+    `;
+    card.querySelectorAll('button').forEach(b=>{
       b.addEventListener('click', async ()=>{
         const action = b.dataset.action;
-        const id = b.dataset.id;
         if(action === 'open') window.location.href = `view_module.html?id=${encodeURIComponent(id)}`;
         if(action === 'add-pool'){
           // open our custom modal instead of prompt()
@@ -295,9 +328,9 @@ document.addEventListener('DOMContentLoaded', () => {
           const ok = confirm(`Modul wirklich löschen? ID ${id}`); // quick fallback; we also have a nicer confirm modal you can wire up
           if(!ok) return;
           try{
-            await api.delete_module(parseInt(id));
-            showToast('Löschen erfolgreich');
-            fetchModules();
+            const res = await api.delete_module(parseInt(id));
+            if(res && res.success){ showToast('Löschen erfolgreich'); await syncChanges(res.version); }
+            else showToast(res && res.message ? res.message : 'Fehler beim Löschen', true);
           }catch(e){
             console.error('delete module', e);
             showToast('Fehler beim Löschen', true);
@@ -305,6 +338,78 @@ document.addEventListener('DOMContentLoaded', () => {
         }
       });
     });
+    return card;
+  }
+
+  // pool/task counts of one module card (ids only, nothing is rendered through pandoc)
+  async function loadModuleCounts(id){
+    try{
+      const api = await getApiOrNull();
+      if(!api) return;
+      const tree = await api.get_module_tree(id);
+      const pools = tree ? tree.pools : [];
+      const poolSpan = document.querySelector(`[data-pools="${id}"]`);
+      poolSpan && (poolSpan.textContent = pools.length);
+
+      const taskTotal = pools.reduce((sum, p)=> sum + (p.tasks ? p.tasks.length : 0), 0);
+      const tspan = document.querySelector(`[data-tasks="${id}"]`);
+      tspan && (tspan.textContent = taskTotal);
+    }catch(e){
+      console.warn('count error', e);
+    }
+  }
+
+  // ---- change events: the backend pushes one event per mutation, rows are patched in place ----
+  let dataVersion = null; // data version of the rendered list; null until the first full load
+
+  function applyChange(ev){
+    if(ev.entity === 'module' && ev.op === 'add'){
+      if(!modulesGrid || modulesGrid.querySelector(`[data-module-id="${ev.id}"]`)) return;
+      // keep the list sorted by name like get_modules
+      const card = moduleCard(ev.id, ev.name);
+      const next = [...modulesGrid.querySelectorAll('.module-card')]
+        .find(c => (c.querySelector('h3')?.textContent || '').localeCompare(ev.name) > 0);
+      modulesGrid.insertBefore(card, next || null);
+      card.querySelector(`[data-pools="${ev.id}"]`).textContent = 0;
+      card.querySelector(`[data-tasks="${ev.id}"]`).textContent = 0;
+      if(selectModule){
+        const opt = document.createElement('option'); opt.value = ev.id; opt.textContent = ev.name;
+        selectModule.appendChild(opt);
+      }
+      showEmpty(false);
+    } else if(ev.entity === 'module' && ev.op === 'delete'){
+      modulesGrid?.querySelector(`[data-module-id="${ev.id}"]`)?.remove();
+      selectModule?.querySelector(`option[value="${ev.id}"]`)?.remove();
+      if(modulesGrid && !modulesGrid.querySelector('.module-card')) showEmpty(true);
+    } else if((ev.entity === 'pool' || ev.entity === 'task') && ev.op !== 'update' && ev.module_id != null){
+      loadModuleCounts(ev.module_id);
+    }
+  }
+
+  function onDataChange(ev){
+    if(!ev || dataVersion === null || ev.version <= dataVersion) return;
+    if(ev.version !== dataVersion + 1){ syncChanges(ev.version); return; } // missed an event
+    if(ev.op === 'reload'){ fetchModules(); return; } // written elsewhere (Tk GUI, CLI, import), no row events
+    applyChange(ev);
+    dataVersion = ev.version;
+  }
+  window.onDataChange = onDataChange;
+
+  // fetches the events up to `version` that have not arrived yet; reloads fully if they are gone
+  async function syncChanges(version){
+    if(dataVersion === null || version == null || version <= dataVersion) return;
+    const api = await getApiOrNull();
+    if(!api) return;
+    try{
+      const res = await api.get_changes(dataVersion);
+      if(!res || !res.complete){ await fetchModules(); return; }
+      for(const ev of res.changes){
+        if(ev.version > dataVersion){ applyChange(ev); dataVersion = ev.version; }
+      }
+    }catch(e){
+      console.error('syncChanges error', e);
+      await fetchModules();
+    }
   }
 
   // ---- populate module select for exam modal ----
@@ -331,8 +436,11 @@ document.addEventListener('DOMContentLoaded', () => {
     if(!api){ setStatus('Backend nicht erreichbar', 'fail'); showEmpty(true); return; }
     try{
       setStatus('Module werden geladen...', 'checking');
+      // version first: events that race with the load are applied again, which is harmless
+      const version = await api.get_data_version();
       const modules = await api.get_modules();
       renderModules(Array.isArray(modules) ? modules : []);
+      dataVersion = version ? version.version : null;
       setStatus('Backend: erreichbar', 'ok');
     }catch(e){
       console.error('fetchModules error', e);
@@ -341,6 +449,28 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  // LaTeX-Aufwärmlauf (Python ruft das per evaluate_js auf, solange er läuft)
+  function setWarmupProgress(percent, message){
+    const el = by('latexWarmupStatus');
+    if(!el) return;
+    el.textContent = message || '';
+    el.classList.remove('hidden');
+    clearTimeout(setWarmupProgress._timer);
+    if(percent >= 100) setWarmupProgress._timer = setTimeout(()=> el.classList.add('hidden'), 5000);
+  }
+  window.setWarmupProgress = setWarmupProgress;
+
+  // der Aufwärmlauf kann schon vor dem Laden dieser Seite Meldungen geschickt haben
+  async function showWarmupState(api){
+    try{
+      const status = await api.get_startup_status();
+      const warmup = status && status.latex_warmup;
+      if(warmup && !warmup.done) setWarmupProgress(warmup.percent, warmup.message);
+    }catch(e){
+      console.debug('get_startup_status error', e);
+    }
+  }
+
   // expose for console/debugging
   window.fetchModules = fetchModules;
   window.openCreateModule = ()=> openModal(createModuleModal);
@@ -364,6 +494,7 @@ document.addEventListener('DOMContentLoaded', () => {
       console.log('pywebview.api now available (background)');
       _api = api;
       fetchModules();
+      showWarmupState(api);
     } else {
       console.warn('pywebview.api not available after retries');
       setStatus('Backend nicht erreichbar', 'fail');
@@ -92,7 +92,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if(!api){ showToast('Backend nicht erreichbar', true); return; }
     try{
       const res = await api.add_pool(name, parseInt(moduleId));
-      if(res && res.success){ showToast('Pool angelegt'); newPoolName.value=''; closeModal(createPoolModal); await reloadPools(); }
+      if(res && res.success){ showToast('Pool angelegt'); newPoolName.value=''; closeModal(createPoolModal); await syncChanges(res.version); }
       else showToast(res && res.message ? res.message : 'Fehler', true);
     }catch(e){ console.error(e); showToast('Fehler', true); }
   });
@@ -126,7 +126,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // updateTask - ensure API supports this (see instructions)
         if(typeof api.update_task === 'function'){
           const res = await api.update_task(editingTaskId, content);
-          if(res && res.success){ showToast('Aufgabe aktualisiert'); closeModal(createTaskModal); await reloadTasks(currentPoolId); }
+          if(res && res.success){ showToast('Aufgabe aktualisiert'); closeModal(createTaskModal); await syncChanges(res.version); }
           else showToast(res && res.message ? res.message : 'Fehler beim Speichern', true);
         } else {
           // fallback: delete + create (not ideal)
@@ -137,7 +137,7 @@ document.addEventListener('DOMContentLoaded', () => {
         }
       } else {
         const res = await api.add_task(content, parseInt(currentPoolId));
-        if(res && res.success){ showToast('Aufgabe angelegt'); closeModal(createTaskModal); await reloadTasks(currentPoolId); }
+        if(res && res.success){ showToast('Aufgabe angelegt'); closeModal(createTaskModal); await syncChanges(res.version); }
         else showToast(res && res.message ? res.message : 'Fehler', true);
       }
     }catch(e){ console.error(e); showToast('Fehler', true); }
@@ -169,6 +169,7 @@ document.addEventListener('DOMContentLoaded', () => {
   function poolCard(pool){
     const div = document.createElement('div');
     div.className = 'module-card pool-card';
+    div.dataset.poolId = pool[0] || pool.id;
     div.innerHTML = `
       <div class="content">
         <h3>${escapeHtml(pool[1] || pool.name || '')}</h3>
@@ -180,24 +181,41 @@ document.addEventListener('DOMContentLoaded', () => {
         <button class="btn btn-sm btn-ghost btn-delete-pool" data-id="${pool[0]||pool.id}">Löschen</button>
       </div>
     `;
+    div.querySelector('.btn-open-pool').addEventListener('click', async ()=>{
+      await reloadTasks(div.dataset.poolId);
+    });
+    div.querySelector('.btn-edit-pool').addEventListener('click', ()=>{
+      const pid = div.dataset.poolId;
+      // simple inline rename prompt (could be modal)
+      const old = pools.find(x => (Array.isArray(x) ? x[0] : x.id) == pid);
+      const oldName = Array.isArray(old) ? old[1] : (old && old.name);
+      const newName = prompt("Neuer Pool-Name:", oldName || '');
+      if(newName && newName.trim()){
+        // We don't have an API update_pool right now; fallback: create new & maybe delete old is not ideal.
+        showToast('Pool-Umbenennung noch nicht unterstützt (implementiere update_pool API)', true);
+      }
+    });
+    div.querySelector('.btn-delete-pool').addEventListener('click', async ()=>{
+      const pid = div.dataset.poolId;
+      const ok = await askConfirm('Pool löschen', `Möchtest du den Pool ID ${pid} wirklich löschen?`);
+      if(!ok) return;
+      const api = await getApi();
+      try{
+        const res = await api.delete_pool(parseInt(pid));
+        if(res && res.success){ showToast('Pool gelöscht'); await syncChanges(res.version); }
+        else showToast(res && res.message ? res.message : 'Fehler', true);
+      }catch(e){ console.error(e); showToast('Fehler', true); }
+    });
     return div;
   }
 
   // escape helper
   function escapeHtml(s){ return String(s||'').replace(/[&<>"']/g, m=>({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[m])); }
 
-  // load module + pools
+  // load module + pools (one round trip via get_module_tree)
   async function loadModule(){
     const api = await getApi();
     if(!api){ showToast('Backend nicht erreichbar', true); updateStatus('DB: nicht erreichbar', 'fail'); return; }
-    try{
-      const mod = await api.get_module_by_id(parseInt(moduleId));
-      if(!mod){ moduleName.textContent='Unbekannt'; moduleTitle.textContent='Module'; moduleMeta.textContent = `ID: ${moduleId}`; return; }
-      moduleName.textContent = mod[1] || mod.name || '—';
-      moduleTitle.textContent = mod[1] || mod.name || '—';
-      moduleMeta.textContent = `ID: ${mod[0] || mod.id}`;
-      updateStatus('DB: verbunden', 'ok');
-    }catch(e){ console.error(e); updateStatus('DB: nicht erreichbar', 'fail'); }
     await reloadPools();
   }
 
@@ -206,115 +224,203 @@ document.addEventListener('DOMContentLoaded', () => {
     if(!api) return;
     try{
       poolsGrid.innerHTML = '';
-      pools = await api.get_pools_for_module(parseInt(moduleId));
-      if(!pools || pools.length===0){ poolsEmpty && poolsEmpty.classList.remove('hidden'); poolCount.textContent = 0; return; }
+      // version first: events that race with the load are applied again, which is harmless
+      const version = await api.get_data_version();
+      const tree = await api.get_module_tree(parseInt(moduleId));
+      dataVersion = version ? version.version : null;
+      if(!tree){ moduleName.textContent='Unbekannt'; moduleTitle.textContent='Module'; moduleMeta.textContent = `ID: ${moduleId}`; pools = []; poolCount.textContent = 0; return; }
+      moduleName.textContent = tree.name || '—';
+      moduleTitle.textContent = tree.name || '—';
+      moduleMeta.textContent = `ID: ${tree.id}`;
+      updateStatus('DB: verbunden', 'ok');
+      pools = tree.pools || [];
+      if(pools.length===0){ poolsEmpty && poolsEmpty.classList.remove('hidden'); poolCount.textContent = 0; taskCount.textContent = 0; return; }
       poolsEmpty && poolsEmpty.classList.add('hidden');
       poolCount.textContent = pools.length;
-      // compute total tasks
+      // compute total tasks (tree carries task ids per pool)
       let totalTasks = 0;
       for(const p of pools){
-        const pid = Array.isArray(p) ? p[0] : p.id;
-        const tasks = await api.get_tasks_from_pool(pid);
-        totalTasks += tasks ? tasks.length : 0;
+        totalTasks += p.tasks ? p.tasks.length : 0;
         const card = poolCard(p);
         poolsGrid.appendChild(card);
       }
       taskCount.textContent = totalTasks;
-      // attach handlers
-      poolsGrid.querySelectorAll('.btn-open-pool').forEach(b=>{
-        b.addEventListener('click', async (ev)=>{
-          const pid = b.dataset.id;
-          await reloadTasks(pid);
-        });
-      });
-      poolsGrid.querySelectorAll('.btn-edit-pool').forEach(b=>{
-        b.addEventListener('click', (ev)=>{
-          const pid = b.dataset.id;
-          // simple inline rename prompt (could be modal)
-          const old = pools.find(x => (Array.isArray(x) ? x[0] : x.id) == pid);
-          const oldName = Array.isArray(old) ? old[1] : (old && old.name);
-          const newName = prompt("Neuer Pool-Name:", oldName || '');
-          if(newName && newName.trim()){
-            // We don't have an API update_pool right now; fallback: create new & maybe delete old is not ideal.
-            showToast('Pool-Umbenennung noch nicht unterstützt (implementiere update_pool API)', true);
-          }
-        });
-      });
-      poolsGrid.querySelectorAll('.btn-delete-pool').forEach(b=>{
-        b.addEventListener('click', async ()=>{
-          const pid = b.dataset.id;
-          const ok = await askConfirm('Pool löschen', `Möchtest du den Pool ID ${pid} wirklich löschen?`);
-          if(!ok) return;
-          const api = await getApi();
-          try{
-            const res = await api.delete_pool(parseInt(pid));
-            if(res && res.success){ showToast('Pool gelöscht'); await reloadPools(); await reloadTasks(null); }
-            else showToast(res && res.message ? res.message : 'Fehler', true);
-          }catch(e){ console.error(e); showToast('Fehler', true); }
-        });
-      });
-    }catch(e){ console.error(e); showToast('Fehler beim Laden der Pools', true); }
+    }catch(e){ console.error(e); updateStatus('DB: nicht erreichbar', 'fail'); showToast('Fehler beim Laden der Pools', true); }
+  }
+
+  // tasks loading for a pool (keyset pages: only the visible page is loaded with content and HTML)
+  const TASK_PAGE_SIZE = 50;
+  let taskPage = { poolId: null, nextAfterId: null, loaded: new Map(), total: 0 };
+
+  function taskRow(t){
+    const div = document.createElement('div');
+    div.className = 'task-list task';
+    div.dataset.taskId = t.id;
+    div.style.marginBottom = '10px';
+    div.innerHTML = `
+      <div style="display:flex; justify-content:space-between; gap:8px;">
+        <div style="flex:1;">
+          <div class="hint">ID: ${t.id}</div>
+          <div style="margin-top:6px;">${escapeHtml(t.raw_md.slice(0,300)).replace(/\n/g,'<br>')}</div>
+        </div>
+        <div style="display:flex; flex-direction:column; gap:8px; margin-left:12px;">
+          <button class="btn btn-sm btn-ghost btn-edit-task" data-id="${t.id}">Bearbeiten</button>
+          <button class="btn btn-sm btn-ghost btn-delete-task" data-id="${t.id}">Löschen</button>
+        </div>
+      </div>
+    `;
+    div.querySelector('.btn-edit-task').addEventListener('click', ()=>{
+      const task = taskPage.loaded.get(t.id);
+      openTaskModal(taskPage.poolId, `ID:${taskPage.poolId}`, t.id, task ? task.raw_md : '');
+    });
+    div.querySelector('.btn-delete-task').addEventListener('click', async ()=>{
+      const ok = await askConfirm('Aufgabe löschen', `Aufgabe ID ${t.id} endgültig löschen?`);
+      if(!ok) return;
+      const api = await getApi();
+      try{
+        const res = await api.delete_task(parseInt(t.id));
+        if(res && res.success){ showToast('Aufgabe gelöscht'); await syncChanges(res.version); }
+        else showToast(res && res.message ? res.message : 'Fehler', true);
+      }catch(e){ console.error(e); showToast('Fehler', true); }
+    });
+    return div;
+  }
+
+  function updateTaskPager(){
+    let more = by('tasksLoadMore');
+    if(taskPage.nextAfterId === null){ if(more) more.remove(); return; }
+    if(!more){
+      more = document.createElement('button');
+      more.id = 'tasksLoadMore';
+      more.className = 'btn btn-ghost';
+      more.style.marginTop = '6px';
+      more.addEventListener('click', ()=> loadTaskPage());
+      tasksSection.appendChild(more);
+    }
+    more.disabled = false;
+    more.textContent = `Mehr laden (${taskPage.loaded.size} von ${taskPage.total})`;
+  }
+
+  async function loadTaskPage(){
+    const api = await getApi();
+    if(!api) { showToast('Backend nicht erreichbar', true); return; }
+    const poolId = taskPage.poolId;
+    const more = by('tasksLoadMore');
+    if(more){ more.disabled = true; more.textContent = 'Lade…'; }
+    try{
+      const page = await api.get_task_page(parseInt(poolId), taskPage.nextAfterId || 0, TASK_PAGE_SIZE);
+      if(poolId !== taskPage.poolId) return; // pool changed while loading
+      if(page.total !== null && page.total !== undefined) taskPage.total = page.total;
+      const frag = document.createDocumentFragment();
+      (page.tasks || []).forEach(t=>{ taskPage.loaded.set(t.id, t); frag.appendChild(taskRow(t)); });
+      tasksContainer.appendChild(frag);
+      taskPage.nextAfterId = page.next_after_id;
+      updateTaskPager();
+    }catch(e){ console.error(e); showToast('Fehler beim Laden der Aufgaben', true); if(more) more.disabled = false; }
   }
 
-  // tasks loading for a pool
   async function reloadTasks(poolId){
     tasksContainer.innerHTML = '';
     tasksSection.style.display = 'none';
     tasksEmpty.classList.add('hidden');
     tasksTitle.textContent = 'Aufgaben im Pool';
     tasksSubtitle.textContent = '';
+    taskPage = { poolId: poolId, nextAfterId: null, loaded: new Map(), total: 0 };
+    updateTaskPager();
     if(!poolId) return;
+    await loadTaskPage();
+    if(taskPage.poolId !== poolId) return;
+    tasksSection.style.display = 'block';
+    if(taskPage.loaded.size === 0){ tasksEmpty.classList.remove('hidden'); return; }
+    tasksTitle.textContent = `Aufgaben — Pool ${poolId}`;
+    tasksSubtitle.textContent = `${taskPage.total} Aufgaben`;
+  }
+
+  // ---- change events: the backend pushes one event per mutation, rows are patched in place ----
+  let dataVersion = null; // data version of the rendered view; null until the first full load
+
+  function findPool(poolId){ return pools.find(p => (Array.isArray(p) ? p[0] : p.id) == poolId); }
+
+  function updateCounts(){
+    poolCount.textContent = pools.length;
+    taskCount.textContent = pools.reduce((sum, p)=> sum + (p.tasks ? p.tasks.length : 0), 0);
+    poolsEmpty && poolsEmpty.classList.toggle('hidden', pools.length > 0);
+  }
+
+  function updateTaskHeader(){
+    if(!taskPage.poolId) return;
+    tasksSubtitle.textContent = `${taskPage.total} Aufgaben`;
+    tasksEmpty.classList.toggle('hidden', taskPage.loaded.size > 0);
+    updateTaskPager();
+  }
+
+  function applyChange(ev){
+    if(ev.entity === 'module' && ev.id == moduleId && ev.op === 'delete'){
+      showToast('Dieses Modul wurde gelöscht', true);
+      setTimeout(()=> window.location.href = 'index.html', 1500);
+      return;
+    }
+    if(ev.module_id != moduleId) return;
+    if(ev.entity === 'pool' && ev.op === 'add' && !findPool(ev.id)){
+      const pool = {id: ev.id, name: ev.name, tasks: []};
+      pools.push(pool);
+      poolsGrid.appendChild(poolCard(pool));
+      updateCounts();
+    } else if(ev.entity === 'pool' && ev.op === 'delete'){
+      pools = pools.filter(p => (Array.isArray(p) ? p[0] : p.id) != ev.id);
+      poolsGrid.querySelector(`[data-pool-id="${ev.id}"]`)?.remove();
+      updateCounts();
+      if(taskPage.poolId == ev.id) reloadTasks(null);
+    } else if(ev.entity === 'task'){
+      const pool = findPool(ev.pool_id);
+      if(pool && pool.tasks){
+        if(ev.op === 'add' && !pool.tasks.includes(ev.id)) pool.tasks.push(ev.id);
+        if(ev.op === 'delete') pool.tasks = pool.tasks.filter(id => id != ev.id);
+        updateCounts();
+      }
+      if(taskPage.poolId != ev.pool_id) return;
+      const row = tasksContainer.querySelector(`[data-task-id="${ev.id}"]`);
+      const task = {id: ev.id, raw_md: ev.raw_md || ''};
+      if(ev.op === 'add' && !taskPage.loaded.has(ev.id)){
+        taskPage.total += 1;
+        // pages are ordered by id, a new task belongs at the end; appear once the last page is loaded
+        if(taskPage.nextAfterId === null){ taskPage.loaded.set(ev.id, task); tasksContainer.appendChild(taskRow(task)); }
+        updateTaskHeader();
+      } else if(ev.op === 'update' && taskPage.loaded.has(ev.id)){
+        taskPage.loaded.set(ev.id, {...taskPage.loaded.get(ev.id), raw_md: task.raw_md});
+        row && row.replaceWith(taskRow(taskPage.loaded.get(ev.id)));
+      } else if(ev.op === 'delete' && taskPage.loaded.has(ev.id)){
+        taskPage.loaded.delete(ev.id);
+        taskPage.total = Math.max(0, taskPage.total - 1);
+        row && row.remove();
+        updateTaskHeader();
+      }
+    }
+  }
+
+  window.onDataChange = function(ev){
+    if(!ev || dataVersion === null || ev.version <= dataVersion) return;
+    if(ev.version !== dataVersion + 1){ syncChanges(ev.version); return; } // missed an event
+    if(ev.op === 'reload'){ reloadPools().then(()=> reloadTasks(taskPage.poolId)); return; } // written elsewhere, no row events
+    applyChange(ev);
+    dataVersion = ev.version;
+  };
+
+  // fetches the events up to `version` that have not arrived yet; reloads fully if they are gone
+  async function syncChanges(version){
+    if(dataVersion === null || version == null || version <= dataVersion) return;
     const api = await getApi();
-    if(!api) { showToast('Backend nicht erreichbar', true); return; }
+    if(!api) return;
     try{
-      const tasks = await api.get_tasks_from_pool(parseInt(poolId));
-      if(!tasks || tasks.length===0){ tasksEmpty.classList.remove('hidden'); tasksSection.style.display = 'block'; return; }
-      tasksSection.style.display = 'block';
-      tasksTitle.textContent = `Aufgaben — Pool ${poolId}`;
-      tasksSubtitle.textContent = `${tasks.length} Aufgaben`;
-      tasks.forEach(t=>{
-        const div = document.createElement('div');
-        div.className = 'task-list task';
-        div.style.marginBottom = '10px';
-        div.innerHTML = `
-          <div style="display:flex; justify-content:space-between; gap:8px;">
-            <div style="flex:1;">
-              <div class="hint">ID: ${t.id}</div>
-              <div style="margin-top:6px;">${t.raw_md.slice(0,300).replace(/\n/g,'<br>')}</div>
-            </div>
-            <div style="display:flex; flex-direction:column; gap:8px; margin-left:12px;">
-              <button class="btn btn-sm btn-ghost btn-edit-task" data-id="${t.id}">Bearbeiten</button>
-              <button class="btn btn-sm btn-ghost btn-delete-task" data-id="${t.id}">Löschen</button>
-            </div>
-          </div>
-        `;
-        tasksContainer.appendChild(div);
-      });
-
-      // attach task handlers
-      tasksContainer.querySelectorAll('.btn-edit-task').forEach(b=>{
-        b.addEventListener('click', async ()=>{
-          const tid = b.dataset.id;
-          // find raw content
-          const task = (await api.get_tasks_from_pool(parseInt(poolId))).find(x => x.id == tid);
-          const content = task ? task.raw_md : '';
-          openTaskModal(poolId, `ID:${poolId}`, parseInt(tid), content);
-        });
-      });
-      tasksContainer.querySelectorAll('.btn-delete-task').forEach(b=>{
-        b.addEventListener('click', async ()=>{
-          const tid = b.dataset.id;
-          const ok = await askConfirm('Aufgabe löschen', `Aufgabe ID ${tid} endgültig löschen?`);
-          if(!ok) return;
-          try{
-            const res = await api.delete_task(parseInt(tid));
-            if(res && res.success){ showToast('Aufgabe gelöscht'); await reloadTasks(poolId); await reloadPools(); }
-            else showToast(res && res.message ? res.message : 'Fehler', true);
-          }catch(e){ console.error(e); showToast('Fehler', true); }
-        });
-      });
-
-    }catch(e){ console.error(e); showToast('Fehler beim Laden der Aufgaben', true); }
+      const res = await api.get_changes(dataVersion);
+      if(!res || !res.complete){ await reloadPools(); await reloadTasks(taskPage.poolId); return; }
+      for(const ev of res.changes){
+        if(ev.version > dataVersion){ applyChange(ev); dataVersion = ev.version; }
+      }
+    }catch(e){
+      console.error('syncChanges error', e);
+      await reloadPools(); await reloadTasks(taskPage.poolId);
+    }
   }
 
   // Add-task button (opens createTaskModal; user chooses pool via dropdown? For quickness: if exactly one pool, preselect it)